@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Alerts
+Alert sinks plus a non-blocking dispatcher in front of them.
+
+A sink is anything with send(channel_id, message). DiscordSink shells out to
+`openclaw message send`, which blocks for up to 15s per message, so the radars
+wrap it in an AlertDispatcher: send() only appends to a bounded in-process
+queue and returns; a background worker drains it per channel. Per channel it:
+- waits `batch_window` after the first queued alert to catch bursts,
+- coalesces identical alerts ("... (x3)") and joins the rest into one message
+  (split at Discord's length limit),
+- never sends more often than once per `min_interval`.
+When the queue is full the oldest queued alert is dropped and counted.
+"""
+
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Tuple
+
+DISCORD_MAX_CHARS = 2000
+
+
+# ─── Sinks ───
+
+class DiscordSink:
+    """Post to Discord through the openclaw CLI (blocking)."""
+
+    def __init__(self, timeout: float = 15.0):
+        self.timeout = timeout
+
+    def send(self, channel_id: str, message: str):
+        try:
+            subprocess.run(
+                ["openclaw", "message", "send", "--channel", "discord",
+                 "--target", f"channel:{channel_id}", "--message", message],
+                timeout=self.timeout, capture_output=True
+            )
+        except Exception as e:
+            print(f"Failed to send to channel {channel_id}: {e}")
+
+
+class StdoutSink:
+    """Log instead of sending."""
+
+    def send(self, channel_id: str, message: str):
+        print(f"[Would send to {channel_id}]: {message[:50]}...")
+
+
+class MemorySink:
+    """Keep alerts in a list (benchmarks, dry runs)."""
+
+    def __init__(self):
+        self.messages: List[Tuple[str, str]] = []
+
+    def send(self, channel_id: str, message: str):
+        self.messages.append((channel_id, message))
+
+
+# ─── Dispatcher ───
+
+class AlertDispatcher:
+    """
+    Non-blocking sink wrapper: send() enqueues, a daemon worker delivers.
+    Use it wherever a sink is expected, e.g. ScannerService(sinks=[AlertDispatcher(DiscordSink())]).
+    """
+
+    def __init__(self, sink, max_queue: int = 500, min_interval: float = 2.0,
+                 batch_window: float = 0.5, max_chars: int = DISCORD_MAX_CHARS):
+        self.sink = sink
+        self.max_queue = max_queue
+        self.min_interval = min_interval
+        self.batch_window = batch_window
+        self.max_chars = max_chars
+
+        self._pending: Dict[str, deque] = {}      # channel -> deque of (queued_at, message)
+        self._next_send: Dict[str, float] = {}
+        self._depth = 0
+        self._sending = 0
+        self._cond = threading.Condition()
+        self._running = True
+        self.stats = {"queued": 0, "delivered": 0, "sends": 0, "coalesced": 0,
+                      "batched": 0, "dropped": 0, "errors": 0, "max_depth": 0}
+
+        # Started last: the worker reads all of the state above
+        self._worker = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+        self._worker.start()
+
+    # ─── Producer side ───
+
+    def send(self, channel_id: str, message: str):
+        """Queue an alert. Never blocks on delivery."""
+        with self._cond:
+            if not self._running:
+                self.stats["dropped"] += 1
+                return
+            if self._depth >= self.max_queue:
+                self._drop_oldest()
+            self._pending.setdefault(channel_id, deque()).append((time.monotonic(), message))
+            self._depth += 1
+            self.stats["queued"] += 1
+            self.stats["max_depth"] = max(self.stats["max_depth"], self._depth)
+            self._cond.notify()
+
+    def _drop_oldest(self):
+        channel = min((c for c, q in self._pending.items() if q), key=lambda c: self._pending[c][0][0])
+        self._pending[channel].popleft()
+        self._depth -= 1
+        self.stats["dropped"] += 1
+
+    # ─── Worker ───
+
+    def _run(self):
+        while True:
+            with self._cond:
+                batch = self._take_ready()
+                while batch is None:
+                    if not self._running and self._depth == 0:
+                        return
+                    self._cond.wait(self._wait_time())
+                    batch = self._take_ready()
+                self._sending += 1
+            channel, messages = batch
+            try:
+                self._deliver(channel, messages)
+            finally:
+                with self._cond:
+                    self._sending -= 1
+                    self._cond.notify_all()
+
+    def _take_ready(self):
+        """(channel, messages) for the first channel whose window and rate limit allow a send."""
+        now = time.monotonic()
+        for channel, queue in self._pending.items():
+            if not queue:
+                continue
+            window_open = self._running and now - queue[0][0] < self.batch_window
+            if window_open or now < self._next_send.get(channel, 0):
+                continue
+            messages = [message for _, message in queue]
+            queue.clear()
+            self._depth -= len(messages)
+            self._next_send[channel] = now + self.min_interval
+            return channel, messages
+        return None
+
+    def _wait_time(self) -> float:
+        now = time.monotonic()
+        waits = [1.0]
+        for channel, queue in self._pending.items():
+            if queue:
+                ready_at = max(queue[0][0] + self.batch_window, self._next_send.get(channel, 0))
+                waits.append(ready_at - now)
+        return max(min(waits), 0.01)
+
+    def _deliver(self, channel: str, messages: List[str]):
+        # Coalesce identical alerts, keeping first-seen order
+        counts: Dict[str, int] = {}
+        for message in messages:
+            counts[message] = counts.get(message, 0) + 1
+        lines = [m if n == 1 else f"{m} (x{n})" for m, n in counts.items()]
+        coalesced = len(messages) - len(counts)
+        if len(lines) > 1:
+            lines.insert(0, f"📦 {len(messages)} alerts")
+
+        for chunk in self._chunks(lines):
+            try:
+                self.sink.send(channel, chunk)
+                self.stats["sends"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"⚠️ Alert delivery to {channel} failed: {type(e).__name__}: {e}")
+        self.stats["delivered"] += len(messages)
+        self.stats["coalesced"] += coalesced
+        if len(messages) > 1:
+            self.stats["batched"] += 1
+
+    def _chunks(self, lines: List[str]):
+        """Join lines with blank lines, split so no chunk exceeds max_chars."""
+        chunk = ""
+        for line in lines:
+            line = line[:self.max_chars]
+            candidate = f"{chunk}\n\n{line}" if chunk else line
+            if len(candidate) > self.max_chars:
+                yield chunk
+                candidate = line
+            chunk = candidate
+        if chunk:
+            yield chunk
+
+    # ─── Lifecycle / metrics ───
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """Deliver everything queued now (ignoring the batch window). True if drained in time."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            saved, self.batch_window = self.batch_window, 0.0
+            self._cond.notify_all()
+            try:
+                while self._depth or self._sending:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(min(remaining, 0.1))
+                return True
+            finally:
+                self.batch_window = saved
+
+    def close(self, timeout: float = 30.0):
+        """Stop accepting alerts, deliver what is queued, stop the worker."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._worker.join(timeout)
+
+    def get_stats(self) -> Dict:
+        with self._cond:
+            return dict(self.stats, queue_depth=self._depth, in_flight=self._sending)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Batch Scanner
+Vectorized multi-product scan: closes for every product are stacked into one
+(products x window) matrix, MA / std / RSI / z-score are computed for all
+products in a single NumPy pass, and the Gate 2 thresholds from
+TradingEngine._detect_trigger are applied as boolean masks so only
+triggered rows are handed to evaluate_opportunity.
+
+Without numpy it falls back to compute_indicators per product (same values).
+"""
+
+from typing import Dict, List, Tuple
+
+from engine import TradingEngine
+from indicators import compute_indicators, rolling_rsi, np
+
+
+class BatchScanner:
+    """Enrich many tickers at once and pick out the ones Gate 2 would trigger on."""
+
+    def __init__(self, rsi_period: int = 14, ma_period: int = 20,
+                 trigger_z: float = TradingEngine.TRIGGER_Z,
+                 buy_max_rsi: float = TradingEngine.BUY_MAX_RSI,
+                 sell_min_rsi: float = TradingEngine.SELL_MIN_RSI):
+        self.rsi_period = rsi_period
+        self.ma_period = ma_period
+        self.window = max(rsi_period + 1, ma_period)
+        self.trigger_z = trigger_z
+        self.buy_max_rsi = buy_max_rsi
+        self.sell_min_rsi = sell_min_rsi
+
+    def scan(self, tickers: List[Dict], candle_lists: List[List[Dict]]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Attach rsi/ma/std/z_score/trigger_type to every ticker (in place).
+        Returns (all_tickers, triggered_tickers).
+        """
+        if np is None:
+            return self._scan_rows(tickers, candle_lists)
+
+        rsi_key, ma_key, std_key = self._keys()
+        closes, full_rows = self.stack_closes(candle_lists)
+
+        # Short or empty histories keep the legacy per-row fallbacks
+        for i, (ticker, candles) in enumerate(zip(tickers, candle_lists)):
+            if i not in full_rows:
+                self._fill_row(ticker, candles)
+
+        if full_rows:
+            rows = sorted(full_rows)
+            ind = self.batch_indicators(closes)
+            for j, i in enumerate(rows):
+                tickers[i][rsi_key] = float(ind["rsi"][j])
+                tickers[i][ma_key] = float(ind["ma"][j])
+                tickers[i][std_key] = float(ind["std"][j])
+
+        prices = np.array([t["market_price"] for t in tickers], dtype=np.float64)
+        ma = np.array([t[ma_key] for t in tickers], dtype=np.float64)
+        std = np.array([t[std_key] for t in tickers], dtype=np.float64)
+        rsi = np.array([t[rsi_key] for t in tickers], dtype=np.float64)
+
+        z = self.z_scores(prices, ma, std)
+        buy, sell = self.trigger_masks(z, rsi)
+
+        triggered = []
+        for i, ticker in enumerate(tickers):
+            ticker["z_score"] = float(z[i])
+            ticker["trigger_type"] = "MEAN_REVERSION_BUY" if buy[i] else "TREND_EXHAUSTION_SELL" if sell[i] else None
+            if ticker["trigger_type"]:
+                triggered.append(ticker)
+        return tickers, triggered
+
+    def stack_closes(self, candle_lists: List[List[Dict]]):
+        """(rows x window) matrix of the newest closes, plus the set of input rows that had a full window."""
+        full_rows = {i for i, candles in enumerate(candle_lists) if len(candles) >= self.window}
+        closes = np.empty((len(full_rows), self.window), dtype=np.float64)
+        for j, i in enumerate(sorted(full_rows)):
+            candles = candle_lists[i]
+            if int(candles[0].get("start", 0)) < int(candles[-1].get("start", 0)):
+                candles = sorted(candles, key=lambda c: int(c.get("start", 0)), reverse=True)
+            # Newest-first input -> oldest-first row
+            closes[j, ::-1] = [float(c.get("close", 0)) for c in candles[:self.window]]
+        return closes, full_rows
+
+    def batch_indicators(self, closes) -> Dict:
+        """MA, population std and RSI of the last window for every row, in one pass."""
+        ma_window = closes[:, -self.ma_period:]
+        return {
+            "ma": ma_window.mean(axis=1),
+            "std": ma_window.std(axis=1),
+            "rsi": rolling_rsi(closes[:, -(self.rsi_period + 1):], self.rsi_period)[:, -1],
+        }
+
+    @staticmethod
+    def z_scores(prices, ma, std):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(std > 0, (prices - ma) / std, 0.0)
+
+    def trigger_masks(self, z, rsi):
+        """Boolean masks mirroring TradingEngine._detect_trigger."""
+        buy = (z < -self.trigger_z) & (rsi < self.buy_max_rsi)
+        sell = ~buy & (z > self.trigger_z) & (rsi > self.sell_min_rsi)
+        return buy, sell
+
+    def _keys(self) -> Tuple[str, str, str]:
+        return f"rsi_{self.rsi_period}", f"ma_{self.ma_period}", f"std_{self.ma_period}"
+
+    def _fill_row(self, ticker: Dict, candles: List[Dict]):
+        """Per-product indicators with the radars' no-candle defaults."""
+        if candles:
+            ticker.update(compute_indicators(candles, self.rsi_period, self.ma_period))
+        else:
+            rsi_key, ma_key, std_key = self._keys()
+            ticker[rsi_key] = 50.0
+            ticker[ma_key] = ticker["market_price"]
+            ticker[std_key] = ticker["market_price"] * 0.01
+
+    def _scan_rows(self, tickers: List[Dict], candle_lists: List[List[Dict]]) -> Tuple[List[Dict], List[Dict]]:
+        """Pure-Python fallback, one product at a time."""
+        rsi_key, ma_key, std_key = self._keys()
+        triggered = []
+        for ticker, candles in zip(tickers, candle_lists):
+            self._fill_row(ticker, candles)
+            std = ticker[std_key]
+            z = (ticker["market_price"] - ticker[ma_key]) / std if std > 0 else 0
+            ticker["z_score"] = z
+            if z < -self.trigger_z and ticker[rsi_key] < self.buy_max_rsi:
+                ticker["trigger_type"] = "MEAN_REVERSION_BUY"
+            elif z > self.trigger_z and ticker[rsi_key] > self.sell_min_rsi:
+                ticker["trigger_type"] = "TREND_EXHAUSTION_SELL"
+            else:
+                ticker["trigger_type"] = None
+            if ticker["trigger_type"]:
+                triggered.append(ticker)
+        return tickers, triggered
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Analyzer cache benchmark.
+Runs DeepSeekAnalyzer.validate_trade against the local mock LLM for a stream
+of scan-like contexts (a few products, slowly drifting z / RSI, bursts of
+concurrent identical requests) with coalescing only (TTL 0) and with the cache, and
+reports HTTP calls, hit rate, wall time and prompt size.
+
+No network, no credentials. Run: python3 bench_analyzer.py [--scans 30] [--latency-ms 200]
+"""
+import json
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_llm import MockLLM
+from probability import DeepSeekAnalyzer
+
+PRODUCTS = ["BTC-USD", "ETH-USD", "SOL-USD", "AVAX-USD", "LINK-USD"]
+
+
+def contexts(scans: int):
+    """Per scan, one context per product; values drift like 60s radar rescans."""
+    rng = random.Random(7)
+    state = {pid: [rng.uniform(-3, -2), rng.uniform(20, 35)] for pid in PRODUCTS}
+    candles = [{"start": str(1700000000 + 900 * i), "low": "99.1", "high": "100.9",
+                "open": "100.0", "close": "100.2", "volume": "12.5"} for i in range(20)]
+    for _ in range(scans):
+        batch = []
+        for pid, (z, rsi) in state.items():
+            state[pid] = [z + rng.gauss(0, 0.05), rsi + rng.gauss(0, 0.5)]
+            batch.append({
+                "market_data": {"product_id": pid, "market_price": 100.0, "ma_20": 100.0 - z,
+                                "std_20": 1.0, "z_score": z, "rsi_14": rsi, "candles": candles},
+                "trigger": {"triggered": True, "type": "MEAN_REVERSION_BUY", "strength": abs(z),
+                            "expected_move": 0.02, "risk_limit": 0.01},
+                "p_bayesian": 0.7 + 0.01 * abs(z),
+                "portfolio_value": 40.0,
+            })
+        yield batch
+
+
+def run(label: str, server: MockLLM, scans: int, cache_ttl: float):
+    analyzer = DeepSeekAnalyzer(api_key="bench", base_url=f"{server.url}/v1", cache_ttl=cache_ttl)
+    before = server.stats["requests"]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for batch in contexts(scans):
+            # Each context is asked twice at once (e.g. two radars on the same tick)
+            list(pool.map(analyzer.validate_trade, batch + batch))
+    elapsed = time.perf_counter() - start
+    stats = analyzer.get_stats()
+    print(f"  {label:<10} {server.stats['requests'] - before:>5} calls  hit rate {stats['hit_rate']:>5.0%}  "
+          f"{elapsed:>6.2f}s  prompt {stats['avg_prompt_chars']:.0f} chars")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DeepSeekAnalyzer cache benchmark")
+    parser.add_argument("--scans", type=int, default=30)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    server = MockLLM(latency=args.latency_ms / 1000).start()
+    sample = next(contexts(1))[0]
+    print(f"Legacy prompt context: {len(json.dumps(sample, indent=2))} chars")
+    print(f"{args.scans} scans x {len(PRODUCTS)} products x 2 concurrent, {args.latency_ms:.0f}ms mock latency")
+    run("coalesce", server, args.scans, cache_ttl=0.0)
+    run("+ cache", server, args.scans, cache_ttl=300.0)
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Auth overhead micro-benchmark.
+Compares the old per-request path (parse PEM + sign ES256 every call)
+against JWTManager (key parsed once, tokens reused inside the exp window).
+
+Uses a throwaway P-256 key, no network. Run: python3 bench_auth.py [n]
+"""
+import sys
+import time
+import secrets
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from coinbase_client import JWTManager
+
+# One radar scan = 9 products x (product, product_book, candles)
+PATHS = [
+    f"/api/v3/brokerage/products/{pid}" for pid in ("BTC-USD", "ETH-USD", "SOL-USD")
+] + [
+    "/api/v3/brokerage/product_book",
+    "/api/v3/brokerage/products/BTC-USD/candles",
+]
+
+
+def make_key() -> str:
+    key = ec.generate_private_key(ec.SECP256R1())
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ).decode("utf-8")
+
+
+def legacy_generate_jwt(key_name: str, key_secret: str, method: str, path: str) -> str:
+    """The pre-JWTManager CoinbaseClient._generate_jwt, verbatim logic."""
+    now = int(time.time())
+    uri_path = path.split('?')[0]
+    payload = {
+        "iss": "cdp",
+        "nbf": now,
+        "exp": now + 120,
+        "sub": key_name,
+        "uri": f"{method} api.coinbase.com{uri_path}"
+    }
+    headers = {"kid": key_name, "nonce": secrets.token_hex(), "typ": "JWT"}
+    private_key = serialization.load_pem_private_key(key_secret.encode("utf-8"), password=None)
+    return jwt.encode(payload, private_key, algorithm="ES256", headers=headers)
+
+
+def bench(label: str, fn, n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        fn("GET", PATHS[i % len(PATHS)])
+    per_call_us = (time.perf_counter() - start) / n * 1e6
+    print(f"  {label:<28} {per_call_us:>10.1f} µs/request")
+    return per_call_us
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    key_name = "organizations/bench/apiKeys/bench"
+    key_secret = make_key()
+
+    print(f"🔐 Auth overhead ({n} requests over {len(PATHS)} URIs)")
+    legacy = bench("legacy (parse + sign)", lambda m, p: legacy_generate_jwt(key_name, key_secret, m, p), n)
+
+    cold = JWTManager(key_name, key_secret, lifetime=120, safety_margin=120)
+    signed = bench("key cached, no token reuse", cold.get_token, n)
+
+    warm = JWTManager(key_name, key_secret)
+    cached = bench("key + token cached", warm.get_token, n)
+
+    print(f"\n  Speedup (key cache):   {legacy / signed:.1f}x")
+    print(f"  Speedup (token cache): {legacy / cached:.1f}x")
+    print(f"  Token cache stats: {warm.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
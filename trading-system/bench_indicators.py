@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Indicator parity check + benchmark.
+Checks indicators.py and batch_scanner.py against verbatim copies of the calculate_rsi /
+calculate_ma / calculate_std helpers the radars used to carry, then times
+one scan's worth of indicator work both ways.
+
+No network. Exits non-zero on any parity failure. Run: python3 bench_indicators.py
+"""
+import sys
+import math
+import time
+import random
+from typing import Dict, List
+
+import indicators
+from indicators import (
+    IndicatorState, RollingRSI, RollingSMA, RollingStd, BollingerBands, ZScore,
+    calculate_rsi, calculate_ma, calculate_std, compute_indicators,
+)
+
+TOL = 1e-9
+
+
+# ─── Legacy reference (copied from radar_v23.py before the refactor) ───
+
+def legacy_rsi(candles: List[Dict], period: int = 14) -> float:
+    if len(candles) < period + 1:
+        return 50.0
+    sorted_candles = sorted(candles, key=lambda x: x.get("start", 0))
+    closes = [float(c.get("close", 0)) for c in sorted_candles]
+    changes = [closes[i] - closes[i-1] for i in range(1, len(closes))]
+    recent_changes = changes[-period:]
+    gains = [c for c in recent_changes if c > 0]
+    losses = [-c for c in recent_changes if c < 0]
+    avg_gain = sum(gains) / period if gains else 0
+    avg_loss = sum(losses) / period if losses else 0
+    if avg_loss == 0:
+        return 100.0 if avg_gain > 0 else 50.0
+    rs = avg_gain / avg_loss
+    rsi = 100 - (100 / (1 + rs))
+    return max(0, min(100, rsi))
+
+
+def legacy_ma(candles: List[Dict], period: int = 20) -> float:
+    if len(candles) < period:
+        return float(candles[-1].get("close", 0)) if candles else 0
+    sorted_candles = sorted(candles, key=lambda x: x.get("start", 0))
+    closes = [float(c.get("close", 0)) for c in sorted_candles[-period:]]
+    return sum(closes) / len(closes)
+
+
+def legacy_std(candles: List[Dict], period: int = 20) -> float:
+    if len(candles) < period:
+        return 0.01
+    sorted_candles = sorted(candles, key=lambda x: x.get("start", 0))
+    closes = [float(c.get("close", 0)) for c in sorted_candles[-period:]]
+    ma = sum(closes) / len(closes)
+    variance = sum((c - ma) ** 2 for c in closes) / len(closes)
+    return variance ** 0.5
+
+
+# ─── Fixtures ───
+
+def make_candles(n: int, start: int = 1_700_000_100, price: float = 100.0, seed: int = 0) -> List[Dict]:
+    """Random-walk candles, newest first like the API (fixed-width start strings)."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        price = max(0.01, price * (1 + rng.gauss(0, 0.01)))
+        if rng.random() < 0.05:
+            price = out[-1]["_p"] if out else price  # flat bars exercise the zero-change paths
+        out.append({"start": str(start + i * 900), "close": f"{price:.6f}", "_p": price})
+    return out[::-1]
+
+
+failures = []
+
+
+def check(name: str, got: float, want: float):
+    if not math.isclose(got, want, rel_tol=TOL, abs_tol=TOL):
+        failures.append(f"{name}: got {got!r}, want {want!r}")
+
+
+def parity():
+    for seed in range(200):
+        n = random.Random(seed).randint(0, 80)
+        candles = make_candles(n, seed=seed)
+        for period in (2, 14, 20):
+            check(f"rsi seed={seed} n={n} p={period}", calculate_rsi(candles, period), legacy_rsi(candles, period))
+            check(f"ma seed={seed} n={n} p={period}", calculate_ma(candles, period), legacy_ma(candles, period))
+            check(f"std seed={seed} n={n} p={period}", calculate_std(candles, period), legacy_std(candles, period))
+        combined = compute_indicators(candles)
+        check(f"compute rsi seed={seed}", combined["rsi_14"], legacy_rsi(candles, 14))
+        check(f"compute ma seed={seed}", combined["ma_20"], legacy_ma(candles, 20))
+        check(f"compute std seed={seed}", combined["std_20"], legacy_std(candles, 20))
+
+    # Streaming: replay a long series scan by scan (50-candle window, newest forming)
+    series = make_candles(600, seed=7)[::-1]
+    state = IndicatorState()
+    sma, std, rsi = RollingSMA(20), RollingStd(20), RollingRSI(14)
+    bands, z = BollingerBands(20, 2.0), ZScore(20)
+    for i in range(50, len(series)):
+        window = series[i - 50:i][::-1]
+        snap = state.sync(window)
+        check(f"stream rsi i={i}", snap["rsi_14"], legacy_rsi(window, 14))
+        check(f"stream ma i={i}", snap["ma_20"], legacy_ma(window, 20))
+        check(f"stream std i={i}", snap["std_20"], legacy_std(window, 20))
+
+    closes = [c["_p"] for c in series]
+    for i, x in enumerate(closes):
+        sma.update(x), std.update(x), rsi.update(x), bands.update(x)
+        score = z.update(x)
+        fake = [{"start": str(1_000_000 + j), "close": repr(c)} for j, c in enumerate(closes[:i + 1])]
+        if i >= 20:
+            mid, upper, lower = bands.value
+            check(f"sma i={i}", sma.value, legacy_ma(fake, 20))
+            check(f"std i={i}", std.value, legacy_std(fake, 20))
+            check(f"bollinger i={i}", upper - mid, 2 * legacy_std(fake, 20))
+            check(f"zscore i={i}", score, (x - legacy_ma(fake, 20)) / legacy_std(fake, 20))
+        check(f"rsi i={i}", rsi.value, legacy_rsi(fake, 14))
+
+    if indicators.np is not None:
+        np = indicators.np
+        arr = np.array(closes)
+        fake = [{"start": str(1_000_000 + j), "close": repr(c)} for j, c in enumerate(closes)]
+        check("batch sma", indicators.rolling_mean(arr, 20)[-1], legacy_ma(fake, 20))
+        check("batch std", indicators.rolling_std(arr, 20)[-1], legacy_std(fake, 20))
+        check("batch rsi", indicators.rolling_rsi(arr, 14)[-1], legacy_rsi(fake, 14))
+        wilder = RollingRSI(14, wilder=True)
+        for x in closes:
+            wilder.update(x)
+        check("batch wilder rsi", indicators.rolling_rsi(arr, 14, wilder=True)[-1], wilder.value)
+        matrix = np.vstack([arr, arr[::-1]])
+        check("batch matrix row", indicators.rolling_mean(matrix, 20)[1, -1], sum(closes[:20]) / 20)
+
+    # Batch scanner vs per-product compute_indicators + _detect_trigger thresholds
+    from batch_scanner import BatchScanner
+    scanner = BatchScanner()
+    lists = [make_candles(n, seed=s) for s, n in enumerate([50] * 150 + [0, 5, 20, 21])]
+    tickers = [{"market_price": c[0]["_p"] * (1 + random.Random(k).gauss(0, 0.03)) if c else 100.0}
+               for k, c in enumerate(lists)]
+    _, triggered = scanner.scan(tickers, lists)
+    for k, (ticker, candles) in enumerate(zip(tickers, lists)):
+        ref = scanner._scan_rows([{"market_price": ticker["market_price"]}], [candles])[0][0]
+        for key in ("rsi_14", "ma_20", "std_20", "z_score"):
+            check(f"batch scan {key} row={k}", ticker[key], ref[key])
+        if ticker["trigger_type"] != ref["trigger_type"]:
+            failures.append(f"batch scan trigger row={k}: {ticker['trigger_type']} != {ref['trigger_type']}")
+    if not triggered:
+        failures.append("batch scan fixture produced no triggers")
+
+
+def bench(n_products: int = 100, scans: int = 200):
+    products = [make_candles(50, seed=s) for s in range(n_products)]
+
+    start = time.perf_counter()
+    for _ in range(scans):
+        for candles in products:
+            legacy_rsi(candles, 14), legacy_ma(candles, 20), legacy_std(candles, 20)
+    legacy = (time.perf_counter() - start) / scans
+
+    start = time.perf_counter()
+    for _ in range(scans):
+        for candles in products:
+            compute_indicators(candles)
+    single_sort = (time.perf_counter() - start) / scans
+
+    states = [IndicatorState() for _ in products]
+    for state, candles in zip(states, products):
+        state.sync(candles)
+    start = time.perf_counter()
+    for _ in range(scans):
+        for state, candles in zip(states, products):
+            state.sync(candles)
+    streaming = (time.perf_counter() - start) / scans
+
+    batch = None
+    if indicators.np is not None:
+        from batch_scanner import BatchScanner
+        scanner = BatchScanner()
+        prices = [{"market_price": float(c[0]["close"])} for c in products]
+        start = time.perf_counter()
+        for _ in range(scans):
+            scanner.scan([dict(p) for p in prices], products)
+        batch = (time.perf_counter() - start) / scans
+
+    print(f"⏱️  {n_products} products x 50 candles, per scan:")
+    print(f"  legacy (3 sorts)      {legacy * 1e3:8.3f} ms")
+    print(f"  compute_indicators    {single_sort * 1e3:8.3f} ms")
+    print(f"  IndicatorState (O(1)) {streaming * 1e3:8.3f} ms")
+    if batch is not None:
+        print(f"  BatchScanner (NumPy)  {batch * 1e3:8.3f} ms  (incl. z-score + trigger masks)")
+
+
+if __name__ == "__main__":
+    parity()
+    if failures:
+        print(f"❌ {len(failures)} parity failures")
+        for f in failures[:20]:
+            print(f"  {f}")
+        sys.exit(1)
+    print("✅ Parity OK (calculate_*, compute_indicators, streaming state, batch path, batch scanner)")
+    bench()
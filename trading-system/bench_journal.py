@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Journal write micro-benchmark.
+Compares the old TradeJournal._append (open/append/close per record) against
+JournalWriter at each durability level, single-threaded and with concurrent
+writers (where group commit batches fsyncs).
+
+Writes to a temp dir. Run: python3 bench_journal.py [n] [threads]
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from journal_writer import JournalWriter
+
+RECORD = {
+    "type": "CLOSE", "trade_id": "bench", "market": "BTC-USD", "side": "BUY",
+    "entry_price": 64250.5, "exit_price": 64810.0, "size_usd": 25.0,
+    "pnl_usd": 0.22, "pnl_pct": 0.0087, "outcome": "win", "hour_tier": "winning",
+    "regime": "trend", "p_bayesian": 0.61, "conviction": 0.7,
+}
+
+
+def legacy_append(path: str, record: dict):
+    """The pre-JournalWriter TradeJournal._append, verbatim logic."""
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def run(label: str, n: int, threads: int, write_one) -> float:
+    per_thread = n // threads
+
+    def worker():
+        for _ in range(per_thread):
+            write_one()
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    rate = per_thread * threads / (time.perf_counter() - start)
+    print(f"  {label:<34} {rate:>12,.0f} records/s")
+    return rate
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for t in (1, threads):
+            print(f"\n{n:,} records, {t} writer thread(s)")
+            path = os.path.join(tmp, f"legacy_{t}.jsonl")
+            lock = threading.Lock()
+
+            def legacy():
+                with lock:  # Interleaved appends from threads would need this anyway
+                    legacy_append(path, RECORD)
+
+            base = run("legacy open/append per record", n, t, legacy)
+            for level in ("buffered", "flush", "fsync"):
+                count = n if level != "fsync" else max(n // 10, t)
+                writer = JournalWriter(os.path.join(tmp, f"{level}_{t}.jsonl"), durability=level)
+                rate = run(f"JournalWriter {level}", count, t,
+                           lambda: writer.write(json.dumps(RECORD).encode() + b"\n"))
+                writer.close()
+                stats = writer.get_stats()
+                per = stats["records_per_fsync" if level == "fsync" else "records_per_commit"]
+                print(f"  {'':<34} {rate / base:>11.1f}x legacy, "
+                      f"{per:.1f} records/{'fsync' if level == 'fsync' else 'write'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Scanner benchmark.
+Starts a local mock of the Coinbase Advanced Trade REST endpoints the scanner
+uses (/products, /products/{id}, /product_book, /products/{id}/candles) with a
+configurable per-request delay, then runs ScannerService in each concurrency
+mode against it and reports scans/sec and p50/p99 scan latency. The serial run
+is recorded and replayed through ReplaySource to show the pure CPU cost.
+
+No network, no credentials (a throwaway EC key signs the JWTs).
+Run: python3 bench_scanner.py [--products 50] [--scans 20] [--latency-ms 20]
+"""
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from coinbase_client import CoinbaseClient, AsyncCoinbaseClient, GRANULARITY_SECONDS, aiohttp
+from candle_store import CandleStore
+from scanner import ScannerService, RestSource, ReplaySource, MODES
+
+PREFIX = "/api/v3/brokerage"
+
+
+# ─── Mock Coinbase ───
+
+class MockCoinbase(ThreadingHTTPServer):
+    """Deterministic random-walk market for n products; counts requests by endpoint."""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, n_products: int, latency: float):
+        super().__init__(("127.0.0.1", 0), MockHandler)
+        self.latency = latency
+        self.product_ids = [f"P{i:03d}-USD" for i in range(n_products)]
+        self.prices = {pid: 10.0 + i for i, pid in enumerate(self.product_ids)}
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, endpoint: str):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def product(self, pid: str) -> dict:
+        return {"product_id": pid, "price": str(self.prices[pid]), "volume_24h": "250000",
+                "volume_percentage_change_24h": "1.5"}
+
+    def book(self, pid: str) -> dict:
+        mid = self.prices[pid]
+        return {"pricebook": {
+            "product_id": pid,
+            "bids": [{"price": f"{mid * (1 - 0.0001 * (k + 1)):.6f}", "size": "5"} for k in range(20)],
+            "asks": [{"price": f"{mid * (1 + 0.0001 * (k + 1)):.6f}", "size": "5"} for k in range(20)],
+        }}
+
+    def candles(self, pid: str, start: int, end: int, granularity: str) -> dict:
+        seconds = GRANULARITY_SECONDS.get(granularity, 3600)
+        out = []
+        t = start - start % seconds
+        while t <= end:
+            rng = random.Random(f"{pid}:{t}")
+            close = self.prices[pid] * (1 + rng.gauss(0, 0.01))
+            out.append({"start": str(t), "low": str(close * 0.99), "high": str(close * 1.01),
+                        "open": str(close), "close": f"{close:.6f}", "volume": "100"})
+            t += seconds
+        return {"candles": out[::-1]}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        path = url.path[len(PREFIX):] if url.path.startswith(PREFIX) else url.path
+        parts = [p for p in path.split("/") if p]
+        time.sleep(server.latency)
+
+        if parts == ["products"]:
+            server.count("products")
+            offset, limit = int(query.get("offset", 0)), int(query.get("limit", 250))
+            page = server.product_ids[offset:offset + limit]
+            body = {"products": [server.product(p) for p in page], "num_products": len(server.product_ids)}
+        elif parts == ["product_book"] and query.get("product_id") in server.prices:
+            server.count("product_book")
+            body = server.book(query["product_id"])
+        elif len(parts) == 3 and parts[0] == "products" and parts[2] == "candles" and parts[1] in server.prices:
+            server.count("candles")
+            body = server.candles(parts[1], int(query["start"]), int(query["end"]), query.get("granularity", ""))
+        elif len(parts) == 2 and parts[0] == "products" and parts[1] in server.prices:
+            server.count("product")
+            body = server.product(parts[1])
+        else:
+            self.send_error(404)
+            return
+
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+# ─── Benchmark ───
+
+def throwaway_key() -> str:
+    key = ec.generate_private_key(ec.SECP256R1())
+    return key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                             serialization.NoEncryption()).decode()
+
+
+def build_scanner(server: MockCoinbase, mode: str, pem: str, max_workers: int, record_path: str = None):
+    client = CoinbaseClient("bench", pem)
+    client.API_HOST = server.url
+    async_client = None
+    if mode == "asyncio":
+        async_client = AsyncCoinbaseClient("bench", pem, max_concurrency=max_workers, auth=client.auth)
+        async_client.API_HOST = server.url
+    source = RestSource(client, async_client, CandleStore(client))
+    return ScannerService(source, mode=mode, max_workers=max_workers, product_ids=server.product_ids,
+                          record_path=record_path, status_interval=float("inf"))
+
+
+def run_mode(name: str, scanner: ScannerService, scans: int, server: MockCoinbase = None) -> dict:
+    scanner.scan()  # Warm-up: candle backfill, JWT signing, connection setup
+    scanner.reset_stats()
+    before = dict(server.requests) if server else {}
+    for _ in range(scans):
+        scanner.scan()
+    stats = scanner.get_stats()
+    scanner.close()
+    requests = sum(server.requests.values()) - sum(before.values()) if server else 0
+    print(f"  {name:<10} {stats['scans_per_sec']:8.2f} scans/s   p50 {stats['scan_p50_ms']:8.1f} ms"
+          f"   p99 {stats['scan_p99_ms']:8.1f} ms   {requests / max(scans, 1):6.1f} req/scan")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--scans", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="mock per-request delay")
+    parser.add_argument("--workers", type=int, default=16, help="thread pool / async concurrency")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    args = parser.parse_args()
+
+    server = MockCoinbase(args.products, args.latency_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    pem = throwaway_key()
+
+    print(f"⏱️  {args.products} products, {args.scans} scans per mode, "
+          f"{args.latency_ms:.0f} ms mock latency, {args.workers} workers")
+    recording = tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False).name
+    results = {}
+    for mode in args.modes:
+        if mode == "asyncio" and aiohttp is None:
+            print(f"  {mode:<10} skipped (aiohttp not installed)")
+            continue
+        record = recording if mode == "serial" else None
+        results[mode] = run_mode(mode, build_scanner(server, mode, pem, args.workers, record), args.scans, server)
+
+    if "serial" in results:
+        replay = ScannerService(ReplaySource(recording, loop=True), product_ids=server.product_ids,
+                                status_interval=float("inf"))
+        results["replay"] = run_mode("replay", replay, args.scans)
+
+    server.shutdown()
+    os.unlink(recording)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Calibration Tracker
+Forecast calibration keyed by trade_id, in a fixed-size ring buffer.
+
+Each executed trade registers its forecast (probability the trade wins, and
+the win probability each signal implied) under its trade_id; the close
+labels exactly that forecast, however many trades overlap. The ring keeps
+the last `capacity` forecasts in array('d') columns, so memory stays flat
+over months of 24/7 operation. Running sums over the resolved forecasts in
+the ring are updated on every outcome and eviction, so these are O(1)
+(O(bins) / O(sources), both small and fixed):
+- Brier score and log-loss of the model
+- reliability diagram: per probability bin, forecast count, mean forecast
+  and observed win frequency, plus expected calibration error
+- per-signal log-loss and Brier score
+Sums are rebuilt from the ring every `capacity` evictions so add/subtract
+rounding can't drift over long runs.
+"""
+
+import math
+from array import array
+from typing import Dict, List, Optional
+
+EPSILON = 0.001  # Same clip as BayesianEstimator, keeps log-loss finite
+
+
+def _log_loss(p: float, actual: float) -> float:
+    p = max(EPSILON, min(1 - EPSILON, p))
+    return -(actual * math.log(p) + (1 - actual) * math.log(1 - p))
+
+
+class CalibrationTracker:
+    """Trade-keyed forecast/outcome ring with incremental calibration metrics."""
+
+    STATE_VERSION = 1
+
+    def __init__(self, capacity: int = 4096, bins: int = 10):
+        self.capacity = capacity
+        self.bins = bins
+        self._p = array("d", [math.nan]) * capacity
+        self._y = array("d", [math.nan]) * capacity        # NaN until the outcome arrives
+        self._ids: List[Optional[str]] = [None] * capacity
+        self._signals: Dict[str, array] = {}                # source -> per-slot win probability
+        self._slot_of: Dict[str, int] = {}
+        self._head = 0
+        self.stats = {"forecasts": 0, "outcomes": 0, "unmatched": 0, "expired_unresolved": 0}
+        self._reset_sums()
+
+    def _reset_sums(self):
+        self.resolved = 0
+        self._sq = 0.0
+        self._ll = 0.0
+        self._bin_n = [0] * self.bins
+        self._bin_p = [0.0] * self.bins
+        self._bin_y = [0.0] * self.bins
+        self._signal_sums: Dict[str, List[float]] = {}      # source -> [n, log-loss, squared error]
+        self._evictions = 0
+
+    # ─── Updates ───
+
+    def record_forecast(self, trade_id: str, p_win: float, signals: Optional[Dict[str, float]] = None):
+        """Register a trade's forecast (re-registering a trade_id replaces it)."""
+        old = self._slot_of.get(trade_id)
+        if old is not None:
+            self._retire(old)
+        slot = self._head
+        self._retire(slot)
+
+        self._p[slot] = p_win
+        self._y[slot] = math.nan
+        self._ids[slot] = trade_id
+        self._slot_of[trade_id] = slot
+        for column in self._signals.values():
+            column[slot] = math.nan
+        for source, value in (signals or {}).items():
+            if value is None:
+                continue
+            column = self._signals.get(source)
+            if column is None:
+                column = self._signals[source] = array("d", [math.nan]) * self.capacity
+            column[slot] = value
+
+        self._head = (slot + 1) % self.capacity
+        self.stats["forecasts"] += 1
+
+    def record_outcome(self, trade_id: str, actual: float) -> bool:
+        """Label a trade's forecast with its outcome (1 = win, 0 = loss). False if unknown/expired."""
+        slot = self._slot_of.get(trade_id)
+        if slot is None:
+            self.stats["unmatched"] += 1
+            return False
+        if self._y[slot] == self._y[slot]:  # Relabel: take the old outcome back out first
+            self._apply(slot, -1)
+        self._y[slot] = actual
+        self._apply(slot, +1)
+        self.stats["outcomes"] += 1
+        return True
+
+    def _retire(self, slot: int):
+        """Free a slot, removing its contribution from the running sums."""
+        trade_id = self._ids[slot]
+        if trade_id is None:
+            return
+        if self._y[slot] == self._y[slot]:
+            self._apply(slot, -1)
+            self._evictions += 1
+        else:
+            self.stats["expired_unresolved"] += 1
+        del self._slot_of[trade_id]
+        self._ids[slot] = None
+        self._y[slot] = math.nan
+        if self._evictions >= self.capacity:
+            self._rebuild()
+
+    def _bin(self, p: float) -> int:
+        return min(max(int(p * self.bins), 0), self.bins - 1)
+
+    def _apply(self, slot: int, sign: int):
+        p, y = self._p[slot], self._y[slot]
+        self.resolved += sign
+        self._sq += sign * (p - y) ** 2
+        self._ll += sign * _log_loss(p, y)
+        b = self._bin(p)
+        self._bin_n[b] += sign
+        self._bin_p[b] += sign * p
+        self._bin_y[b] += sign * y
+        for source, column in self._signals.items():
+            s = column[slot]
+            if s == s:
+                sums = self._signal_sums.setdefault(source, [0, 0.0, 0.0])
+                sums[0] += sign
+                sums[1] += sign * _log_loss(s, y)
+                sums[2] += sign * (s - y) ** 2
+
+    def _rebuild(self):
+        """Recompute the running sums from the ring (resets rounding drift)."""
+        self._reset_sums()
+        for slot in range(self.capacity):
+            if self._ids[slot] is not None and self._y[slot] == self._y[slot]:
+                self._apply(slot, +1)
+
+    # ─── Queries ───
+
+    def brier(self) -> Optional[float]:
+        return self._sq / self.resolved if self.resolved else None
+
+    def log_loss(self) -> Optional[float]:
+        return self._ll / self.resolved if self.resolved else None
+
+    def reliability_diagram(self) -> List[Dict]:
+        """Per bin: range, forecasts, mean forecast and observed win frequency (None if empty)."""
+        diagram = []
+        for b in range(self.bins):
+            n = self._bin_n[b]
+            diagram.append({
+                "lo": b / self.bins,
+                "hi": (b + 1) / self.bins,
+                "count": n,
+                "mean_p": self._bin_p[b] / n if n else None,
+                "win_rate": self._bin_y[b] / n if n else None,
+            })
+        return diagram
+
+    def expected_calibration_error(self) -> Optional[float]:
+        """Count-weighted mean |mean forecast - win rate| over the bins."""
+        if not self.resolved:
+            return None
+        return sum(abs(self._bin_p[b] - self._bin_y[b]) for b in range(self.bins)) / self.resolved
+
+    def signal_scores(self) -> Dict[str, Dict]:
+        """Per signal: resolved forecasts it contributed to, log-loss and Brier score."""
+        return {source: {"count": n, "log_loss": ll / n, "brier": sq / n}
+                for source, (n, ll, sq) in self._signal_sums.items() if n}
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, resolved=self.resolved, pending=len(self._slot_of) - self.resolved,
+                    brier=self.brier(), log_loss=self.log_loss(), ece=self.expected_calibration_error())
+
+    # ─── State snapshot ───
+
+    def snapshot_state(self) -> Dict:
+        return {
+            "capacity": self.capacity, "bins": self.bins, "head": self._head, "stats": dict(self.stats),
+            "p": self._p.tobytes(), "y": self._y.tobytes(), "ids": list(self._ids),
+            "signals": {source: column.tobytes() for source, column in self._signals.items()},
+        }
+
+    def restore_state(self, state: Dict):
+        if state["capacity"] != self.capacity or state["bins"] != self.bins:
+            return  # Sized differently now: start fresh rather than remap slots
+        self._p = array("d", state["p"])
+        self._y = array("d", state["y"])
+        self._ids = list(state["ids"])
+        self._signals = {source: array("d", column) for source, column in state["signals"].items()}
+        self._slot_of = {trade_id: slot for slot, trade_id in enumerate(self._ids) if trade_id is not None}
+        self._head = state["head"]
+        self.stats = dict(state["stats"])
+        self._rebuild()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Candle Store
+Per-(product, granularity) ring buffer of closed candles with delta fetching.
+
+Closed candles never change, so after the first backfill we only ask the API
+for candles that started after the last one we hold. Between candle closes
+the still-forming candle is patched from the latest ticker price instead of
+being re-downloaded, so a 60s radar on 15m candles makes ~1 candle request
+per product every 15 minutes instead of 50 candles every minute.
+
+Coinbase omits candles for intervals without trades, so the store tracks how
+far it has fetched separately from the last candle it holds; an illiquid
+pair's gaps are not re-requested on every scan.
+"""
+
+import json
+import os
+import time
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from coinbase_client import GRANULARITY_SECONDS
+
+
+class CandleStore:
+    """
+    Candles are kept in Coinbase's own dict shape ({"start", "low", "high",
+    "open", "close", "volume"}, string values) and returned newest-first,
+    exactly like CoinbaseClient.get_recent_candles.
+    """
+
+    def __init__(self, client=None, capacity: int = 300, cache_dir: Optional[str] = None):
+        self.client = client
+        self.capacity = capacity
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._closed: Dict[Tuple[str, str], deque] = {}   # oldest -> newest
+        self._forming: Dict[Tuple[str, str], Dict] = {}
+        self._fetched: Dict[Tuple[str, str], int] = {}     # End (unix s) of the latest fetched range
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.candles_fetched = 0
+        self.local_hits = 0
+
+    # ─── Public API ───
+
+    def get_recent(self, product_id: str, granularity: str = "FIFTEEN_MINUTE",
+                   limit: int = 50, last_price: Optional[float] = None) -> List[Dict]:
+        """
+        Drop-in for client.get_recent_candles backed by the store.
+        last_price (e.g. ticker mid) lets us skip the request while no candle has closed.
+        """
+        needed = self.fetch_range(product_id, granularity, limit, last_price)
+        if needed is not None:
+            candles = self.client.get_candles(product_id, needed[0], needed[1], granularity)
+            self.ingest(product_id, granularity, candles, fetched_end=int(needed[1]))
+        return self.recent(product_id, granularity, limit)
+
+    async def get_recent_async(self, client, product_id: str, granularity: str = "FIFTEEN_MINUTE",
+                               limit: int = 50, last_price: Optional[float] = None) -> List[Dict]:
+        """get_recent for an AsyncCoinbaseClient."""
+        needed = self.fetch_range(product_id, granularity, limit, last_price)
+        if needed is not None:
+            candles = await client.get_candles(product_id, needed[0], needed[1], granularity)
+            self.ingest(product_id, granularity, candles, fetched_end=int(needed[1]))
+        return self.recent(product_id, granularity, limit)
+
+    def fetch_range(self, product_id: str, granularity: str, limit: int,
+                    last_price: Optional[float] = None) -> Optional[Tuple[str, str]]:
+        """
+        (start, end) still needed from the API, or None if the store can
+        answer locally (in which case the forming candle is patched with last_price).
+        """
+        key = (product_id, granularity)
+        seconds = GRANULARITY_SECONDS.get(granularity, 3600)
+        now = int(time.time())
+        forming_start = now - (now % seconds)
+        backfill_start = forming_start - seconds * (min(limit, self.capacity) - 1)
+
+        with self._lock:
+            closed = self._buffer(key)
+            forming = self._forming.get(key)
+            fetched_end = self._fetched.get(key, 0)
+
+            # Closed candles are known up to the later of the last one held and the
+            # last candle boundary fetched (intervals without trades have no candle)
+            next_start = max(int(closed[-1]["start"]) + seconds if closed else 0,
+                             fetched_end - fetched_end % seconds)
+            if next_start <= backfill_start:
+                return str(backfill_start), str(now)
+
+            if next_start < forming_start:
+                # At least one candle closed since the last fetch
+                return str(next_start), str(now)
+
+            if last_price is None:
+                return str(forming_start), str(now)
+            if forming is None or int(forming["start"]) != forming_start:
+                if fetched_end < forming_start:
+                    # Only the forming candle is missing/stale
+                    return str(forming_start), str(now)
+                # Fetched during this candle and none came back: no trades yet
+                forming = self._forming[key] = {"start": str(forming_start), "low": str(last_price),
+                                                "high": str(last_price), "open": str(last_price),
+                                                "close": str(last_price), "volume": "0"}
+
+            self._patch_forming(forming, last_price)
+            self.local_hits += 1
+            return None
+
+    def ingest(self, product_id: str, granularity: str, candles: List[Dict], fetched_end: Optional[int] = None):
+        """
+        Merge API candles: closed ones into the ring buffer, the current one as
+        forming. fetched_end is the end of the requested range, so intervals
+        before it that came back empty aren't asked for again.
+        """
+        key = (product_id, granularity)
+        seconds = GRANULARITY_SECONDS.get(granularity, 3600)
+        now = int(time.time())
+        forming_start = now - (now % seconds)
+
+        with self._lock:
+            self.requests += 1
+            self.candles_fetched += len(candles)
+            closed = self._buffer(key)
+            last_start = int(closed[-1]["start"]) if closed else -1
+            added = False
+            if fetched_end is not None:
+                self._fetched[key] = max(self._fetched.get(key, 0), fetched_end)
+
+            for candle in sorted(candles, key=lambda c: int(c.get("start", 0))):
+                start = int(candle.get("start", 0))
+                if start >= forming_start:
+                    self._forming[key] = dict(candle)
+                elif start > last_start:
+                    closed.append(dict(candle))
+                    last_start = start
+                    added = True
+            self._current_forming(key, closed, forming_start)
+
+            if added:
+                self._save(key, closed)
+
+    def recent(self, product_id: str, granularity: str, limit: int = 50) -> List[Dict]:
+        """Last `limit` candles (forming one included), newest first."""
+        key = (product_id, granularity)
+        seconds = GRANULARITY_SECONDS.get(granularity, 3600)
+        now = int(time.time())
+        with self._lock:
+            closed = self._buffer(key)
+            forming = self._current_forming(key, closed, now - (now % seconds))
+            out = [dict(forming)] if forming else []
+            for candle in reversed(closed):
+                if len(out) >= limit:
+                    break
+                out.append(candle)
+            return out
+
+    def get_stats(self) -> Dict:
+        """Request/bandwidth counters."""
+        total = self.requests + self.local_hits
+        return {
+            "requests": self.requests,
+            "candles_fetched": self.candles_fetched,
+            "local_hits": self.local_hits,
+            "request_ratio": self.requests / total if total > 0 else 0.0,
+            "series": len(self._closed)
+        }
+
+    # ─── Internal ───
+
+    @staticmethod
+    def _patch_forming(forming: Dict, price: float):
+        """Roll the latest price into the still-forming candle."""
+        forming["close"] = str(price)
+        forming["high"] = str(max(float(forming.get("high", price)), price))
+        forming["low"] = str(min(float(forming.get("low", price)), price))
+
+    def _current_forming(self, key: Tuple[str, str], closed: deque, forming_start: int) -> Optional[Dict]:
+        """
+        The forming candle, or None once it is stale: its period has ended, or
+        the same candle is already in `closed` (it closed and was fetched
+        before a new forming one arrived). Stale ones are dropped.
+        """
+        forming = self._forming.get(key)
+        if forming is None:
+            return None
+        start = int(forming["start"])
+        if start < forming_start or (closed and start <= int(closed[-1]["start"])):
+            del self._forming[key]
+            return None
+        return forming
+
+    def _buffer(self, key: Tuple[str, str]) -> deque:
+        """Ring buffer for a series, loaded from disk on first use."""
+        buf = self._closed.get(key)
+        if buf is None:
+            buf = deque(self._load(key), maxlen=self.capacity)
+            self._closed[key] = buf
+        return buf
+
+    def _cache_file(self, key: Tuple[str, str]) -> Optional[Path]:
+        if not self.cache_dir:
+            return None
+        return self.cache_dir / f"{key[0]}_{key[1]}.json"
+
+    def _load(self, key: Tuple[str, str]) -> List[Dict]:
+        path = self._cache_file(key)
+        if path is None or not path.exists():
+            return []
+        try:
+            with open(path) as f:
+                return json.load(f)[-self.capacity:]
+        except (json.JSONDecodeError, OSError):
+            return []
+
+    def _save(self, key: Tuple[str, str], closed: deque):
+        path = self._cache_file(key)
+        if path is None:
+            return
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(list(closed), f)
+        os.replace(tmp, path)
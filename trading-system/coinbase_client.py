@@ -8,64 +8,209 @@ API Docs: https://docs.cloud.coinbase.com/advanced-trade-api/docs/welcome
 
 import json
 import time
+import asyncio
 import hmac
 import hashlib
+import threading
 import requests
 import jwt
 import secrets
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timezone
 from cryptography.hazmat.primitives import serialization
 
+from order_book import OrderBook
 
-class CoinbaseClient:
+try:
+    import aiohttp  # Optional: only needed for AsyncCoinbaseClient
+except ImportError:
+    aiohttp = None
+
+
+GRANULARITY_SECONDS = {
+    "ONE_MINUTE": 60,
+    "FIVE_MINUTE": 300,
+    "FIFTEEN_MINUTE": 900,
+    "ONE_HOUR": 3600,
+    "SIX_HOUR": 21600,
+    "ONE_DAY": 86400
+}
+
+PRODUCTS_PAGE_SIZE = 250
+
+
+def index_products(products: List[Dict]) -> Dict[str, Dict]:
+    """Index a /products listing by product_id."""
+    return {p["product_id"]: p for p in products if "product_id" in p}
+
+
+def recent_candle_range(granularity: str, limit: int) -> Tuple[str, str]:
+    """(start, end) Unix timestamps covering the last `limit` candles."""
+    seconds = GRANULARITY_SECONDS.get(granularity, 3600)
+    end_ts = int(time.time())
+    start_ts = end_ts - (seconds * limit)
+    return str(start_ts), str(end_ts)
+
+
+def parse_product_book(data: Dict) -> Dict:
+    """Turn a raw product_book response into top-of-book and depth stats."""
+    # The response is nested: {"pricebook": {"product_id": "BTC-USD", "bids": [...], "asks": [...]}}
+    # Note: 'pricebook' is lowercase 'b' in V3 CDP API
+    # In V3, bids/asks are lists of objects: [{"price": "...", "size": "..."}, ...]
+    price_book = data.get("pricebook", data.get("price_book", {}))
+    book = OrderBook.from_pricebook(price_book).to_book_dict()
+    book["raw"] = price_book
+    return book
+
+
+def format_ticker(product_id: str, product: Dict, book: Dict) -> Dict:
+    """Format product + book data for the trading engine."""
+    if "error" in product or "error" in book:
+        return {"error": product.get("error", book.get("error", "Unknown"))}
+    
+    prod_data = product.get("product", product)
+    
+    return {
+        "event_name": product_id,
+        "product_id": product_id,
+        "category": "crypto",
+        "market_price": book["mid_price"],
+        "best_bid": book["best_bid"],
+        "best_ask": book["best_ask"],
+        "spread_pct": book["spread_pct"],
+        "bid_depth": book["bid_depth"],
+        "ask_depth": book["ask_depth"],
+        "bid_depth_usd_10bps": book.get("bid_depth_usd_10bps"),
+        "ask_depth_usd_10bps": book.get("ask_depth_usd_10bps"),
+        "book_imbalance": book.get("imbalance"),
+        "volume_24h": float(prod_data.get("volume_24h", 0)),
+        "volatility_24h": float(prod_data.get("volume_percentage_change_24h", 0)),
+        "price_momentum_1h": 0.0,
+        "signals": {}
+    }
+
+
+
+class JWTManager:
     """
-    Client for Coinbase Advanced Trade API.
-    Handles authentication via Cloud API Keys (JWT).
+    Token management for CDP Cloud API Keys.
+    Parses the EC private key once and reuses signed ES256 tokens per
+    (method, uri) until they get close to their 120s expiry. Expired tokens
+    are swept once the cache reaches MAX_TOKENS, then the oldest go.
     """
 
-    API_URL = "https://api.coinbase.com/api/v3/brokerage"
+    TOKEN_LIFETIME = 120   # Seconds, matches the CDP "exp" window
+    SAFETY_MARGIN = 20     # Re-sign this many seconds before expiry
+    MAX_TOKENS = 1024      # Distinct uris kept (one per product-specific path)
 
-    def __init__(self, key_name: str, key_secret: str):
+    def __init__(self, key_name: str, key_secret: str,
+                 lifetime: int = TOKEN_LIFETIME, safety_margin: int = SAFETY_MARGIN):
         self.key_name = key_name
         self.key_secret = key_secret
-        self.session = requests.Session()
-        self.session.headers.update({
-            "Accept": "application/json",
-            "User-Agent": "ResonanceTradingSystem/4.0"
-        })
+        self.lifetime = lifetime
+        self.safety_margin = min(safety_margin, lifetime)
+        self._private_key = None
+        self._tokens: Dict[str, Tuple[str, float]] = {}  # uri -> (token, reuse_until)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
 
-    def _generate_jwt(self, method: str, path: str) -> str:
-        """Generate a JWT for authentication using the CDP SDK logic."""
-        now = int(time.time())
-        uri_path = path.split('?')[0]
-        
+    def _load_key(self):
+        """Parse the PEM key on first use and keep it."""
+        if self._private_key is None:
+            self._private_key = serialization.load_pem_private_key(
+                self.key_secret.encode("utf-8"),
+                password=None
+            )
+        return self._private_key
+
+    def _sign(self, uri: str, now: int) -> str:
         payload = {
             "iss": "cdp",
             "nbf": now,
-            "exp": now + 120,
+            "exp": now + self.lifetime,
             "sub": self.key_name,
-            "uri": f"{method} api.coinbase.com{uri_path}"
+            "uri": uri
         }
-        
         headers = {
             "kid": self.key_name,
             "nonce": secrets.token_hex(),
             "typ": "JWT"
         }
-        
-        private_key = serialization.load_pem_private_key(
-            self.key_secret.encode("utf-8"), 
-            password=None
-        )
-        
-        token = jwt.encode(
-            payload, 
-            private_key, 
-            algorithm="ES256", 
-            headers=headers
-        )
-        return token
+        return jwt.encode(payload, self._load_key(), algorithm="ES256", headers=headers)
+
+    def get_token(self, method: str, path: str) -> str:
+        """Return a valid JWT for this request, signing a new one only when needed."""
+        uri = f"{method} api.coinbase.com{path.split('?')[0]}"
+        now = time.time()
+        with self._lock:
+            cached = self._tokens.get(uri)
+            if cached and now < cached[1]:
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+            self._tokens.pop(uri, None)
+            if len(self._tokens) >= self.MAX_TOKENS:
+                self._evict(now)
+            issued = int(now)
+            token = self._sign(uri, issued)
+            self._tokens[uri] = (token, issued + self.lifetime - self.safety_margin)
+            return token
+
+    def _evict(self, now: float):
+        """Drop expired tokens; if still full, the oldest-signed ones (dict order)."""
+        for uri in [u for u, (_, reuse_until) in self._tokens.items() if now >= reuse_until]:
+            del self._tokens[uri]
+        while len(self._tokens) >= self.MAX_TOKENS:
+            del self._tokens[next(iter(self._tokens))]
+
+    def invalidate(self):
+        """Drop all cached tokens (e.g. after a 401)."""
+        with self._lock:
+            self._tokens.clear()
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters for the token cache."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total > 0 else 0.0,
+            "cached_tokens": len(self._tokens)
+        }
+
+
+class CoinbaseClient:
+    """
+    Client for Coinbase Advanced Trade API.
+    Handles authentication via Cloud API Keys (JWT).
+    """
+
+    API_URL = "https://api.coinbase.com/api/v3/brokerage"
+    API_HOST = "https://api.coinbase.com"
+
+    def __init__(self, key_name: str, key_secret: str, snapshot_ttl: float = 30.0):
+        self.key_name = key_name
+        self.key_secret = key_secret
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Accept": "application/json",
+            "User-Agent": "ResonanceTradingSystem/4.0"
+        })
+        self.auth = JWTManager(key_name, key_secret)
+        self.snapshot_ttl = snapshot_ttl
+        self._snapshot: Dict[str, Dict] = {}
+        self._snapshot_time = 0.0
+        self._snapshot_lock = threading.Lock()
+        self.book_source = None  # e.g. MarketDataFeed; REST is the fallback
+
+    def _generate_jwt(self, method: str, path: str) -> str:
+        """Get a JWT for authentication (cached per method + URI, see JWTManager)."""
+        return self.auth.get_token(method, path)
+
+    def get_auth_stats(self) -> Dict:
+        """Token cache hit/miss counters."""
+        return self.auth.get_stats()
 
     def _request(self, method: str, path: str, params: Dict = None, data: Dict = None) -> Dict:
         """Make an authenticated request."""
@@ -75,7 +220,7 @@ class CoinbaseClient:
             "Authorization": f"Bearer {jwt_token}"
         }
         
-        url = f"https://api.coinbase.com{path}"
+        url = f"{self.API_HOST}{path}"
         
         try:
             if method == "GET":
@@ -85,6 +230,8 @@ class CoinbaseClient:
             else:
                 return {"error": f"Unsupported method: {method}"}
             
+            if resp.status_code == 401:
+                self.auth.invalidate()
             if resp.status_code != 200:
                 return {"error": f"HTTP {resp.status_code}: {resp.text}"}
             
@@ -103,6 +250,45 @@ class CoinbaseClient:
         data = self._request("GET", "/api/v3/brokerage/products", params={"limit": limit, "product_type": product_type})
         return data.get("products", [])
 
+    def get_products_snapshot(self, product_ids: List[str] = None, ttl: float = None) -> Dict[str, Dict]:
+        """
+        Product metadata (volume_24h etc.) for many products from one paginated
+        list call, indexed by product_id and cached for `ttl` seconds
+        (defaults to snapshot_ttl). Returns only the requested ids, or all.
+        """
+        ttl = self.snapshot_ttl if ttl is None else ttl
+        with self._snapshot_lock:
+            if time.time() - self._snapshot_time > ttl:
+                products = self._fetch_all_products()
+                if products is not None:
+                    self._snapshot = index_products(products)
+                # A failed refresh keeps the previous snapshot and waits out a TTL
+                # before paging again (analyze_ticker falls back to get_product)
+                self._snapshot_time = time.time()
+            snapshot = self._snapshot
+        
+        if product_ids is None:
+            return dict(snapshot)
+        return {pid: snapshot[pid] for pid in product_ids if pid in snapshot}
+
+    def _fetch_all_products(self, product_type: str = "SPOT") -> Optional[List[Dict]]:
+        """Page through /products. Returns None if any page fails (no partial snapshots)."""
+        products = []
+        offset = 0
+        while True:
+            data = self._request(
+                "GET", "/api/v3/brokerage/products",
+                params={"limit": PRODUCTS_PAGE_SIZE, "offset": offset, "product_type": product_type}
+            )
+            if "error" in data:
+                return None
+            page = data.get("products", [])
+            products.extend(page)
+            offset += len(page)
+            total = int(data.get("num_products") or 0)
+            if len(page) < PRODUCTS_PAGE_SIZE or (total and offset >= total):
+                return products
+
     def get_product_book(self, product_id: str, limit: int = 20) -> Dict:
         """Get the order book for a product."""
         # CDP REST API for V3 uses /api/v3/brokerage/product_book
@@ -111,32 +297,7 @@ class CoinbaseClient:
         if "error" in data:
             return data
             
-        # The response is nested: {"pricebook": {"product_id": "BTC-USD", "bids": [...], "asks": [...]}}
-        # Note: 'pricebook' is lowercase 'b' in V3 CDP API
-        price_book = data.get("pricebook", data.get("price_book", {}))
-        bids = price_book.get("bids", [])
-        asks = price_book.get("asks", [])
-        
-        # In V3, bids/asks are lists of objects: [{"price": "...", "size": "..."}, ...]
-        best_bid = float(bids[0]["price"]) if bids else 0
-        best_ask = float(asks[0]["price"]) if asks else 0
-        mid_price = (best_bid + best_ask) / 2 if (best_bid + best_ask) > 0 else 0
-        spread = best_ask - best_bid
-        spread_pct = spread / mid_price if mid_price > 0 else 0
-        
-        bid_depth = sum(float(b.get("size", 0)) for b in bids[:5])
-        ask_depth = sum(float(a.get("size", 0)) for a in asks[:5])
-        
-        return {
-            "best_bid": best_bid,
-            "best_ask": best_ask,
-            "mid_price": mid_price,
-            "spread": spread,
-            "spread_pct": spread_pct,
-            "bid_depth": bid_depth,
-            "ask_depth": ask_depth,
-            "raw": price_book
-        }
+        return parse_product_book(data)
 
     def get_candles(self, product_id: str, start: str, end: str, granularity: str = "ONE_HOUR") -> List[Dict]:
         """Get historical candles for a product.
@@ -151,22 +312,8 @@ class CoinbaseClient:
 
     def get_recent_candles(self, product_id: str, granularity: str = "ONE_HOUR", limit: int = 50) -> List[Dict]:
         """Get recent candles (convenience method). Uses Unix timestamps."""
-        import time
-        
-        granularity_map = {
-            "ONE_MINUTE": 60,
-            "FIVE_MINUTE": 300,
-            "FIFTEEN_MINUTE": 900,
-            "ONE_HOUR": 3600,
-            "SIX_HOUR": 21600,
-            "ONE_DAY": 86400
-        }
-        
-        seconds = granularity_map.get(granularity, 3600)
-        end_ts = int(time.time())
-        start_ts = end_ts - (seconds * limit)
-        
-        return self.get_candles(product_id, str(start_ts), str(end_ts), granularity)
+        start_ts, end_ts = recent_candle_range(granularity, limit)
+        return self.get_candles(product_id, start_ts, end_ts, granularity)
 
     # ─── Trading (Private) ───
 
@@ -179,29 +326,182 @@ class CoinbaseClient:
 
     def analyze_ticker(self, product_id: str) -> Dict:
         """Format ticker data for the trading engine."""
-        product = self.get_product(product_id)
-        book = self.get_product_book(product_id)
+        product = self.get_products_snapshot([product_id]).get(product_id)
+        if product is None:
+            product = self.get_product(product_id)
+        book = self.book_source.get_product_book(product_id) if self.book_source else {"error": "no feed"}
+        if "error" in book:
+            book = self.get_product_book(product_id)
         
-        if "error" in product or "error" in book:
-            return {"error": product.get("error", book.get("error", "Unknown"))}
+        return format_ticker(product_id, product, book)
+
+
+class AsyncCoinbaseClient:
+    """
+    asyncio twin of CoinbaseClient for the radar hot loop.
+    Same market-data surface, one pooled aiohttp session, and a semaphore
+    bounding in-flight requests so a 50+ product scan fans out safely.
+
+    Usage:
+        async with AsyncCoinbaseClient(key, secret) as client:
+            tickers = await asyncio.gather(*(client.analyze_ticker(p) for p in products))
+    """
+
+    API_HOST = "https://api.coinbase.com"
+
+    def __init__(self, key_name: str, key_secret: str, max_concurrency: int = 10,
+                 timeout: float = 10.0, auth: Optional[JWTManager] = None,
+                 snapshot_ttl: float = 30.0):
+        if aiohttp is None:
+            raise ImportError("AsyncCoinbaseClient requires aiohttp (pip install aiohttp)")
+        self.key_name = key_name
+        self.key_secret = key_secret
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.auth = auth or JWTManager(key_name, key_secret)
+        self._semaphore = None
+        self._session = None
+        self.snapshot_ttl = snapshot_ttl
+        self._snapshot: Dict[str, Dict] = {}
+        self._snapshot_time = 0.0
+        self._snapshot_lock = None
+        self.book_source = None  # e.g. MarketDataFeed; REST is the fallback
+
+    async def __aenter__(self):
+        self._ensure_session()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _ensure_session(self):
+        """Create the pooled session lazily (must run inside the event loop)."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    "Accept": "application/json",
+                    "User-Agent": "ResonanceTradingSystem/4.0"
+                }
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._snapshot_lock = asyncio.Lock()
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def get_auth_stats(self) -> Dict:
+        """Token cache hit/miss counters."""
+        return self.auth.get_stats()
+
+    async def _request(self, method: str, path: str, params: Dict = None, data: Dict = None) -> Dict:
+        """Make an authenticated request. Errors come back as {"error": ...} like the sync client."""
+        session = self._ensure_session()
+        headers = {"Authorization": f"Bearer {self.auth.get_token(method, path)}"}
+        url = f"{self.API_HOST}{path}"
         
-        prod_data = product.get("product", product)
+        if method not in ("GET", "POST"):
+            return {"error": f"Unsupported method: {method}"}
         
-        return {
-            "event_name": product_id,
-            "product_id": product_id,
-            "category": "crypto",
-            "market_price": book["mid_price"],
-            "best_bid": book["best_bid"],
-            "best_ask": book["best_ask"],
-            "spread_pct": book["spread_pct"],
-            "bid_depth": book["bid_depth"],
-            "ask_depth": book["ask_depth"],
-            "volume_24h": float(prod_data.get("volume_24h", 0)),
-            "volatility_24h": float(prod_data.get("volume_percentage_change_24h", 0)),
-            "price_momentum_1h": 0.0,
-            "signals": {}
-        }
+        try:
+            async with self._semaphore:
+                async with session.request(method, url, params=params, json=data, headers=headers) as resp:
+                    if resp.status == 401:
+                        self.auth.invalidate()
+                    if resp.status != 200:
+                        return {"error": f"HTTP {resp.status}: {await resp.text()}"}
+                    return await resp.json()
+        except Exception as e:
+            return {"error": str(e) or type(e).__name__}
+
+    # ─── Public Market Data ───
+
+    async def get_product(self, product_id: str) -> Dict:
+        """Get information for a single product (e.g., 'BTC-USD')."""
+        return await self._request("GET", f"/api/v3/brokerage/products/{product_id}")
+
+    async def get_products_snapshot(self, product_ids: List[str] = None, ttl: float = None) -> Dict[str, Dict]:
+        """Async get_products_snapshot. Concurrent callers share a single refresh."""
+        ttl = self.snapshot_ttl if ttl is None else ttl
+        self._ensure_session()
+        async with self._snapshot_lock:
+            if time.time() - self._snapshot_time > ttl:
+                products = await self._fetch_all_products()
+                if products is not None:
+                    self._snapshot = index_products(products)
+                # A failed refresh keeps the previous snapshot and waits out a TTL
+                # before paging again (analyze_ticker falls back to get_product)
+                self._snapshot_time = time.time()
+        snapshot = self._snapshot
+        
+        if product_ids is None:
+            return dict(snapshot)
+        return {pid: snapshot[pid] for pid in product_ids if pid in snapshot}
+
+    async def _fetch_all_products(self, product_type: str = "SPOT") -> Optional[List[Dict]]:
+        """Page through /products. Returns None if any page fails (no partial snapshots)."""
+        products = []
+        offset = 0
+        while True:
+            data = await self._request(
+                "GET", "/api/v3/brokerage/products",
+                params={"limit": PRODUCTS_PAGE_SIZE, "offset": offset, "product_type": product_type}
+            )
+            if "error" in data:
+                return None
+            page = data.get("products", [])
+            products.extend(page)
+            offset += len(page)
+            total = int(data.get("num_products") or 0)
+            if len(page) < PRODUCTS_PAGE_SIZE or (total and offset >= total):
+                return products
+
+    async def get_product_book(self, product_id: str, limit: int = 20) -> Dict:
+        """Get the order book for a product."""
+        data = await self._request("GET", "/api/v3/brokerage/product_book", params={"product_id": product_id, "limit": limit})
+        
+        if "error" in data:
+            return data
+        
+        return parse_product_book(data)
+
+    async def get_candles(self, product_id: str, start: str, end: str, granularity: str = "ONE_HOUR") -> List[Dict]:
+        """Get historical candles for a product."""
+        data = await self._request(
+            "GET",
+            f"/api/v3/brokerage/products/{product_id}/candles",
+            params={"start": start, "end": end, "granularity": granularity}
+        )
+        return data.get("candles", [])
+
+    async def get_recent_candles(self, product_id: str, granularity: str = "ONE_HOUR", limit: int = 50) -> List[Dict]:
+        """Get recent candles (convenience method). Uses Unix timestamps."""
+        start_ts, end_ts = recent_candle_range(granularity, limit)
+        return await self.get_candles(product_id, start_ts, end_ts, granularity)
+
+    # ─── Analysis Helpers ───
+
+    async def analyze_ticker(self, product_id: str) -> Dict:
+        """Format ticker data for the trading engine (metadata + book fetched concurrently)."""
+        book = self.book_source.get_product_book(product_id) if self.book_source else {"error": "no feed"}
+        if "error" in book:
+            snapshot, book = await asyncio.gather(
+                self.get_products_snapshot([product_id]),
+                self.get_product_book(product_id)
+            )
+        else:
+            snapshot = await self.get_products_snapshot([product_id])
+        product = snapshot.get(product_id)
+        if product is None:
+            product = await self.get_product(product_id)
+        
+        return format_ticker(product_id, product, book)
+
 
 if __name__ == "__main__":
     print("Coinbase Client Logic Updated")
@@ -7,26 +7,77 @@ Built by Arki (Engineer) for B
 This is the decision pipeline for Spot Trading on Coinbase.
 Every trade goes through 10 gates.
 If any gate fails, we don't trade. No exceptions.
+
+The gates are declared in GATES. Cheap pure gates (liquidity, trigger,
+Bayesian, edge, sizing, risk) run first and short-circuit; the analyzer
+call (Gate 5) only runs for survivors, on a worker pool with a deadline.
+get_gate_stats() reports per-gate latency and rejection counts.
 """
 
 import json
 import math
+import threading
 import time
 import uuid
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List, NamedTuple
 
 from probability import BayesianEstimator, DeepSeekAnalyzer
 from sizing import PositionSizer
 from risk import RiskManager
 from journal import TradeJournal
 from coinbase_client import CoinbaseClient
+from indicators import np, percentile
+
+
+class Gate(NamedTuple):
+    """One stage of the decision pipeline, implemented by TradingEngine._gate_<key>."""
+    name: str                       # "G1" ... prefix of the gates_passed / gates_failed lines
+    key: str                        # details / context key the gate's value is stored under
+    label: str
+    requires: Tuple[str, ...] = ()  # Context keys earlier gates must have produced
+    expensive: bool = False         # Runs after all cheap gates, off-thread with a deadline
+
+
+# Declarative pipeline. Cheap pure gates run first in this order and short-circuit;
+# expensive gates only run for opportunities that passed every cheap gate.
+GATES = (
+    Gate("G1", "liquidity", "Microstructure"),
+    Gate("G2", "trigger", "Trigger"),
+    Gate("G3", "p_bayesian", "Bayesian", ("trigger",)),
+    Gate("G4", "edge", "Edge", ("p_bayesian", "trigger", "liquidity")),
+    Gate("G5", "analyzer", "Analyzer", ("trigger", "p_bayesian"), expensive=True),
+    Gate("G6", "position", "Sizing", ("trigger", "p_bayesian")),
+    Gate("G7", "risk", "Risk", ("position",)),
+)
+GATE_BY_KEY = {g.key: g for g in GATES}
+GATE_NUMBER = {g.name: int(g.name[1:]) for g in GATES}
+
+# Gates evaluate_batch applies column-wise across a whole scan
+VECTOR_GATE_KEYS = ("liquidity", "trigger", "p_bayesian", "edge")
+
+# BatchEvaluation.failed code: passed gates 1-4 but ranked outside top-K
+RANKED_OUT = -1
+
+# Gate 1 floor when book depth is known: USD within 10 bps of mid on the thinner
+# side, ~20x the largest position the sizer allows a $5k portfolio (10% cap)
+DEFAULT_MIN_DEPTH_USD = 10_000.0
 
 
 class TradingEngine:
     """Core trading decision pipeline for Spot Coinbase."""
 
+    STATE_VERSION = 1
+
+    # Gate 2 trigger thresholds (relaxed) — also used by batch_scanner masks
+    TRIGGER_Z = 1.5
+    BUY_MAX_RSI = 40
+    SELL_MIN_RSI = 60
+
     def __init__(self, config_path: str = "config.json"):
         with open(config_path) as f:
             self.config = json.load(f)
@@ -47,93 +98,365 @@ class TradingEngine:
         self.trade_count = 0
         self.open_positions = []
 
+        # Gate pipeline: plan, analyzer workers, per-gate metrics
+        pipeline = self.config.get("pipeline", {})
+        self.analyzer_deadline = pipeline.get("analyzer_deadline_s", 20.0)
+        self.batch_top_k = pipeline.get("batch_top_k", 3)
+        self._cheap_gates, self._expensive_gates = self._plan_gates()
+        self._analyzer_pool = ThreadPoolExecutor(max_workers=pipeline.get("analyzer_workers", 4),
+                                                 thread_name_prefix="analyzer")
+        self._gate_lock = threading.Lock()
+        self.gate_stats = {g.name: {"runs": 0, "passed": 0, "rejected": 0, "timeout": 0, "error": 0,
+                                    "total_ms": 0.0, "max_ms": 0.0} for g in GATES}
+        self._gate_latencies = {g.name: deque(maxlen=1000) for g in GATES}
+
     def evaluate_opportunity(self, market_data: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
         """
         Run the full 10-gate decision pipeline.
         Returns (should_trade, details).
         """
-        details = {
+        return self.evaluate_many([market_data])[0]
+
+    def evaluate_many(self, opportunities: List[Dict[str, Any]]) -> List[Tuple[bool, Dict[str, Any]]]:
+        """
+        Run the gate pipeline for several opportunities.
+        Cheap gates run inline and short-circuit; the expensive gates of every
+        survivor are submitted at once and awaited against the analyzer deadline.
+        Returns one (should_trade, details) per opportunity, in order.
+        """
+        runs = [self._begin(market_data, self._new_details(market_data), {}, self._cheap_gates)
+                for market_data in opportunities]
+        return [(failed is None, details) for failed, details in self._complete(runs)]
+
+    def trigger_side(self, market_data: Dict[str, Any]) -> Optional[str]:
+        """Side Gate 2 would trade ("BUY"/"SELL"), or None while no trigger fires."""
+        trigger = self._detect_trigger(market_data)
+        if not trigger.get("triggered"):
+            return None
+        return "BUY" if trigger["type"] == "MEAN_REVERSION_BUY" else "SELL"
+
+    def evaluate_batch(self, opportunities: List[Dict[str, Any]], top_k: Optional[int] = None) -> "BatchEvaluation":
+        """
+        Evaluate a whole scan at once. Gates 1-4 are applied column-wise across
+        all candidates (NumPy when available); survivors are ranked by edge
+        (info ratio) and only the best `top_k` (config pipeline.batch_top_k)
+        go on to sizing, risk and the analyzer. No details dicts, UUIDs or
+        timestamps are built for the rest unless asked for.
+        """
+        top_k = self.batch_top_k if top_k is None else top_k
+        n = len(opportunities)
+        batch = BatchEvaluation(self, opportunities, top_k)
+        if not n:
+            return batch
+
+        # GATE 1: column-wise microstructure mask
+        start = time.perf_counter()
+        cols = self._liquidity_columns(opportunities)
+        g1_fail = cols["g1_fail"]
+        self._record_batch(GATE_BY_KEY["liquidity"], n, sum(g1_fail), time.perf_counter() - start)
+
+        # GATE 2: column-wise trigger mask
+        start = time.perf_counter()
+        cols.update(self._trigger_columns(opportunities))
+        g2_fail = [not g1 and trigger is None for g1, trigger in zip(g1_fail, cols["trigger_type"])]
+        self._record_batch(GATE_BY_KEY["trigger"], n - sum(g1_fail), sum(g2_fail), time.perf_counter() - start)
+        survivors = [i for i in range(n) if not g1_fail[i] and not g2_fail[i]]
+
+        # GATE 3: posteriors for all survivors in one estimator pass
+        start = time.perf_counter()
+        for i in survivors:
+            signals = opportunities[i].get("signals", {})
+            if cols["trigger_type"][i] == "MEAN_REVERSION_BUY":
+                signals["technical"] = 0.7 + (0.1 * min(1.0, (cols["strength"][i] - 2.0)))
+            else:
+                signals["technical"] = 0.3 - (0.1 * min(1.0, (cols["strength"][i] - 70.0) / 10.0))
+            batch.signals[i] = signals
+        if survivors:
+            posteriors = self.estimator.estimate_batch(0.5, [batch.signals[i] for i in survivors])
+            for i, p in zip(survivors, posteriors):
+                batch.p_bayesian[i] = p
+        self._record_batch(GATE_BY_KEY["p_bayesian"], len(survivors), 0, time.perf_counter() - start)
+
+        # GATE 4: edge, then rank by info ratio
+        start = time.perf_counter()
+        edged = []
+        for i in survivors:
+            batch.info_ratio[i] = self._info_ratio(batch.p_bayesian[i], cols["trigger_type"][i])
+            if batch.info_ratio[i] > 0.5 or cols["strength"][i] > 2.5:
+                edged.append(i)
+        self._record_batch(GATE_BY_KEY["edge"], len(survivors), len(survivors) - len(edged),
+                           time.perf_counter() - start)
+        edged.sort(key=lambda i: batch.info_ratio[i], reverse=True)
+
+        for i in range(n):
+            batch.failed[i] = 1 if g1_fail[i] else 2 if g2_fail[i] else 4
+        for rank, i in enumerate(edged):
+            batch.rank[i] = rank
+            batch.failed[i] = 0 if rank < top_k else RANKED_OUT
+
+        # Finalists: full details, remaining cheap gates, then the analyzer
+        runs = []
+        for i in edged[:top_k]:
+            details, context = batch.replay(i)
+            remaining = [g for g in self._cheap_gates if g.key not in VECTOR_GATE_KEYS]
+            runs.append(self._begin(opportunities[i], details, context, remaining))
+        for i, (failed, details) in zip(edged[:top_k], self._complete(runs)):
+            batch.failed[i] = 0 if failed is None else GATE_NUMBER[failed.name]
+            batch.finalists[i] = details
+        batch.columns = cols
+        return batch
+
+    def _new_details(self, market_data: Dict[str, Any], timestamp: Optional[str] = None) -> Dict[str, Any]:
+        return {
             "trade_id": str(uuid.uuid4())[:8],
             "product_id": market_data.get("product_id", "unknown"),
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": timestamp or datetime.now(timezone.utc).isoformat(),
             "gates_passed": [],
             "gates_failed": [],
             "recommendation": "SKIP",
         }
 
-        # ═══════════════════════════════════════
-        # GATE 1: Market Microstructure
-        # ═══════════════════════════════════════
+    def _begin(self, market_data: Dict, details: Dict, context: Dict, cheap_gates):
+        """Run cheap gates inline; submit the expensive ones if all pass."""
+        failed = next((g for g in cheap_gates if not self._run_gate(g, market_data, details, context)), None)
+        futures = []
+        if failed is None:
+            futures = [(gate, time.monotonic(), self._analyzer_pool.submit(self._call_gate, gate, market_data, context))
+                       for gate in self._expensive_gates]
+        return failed, details, context, futures
+
+    def _complete(self, runs) -> List[Tuple[Optional["Gate"], Dict]]:
+        """Await expensive gates in submission order; returns (failed gate or None, details)."""
+        results = []
+        for failed, details, context, futures in runs:
+            for gate, submitted, future in futures:
+                if failed is None:
+                    if not self._await_gate(gate, submitted, future, details, context):
+                        failed = gate
+                else:
+                    future.cancel()
+            if failed is None:
+                # ═══ GATES 8-10: Combined Final Gates ═══
+                details["recommendation"] = "EXECUTE"
+                details["side"] = context["side"]
+                details["target"] = context["target"]
+                details["stop"] = context["stop"]
+                details["signals_used"] = context["signals"]
+                details["gates_passed"].append("G10: ✅ ALL GATES PASSED — EXECUTE")
+            results.append((failed, details))
+        return results
+
+    def _liquidity_columns(self, opportunities: List[Dict]) -> Dict[str, Any]:
+        """Gate 1 inputs and results for every candidate, as columns."""
+        min_score, min_depth_score = self._liquidity_thresholds()
+        max_spread = self.config["edge"].get("max_spread_pct", 0.001)
+        if np is None:
+            liquidity = [self._check_liquidity(o) for o in opportunities]
+            return {
+                "score": [l["score"] for l in liquidity],
+                "spread_pct": [l["spread_pct"] for l in liquidity],
+                "g1_fail": [l["score"] < l["min_score"] or l["spread_pct"] > max_spread for l in liquidity],
+            }
+
+        def col(key):
+            return np.array([o.get(key, 0.0) for o in opportunities], dtype=np.float64)
+
+        def optional_col(key):
+            return np.array([np.nan if o.get(key) is None else o[key] for o in opportunities], dtype=np.float64)
+
+        # Same arithmetic as _check_liquidity, element-wise
+        bid, ask, volume = col("best_bid"), col("best_ask"), col("volume_24h")
+        mid = np.where(bid + ask > 0, (bid + ask) / 2, 1.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            spread = np.where(mid > 0, (ask - bid) / mid, 1.0)
+        depth = np.fmin(optional_col("bid_depth_usd_10bps"), optional_col("ask_depth_usd_10bps"))
+        has_depth = ~np.isnan(optional_col("bid_depth_usd_10bps")) & ~np.isnan(optional_col("ask_depth_usd_10bps"))
+        size = np.maximum(np.where(has_depth, depth, volume), 1)
+        score = np.log10(size) * (1 - spread * 100)
+        threshold = np.where(has_depth, min_depth_score, min_score)
+        return {
+            "score": score,
+            "spread_pct": spread,
+            "g1_fail": ((score < threshold) | (spread > max_spread)).tolist(),
+        }
+
+    def _trigger_columns(self, opportunities: List[Dict]) -> Dict[str, Any]:
+        """Gate 2 inputs and results for every candidate, as columns."""
+        if np is None:
+            triggers = [self._detect_trigger(o) for o in opportunities]
+            return {
+                "trigger_type": [t.get("type") for t in triggers],
+                "strength": [t.get("strength", 0.0) for t in triggers],
+            }
+
+        def col(key, default=0.0):
+            return np.array([o.get(key, default) for o in opportunities], dtype=np.float64)
+
+        # Same thresholds as _detect_trigger
+        price = col("market_price")
+        ma = np.array([o.get("ma_20", o.get("market_price", 0)) for o in opportunities], dtype=np.float64)
+        std, rsi = col("std_20", 0.01), col("rsi_14", 50)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(std > 0, (price - ma) / std, 0.0)
+        buy = (z < -self.TRIGGER_Z) & (rsi < self.BUY_MAX_RSI)
+        sell = ~buy & (z > self.TRIGGER_Z) & (rsi > self.SELL_MIN_RSI)
+        trigger_type = np.where(buy, "MEAN_REVERSION_BUY", np.where(sell, "TREND_EXHAUSTION_SELL", ""))
+        return {
+            "z_score": z,
+            "rsi": rsi,
+            "trigger_type": [t or None for t in trigger_type.tolist()],
+            "strength": np.where(buy, np.abs(z), rsi),
+        }
+
+    # ─── Gate pipeline ───
+
+    def _plan_gates(self):
+        """Cheap gates in declaration order, then expensive ones; check every `requires` is met."""
+        cheap = [g for g in GATES if not g.expensive]
+        expensive = [g for g in GATES if g.expensive]
+        available = set()
+        for gate in cheap + expensive:
+            missing = [key for key in gate.requires if key not in available]
+            if missing:
+                raise ValueError(f"Gate {gate.name} requires {missing} before it runs")
+            if not gate.expensive:
+                available.add(gate.key)
+        return cheap, expensive
+
+    def _call_gate(self, gate: "Gate", market_data: Dict, context: Dict) -> Tuple[bool, str, Any, float]:
+        start = time.perf_counter()
+        try:
+            passed, message, value = getattr(self, f"_gate_{gate.key}")(market_data, context)
+        except Exception as e:
+            with self._gate_lock:
+                self.gate_stats[gate.name]["error"] += 1  # Also counted as a rejection
+            return False, f"{gate.name}: Error {type(e).__name__}: {e}", None, time.perf_counter() - start
+        return passed, message, value, time.perf_counter() - start
+
+    def _run_gate(self, gate: "Gate", market_data: Dict, details: Dict, context: Dict) -> bool:
+        passed, message, value, elapsed = self._call_gate(gate, market_data, context)
+        return self._apply_gate(gate, passed, message, value, elapsed, details, context)
+
+    def _await_gate(self, gate: "Gate", submitted: float, future, details: Dict, context: Dict) -> bool:
+        remaining = submitted + self.analyzer_deadline - time.monotonic()
+        try:
+            passed, message, value, _ = future.result(timeout=max(remaining, 0))
+        except FutureTimeout:
+            future.cancel()  # Only helps if it never started; a running call finishes in the background
+            self._record_gate(gate, time.monotonic() - submitted, "timeout")
+            details["gates_failed"].append(f"{gate.name}: {gate.label} timed out (>{self.analyzer_deadline:g}s)")
+            return False
+        # Latency as seen by the pipeline: queue wait + call
+        return self._apply_gate(gate, passed, message, value, time.monotonic() - submitted, details, context)
+
+    def _apply_gate(self, gate: "Gate", passed: bool, message: str, value: Any,
+                    elapsed: float, details: Dict, context: Dict) -> bool:
+        self._record_gate(gate, elapsed, "passed" if passed else "rejected")
+        if not passed:
+            details["gates_failed"].append(message)
+            return False
+        details["gates_passed"].append(message)
+        details[gate.key] = value
+        context[gate.key] = value
+        return True
+
+    def _record_gate(self, gate: "Gate", elapsed: float, outcome: str):
+        with self._gate_lock:
+            stats = self.gate_stats[gate.name]
+            stats[outcome] += 1
+            stats["runs"] += 1
+            stats["total_ms"] += elapsed * 1000
+            stats["max_ms"] = max(stats["max_ms"], elapsed * 1000)
+            self._gate_latencies[gate.name].append(elapsed)
+
+    def _record_batch(self, gate: "Gate", runs: int, rejected: int, elapsed: float):
+        """Account a column-wise gate pass (latency sample = amortized per candidate)."""
+        if not runs:
+            return
+        with self._gate_lock:
+            stats = self.gate_stats[gate.name]
+            stats["runs"] += runs
+            stats["passed"] += runs - rejected
+            stats["rejected"] += rejected
+            stats["total_ms"] += elapsed * 1000
+            stats["max_ms"] = max(stats["max_ms"], elapsed * 1000 / runs)
+            self._gate_latencies[gate.name].append(elapsed / runs)
+
+    def get_gate_stats(self) -> Dict[str, Dict]:
+        """Per-gate runs, rejections, timeouts and latency, in pipeline order."""
+        out = {}
+        with self._gate_lock:
+            for gate in self._cheap_gates + self._expensive_gates:
+                stats = dict(self.gate_stats[gate.name])
+                latencies = sorted(self._gate_latencies[gate.name])
+                runs = stats["runs"]
+                stats["label"] = gate.label
+                stats["avg_ms"] = stats["total_ms"] / runs if runs else 0.0
+                stats["p50_ms"] = percentile(latencies, 50) * 1000
+                stats["p99_ms"] = percentile(latencies, 99) * 1000
+                stats["reject_rate"] = (stats["rejected"] + stats["timeout"]) / runs if runs else 0.0
+                out[gate.name] = stats
+        return out
+
+    # ═══════════════════════════════════════
+    # Gates. Each returns (passed, message, value); value is stored under the
+    # gate's key in details and in the context later gates read.
+    # ═══════════════════════════════════════
+
+    def _gate_liquidity(self, market_data: Dict, context: Dict):
+        """GATE 1: Market Microstructure."""
         liquidity = self._check_liquidity(market_data)
-        if liquidity["score"] < self.config["edge"].get("min_liquidity_score", 5.0):
-            details["gates_failed"].append(f"G1: Liquidity {liquidity['score']:.1f} < 5.0")
-            return False, details
-        
+        if liquidity["score"] < liquidity["min_score"]:
+            return False, f"G1: Liquidity {liquidity['score']:.1f} < {liquidity['min_score']:.1f}", liquidity
         if liquidity["spread_pct"] > self.config["edge"].get("max_spread_pct", 0.001):
-            details["gates_failed"].append(f"G1: Spread {liquidity['spread_pct']:.4f} > 0.001")
-            return False, details
-        
-        details["gates_passed"].append("G1: Microstructure OK")
-        details["liquidity"] = liquidity
+            return False, f"G1: Spread {liquidity['spread_pct']:.4f} > 0.001", liquidity
+        return True, "G1: Microstructure OK", liquidity
 
-        # ═══════════════════════════════════════
-        # GATE 2: Trigger Detection (Mean Reversion / Trend Exhaustion)
-        # ═══════════════════════════════════════
+    def _gate_trigger(self, market_data: Dict, context: Dict):
+        """GATE 2: Trigger Detection (Mean Reversion / Trend Exhaustion)."""
         trigger = self._detect_trigger(market_data)
         if not trigger["triggered"]:
-            details["gates_failed"].append(f"G2: No Trigger ({trigger['reason']})")
-            return False, details
-        
-        details["gates_passed"].append(f"G2: Triggered {trigger['type']} (strength={trigger['strength']:.2f})")
-        details["trigger"] = trigger
+            return False, f"G2: No Trigger ({trigger['reason']})", trigger
+        return True, f"G2: Triggered {trigger['type']} (strength={trigger['strength']:.2f})", trigger
 
-        # ═══════════════════════════════════════
-        # GATE 3: Bayesian Probability
-        # ═══════════════════════════════════════
+    def _gate_p_bayesian(self, market_data: Dict, context: Dict):
+        """GATE 3: Bayesian Probability."""
         # Map technical trigger to initial probability
         # Mean Reversion Buy -> p=0.7 base
         # Trend Exhaustion Sell -> p=0.7 base
+        trigger = context["trigger"]
         p_market = 0.5  # Start neutral
         signals = market_data.get("signals", {})
-        
+
         # Inject technical signal based on trigger
         if trigger["type"] == "MEAN_REVERSION_BUY":
             signals["technical"] = 0.7 + (0.1 * min(1.0, (trigger["strength"] - 2.0)))
         elif trigger["type"] == "TREND_EXHAUSTION_SELL":
             signals["technical"] = 0.3 - (0.1 * min(1.0, (trigger["strength"] - 70.0) / 10.0))
-            
+
         p_bayesian = self.estimator.estimate(p_market, signals)
-        
-        details["gates_passed"].append(f"G3: P_bayesian={p_bayesian:.3f}")
-        details["p_bayesian"] = p_bayesian
+        context["signals"] = signals
+        return True, f"G3: P_bayesian={p_bayesian:.3f}", p_bayesian
 
-        # ═══════════════════════════════════════
-        # GATE 4: Edge Detection (Z-Score & Info Ratio)
-        # ═══════════════════════════════════════
-        edge = self._check_edge(p_bayesian, trigger, liquidity, signals)
+    def _gate_edge(self, market_data: Dict, context: Dict):
+        """GATE 4: Edge Detection (Z-Score & Info Ratio)."""
+        edge = self._check_edge(context["p_bayesian"], context["trigger"], context["liquidity"], context["signals"])
         if not edge["has_edge"]:
-            details["gates_failed"].append(f"G4: {edge['reason']}")
-            return False, details
-        
-        details["gates_passed"].append(f"G4: Edge OK (IR={edge['info_ratio']:.2f})")
-        details["edge"] = edge
+            return False, f"G4: {edge['reason']}", edge
+        return True, f"G4: Edge OK (IR={edge['info_ratio']:.2f})", edge
 
-        # ═══════════════════════════════════════
-        # GATE 5: Analyzer Validation (DeepSeek V3.2)
-        # ═══════════════════════════════════════
-        analyzer_val = self._validate_with_analyzer(market_data, trigger, p_bayesian)
+    def _gate_analyzer(self, market_data: Dict, context: Dict):
+        """GATE 5: Analyzer Validation (DeepSeek V3.2). Runs off-thread with a deadline."""
+        analyzer_val = self._validate_with_analyzer(market_data, context["trigger"], context["p_bayesian"])
         if analyzer_val["confidence"] < 0.7:
-            details["gates_failed"].append(f"G5: Analyzer Confidence {analyzer_val['confidence']:.2f} < 0.7")
-            return False, details
-        
-        details["gates_passed"].append(f"G5: Analyzer Validated ({analyzer_val['confidence']:.2f})")
-        details["analyzer"] = analyzer_val
+            return False, f"G5: Analyzer Confidence {analyzer_val['confidence']:.2f} < 0.7", analyzer_val
+        return True, f"G5: Analyzer Validated ({analyzer_val['confidence']:.2f})", analyzer_val
 
-        # ═══════════════════════════════════════
-        # GATE 6: Position Sizing (Spot Reward/Risk)
-        # ═══════════════════════════════════════
+    def _gate_position(self, market_data: Dict, context: Dict):
+        """GATE 6: Position Sizing (Spot Reward/Risk)."""
+        trigger, p_bayesian = context["trigger"], context["p_bayesian"]
         side = "BUY" if trigger["type"] == "MEAN_REVERSION_BUY" else "SELL"
-        
+
         # Reward/Risk calculation
         entry_price = market_data["market_price"]
         if side == "BUY":
@@ -142,9 +465,9 @@ class TradingEngine:
         else:
             target = entry_price * (1 - trigger["expected_move"])
             stop = entry_price * (1 + trigger["risk_limit"])
-            
+
         payout_ratio = abs(target - entry_price) / abs(entry_price - stop) if abs(entry_price - stop) > 0 else 1.0
-        
+
         position = self.sizer.calculate(
             p_estimated=p_bayesian if side == "BUY" else (1 - p_bayesian),
             payout_ratio=payout_ratio,
@@ -153,41 +476,23 @@ class TradingEngine:
             trade_count=self.trade_count,
             volatility_ratio=1.0 # Placeholder
         )
-        
+
         if position["size_usd"] < 1.0:
-            details["gates_failed"].append(f"G6: Position too small (${position['size_usd']:.2f})")
-            return False, details
-        
-        details["gates_passed"].append(f"G6: Size=${position['size_usd']:.2f}")
-        details["position"] = position
+            return False, f"G6: Position too small (${position['size_usd']:.2f})", position
+        context.update(side=side, target=target, stop=stop)
+        return True, f"G6: Size=${position['size_usd']:.2f}", position
 
-        # ═══════════════════════════════════════
-        # GATE 7: Risk limits
-        # ═══════════════════════════════════════
+    def _gate_risk(self, market_data: Dict, context: Dict):
+        """GATE 7: Risk limits."""
         risk_check = self.risk.check_trade(
-            position_size=position["size_usd"],
+            position_size=context["position"]["size_usd"],
             portfolio_value=self.portfolio_value,
             open_positions=self.open_positions,
             hour_tier="winning"
         )
-        
         if not risk_check["approved"]:
-            details["gates_failed"].append(f"G7: {risk_check['reason']}")
-            return False, details
-        
-        details["gates_passed"].append("G7: Risk limits OK")
-
-        # ═══════════════════════════════════════
-        # GATES 8-10: Combined Final Gates
-        # ═══════════════════════════════════════
-        details["recommendation"] = "EXECUTE"
-        details["side"] = side
-        details["target"] = target
-        details["stop"] = stop
-        
-        details["gates_passed"].append("G10: ✅ ALL GATES PASSED — EXECUTE")
-        
-        return True, details
+            return False, f"G7: {risk_check['reason']}", risk_check
+        return True, "G7: Risk limits OK", risk_check
 
     # ─── Internal methods ───
 
@@ -199,14 +504,40 @@ class TradingEngine:
         spread_pct = (ask - bid) / mid if mid > 0 else 1.0
         
         volume = data.get("volume_24h", 0)
-        score = math.log10(max(volume, 1)) * (1 - spread_pct * 100)
-        
+        bid_usd = data.get("bid_depth_usd_10bps")
+        ask_usd = data.get("ask_depth_usd_10bps")
+
+        min_score, min_depth_score = self._liquidity_thresholds()
+        if bid_usd is not None and ask_usd is not None:
+            # Real depth: USD resting within 10 bps of mid on the thinner side
+            depth_usd = min(bid_usd, ask_usd)
+            score = math.log10(max(depth_usd, 1)) * (1 - spread_pct * 100)
+            min_score = min_depth_score
+        else:
+            # No book depth available: fall back to the 24h volume proxy
+            depth_usd = None
+            score = math.log10(max(volume, 1)) * (1 - spread_pct * 100)
+
         return {
             "score": score,
+            "min_score": min_score,
             "spread_pct": spread_pct,
+            "mid_price": mid,
+            "depth_usd_10bps": depth_usd,
+            "imbalance": data.get("book_imbalance"),
             "volume_24h": volume
         }
 
+    def _liquidity_thresholds(self) -> Tuple[float, float]:
+        """
+        Gate 1 minimum scores: (24h volume proxy, book depth). The two scores
+        are on different scales (log10 base-unit volume vs log10 USD within
+        10 bps), so each has its own threshold.
+        """
+        edge = self.config["edge"]
+        return (edge.get("min_liquidity_score", 5.0),
+                math.log10(max(edge.get("min_depth_usd_10bps", DEFAULT_MIN_DEPTH_USD), 1)))
+
     def _detect_trigger(self, data: Dict) -> Dict:
         """Gate 2: Mean Reversion / Trend Exhaustion detection."""
         price = data.get("market_price", 0)
@@ -217,7 +548,7 @@ class TradingEngine:
         z_score = (price - ma) / std if std > 0 else 0
         
         # Mean Reversion Buy (relaxed thresholds)
-        if z_score < -1.5 and rsi < 40:
+        if z_score < -self.TRIGGER_Z and rsi < self.BUY_MAX_RSI:
             return {
                 "triggered": True,
                 "type": "MEAN_REVERSION_BUY",
@@ -227,7 +558,7 @@ class TradingEngine:
             }
         
         # Trend Exhaustion Sell (relaxed thresholds)
-        if z_score > 1.5 and rsi > 60:
+        if z_score > self.TRIGGER_Z and rsi > self.SELL_MIN_RSI:
             return {
                 "triggered": True,
                 "type": "TREND_EXHAUSTION_SELL",
@@ -240,8 +571,7 @@ class TradingEngine:
 
     def _check_edge(self, p_bayesian: float, trigger: Dict, liquidity: Dict, signals: Dict) -> Dict:
         """Gate 4: Edge check."""
-        # Simple IR for now
-        info_ratio = (p_bayesian - 0.5) / 0.1 # assuming 0.1 std dev of signals
+        info_ratio = self._info_ratio(p_bayesian, trigger["type"])
         has_edge = info_ratio > 0.5 or (trigger["strength"] > 2.5)
         
         return {
@@ -250,6 +580,15 @@ class TradingEngine:
             "reason": "Low Info Ratio" if not has_edge else ""
         }
 
+    @staticmethod
+    def _info_ratio(p_bayesian: float, trigger_type: str) -> float:
+        """
+        Simple IR in the trade's direction, assuming 0.1 std dev of signals:
+        a SELL's edge is the posterior's distance *below* 0.5.
+        """
+        edge = p_bayesian - 0.5
+        return (-edge if trigger_type == "TREND_EXHAUSTION_SELL" else edge) / 0.1
+
     def _validate_with_analyzer(self, data: Dict, trigger: Dict, p_bayesian: float) -> Dict:
         """Gate 5: Complex trade validation via DeepSeek V3.2."""
         context = {
@@ -260,6 +599,22 @@ class TradingEngine:
         }
         return self.analyzer.validate_trade(context)
 
+    # ─── State snapshot ───
+
+    def state_components(self) -> Dict[str, Any]:
+        """Everything a restart should keep, by StateStore name."""
+        return {"engine": self, "risk": self.risk, "estimator": self.estimator,
+                "calibration": self.estimator.calibration}
+
+    def snapshot_state(self) -> Dict:
+        return {"open_positions": [dict(p) for p in self.open_positions],
+                "trade_count": self.trade_count, "portfolio_value": self.portfolio_value}
+
+    def restore_state(self, state: Dict):
+        self.open_positions = [dict(p) for p in state["open_positions"]]
+        self.trade_count = state["trade_count"]
+        self.portfolio_value = state["portfolio_value"]
+
     def execute_trade(self, details: Dict) -> Dict:
         """Execute a spot trade."""
         trade = {
@@ -270,6 +625,8 @@ class TradingEngine:
             "target_price": details.get("target"),
             "stop_price": details.get("stop"),
             "size_usd": details["position"]["size_usd"],
+            "p_bayesian": details["p_bayesian"],
+            "signals_used": details.get("signals_used", {}),
             "timestamp": details["timestamp"],
             "mode": self.mode,
             "status": "OPEN"
@@ -282,11 +639,80 @@ class TradingEngine:
         
         self.open_positions.append(trade)
         self.trade_count += 1
+        self.estimator.record_forecast(trade)
         self.journal.log_entry(trade)
         
         return trade
 
 
+class BatchEvaluation:
+    """
+    Compact result of TradingEngine.evaluate_batch, one slot per candidate.
+    failed[i]: 0 = every gate passed, 1-7 = the gate that rejected it,
+    RANKED_OUT = passed gates 1-4 but ranked outside top-K.
+    Only finalists carry a full details dict; details(i) rebuilds the rest on demand.
+    """
+
+    def __init__(self, engine: TradingEngine, opportunities: List[Dict], top_k: int):
+        n = len(opportunities)
+        self.engine = engine
+        self.opportunities = opportunities
+        self.top_k = top_k
+        self.timestamp = datetime.now(timezone.utc).isoformat()
+        self.failed = array("b", bytes(n))
+        self.rank = array("i", [-1]) * n
+        self.p_bayesian = array("d", [math.nan]) * n
+        self.info_ratio = array("d", [math.nan]) * n
+        self.signals: Dict[int, Dict] = {}
+        self.finalists: Dict[int, Dict] = {}
+        self.columns: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.opportunities)
+
+    @property
+    def passed(self) -> List[int]:
+        """Indices of candidates that passed every gate, best edge first."""
+        return sorted((i for i, f in enumerate(self.failed) if f == 0), key=lambda i: self.rank[i])
+
+    def details(self, i: int) -> Dict[str, Any]:
+        """Legacy evaluate_opportunity details for candidate i."""
+        if i in self.finalists:
+            return self.finalists[i]
+        return self.replay(i)[0]
+
+    def results(self) -> List[Tuple[bool, Dict[str, Any]]]:
+        """Same shape as evaluate_many: one (should_trade, details) per candidate."""
+        return [(self.failed[i] == 0, self.details(i)) for i in range(len(self))]
+
+    def summary(self) -> Dict[str, int]:
+        counts = Counter(self.failed)
+        out = {"candidates": len(self), "passed": counts.pop(0, 0), "ranked_out": counts.pop(RANKED_OUT, 0)}
+        out.update({f"rejected_g{code}": count for code, count in sorted(counts.items())})
+        return out
+
+    def replay(self, i: int) -> Tuple[Dict, Dict]:
+        """details + context through gates 1-4 from the batch columns (no estimator call)."""
+        engine, opp = self.engine, self.opportunities[i]
+        details, context = engine._new_details(opp, self.timestamp), {}
+        for key in VECTOR_GATE_KEYS:
+            if key == "p_bayesian":
+                p = self.p_bayesian[i]
+                passed, message, value = True, f"G3: P_bayesian={p:.3f}", p
+                context["signals"] = self.signals[i]
+            else:
+                passed, message, value = getattr(engine, f"_gate_{key}")(opp, context)
+            if not passed:
+                details["gates_failed"].append(message)
+                return details, context
+            details["gates_passed"].append(message)
+            details[key] = value
+            context[key] = value
+        if self.failed[i] == RANKED_OUT:
+            details["gates_failed"].append(f"Rank: #{self.rank[i] + 1} by edge, outside top-{self.top_k}")
+        return details, context
+
+
 if __name__ == "__main__":
     try:
         engine = TradingEngine()
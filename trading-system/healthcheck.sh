@@ -27,10 +27,11 @@ fi
 # 3. Check Coinbase API
 CB_RESPONSE=$(cd /home/openclaw/.openclaw/workspace/trading-system && python3 -c "
 from coinbase_client import CoinbaseClient
+from market_cache import get_market_cache
 import json
 with open('/home/openclaw/.secrets/coinbase.json') as f:
     s = json.load(f)
-c = CoinbaseClient(s['api_key'], s['api_secret'])
+c = get_market_cache(CoinbaseClient(s['api_key'], s['api_secret']))
 t = c.analyze_ticker('BTC-USD')
 print(f'BTC: \${t[\"market_price\"]:,.2f}')
 " 2>&1)
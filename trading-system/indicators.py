@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Indicators Module
+One shared home for RSI / MA / std / Bollinger / z-score.
+
+Three ways in:
+  - calculate_rsi / calculate_ma / calculate_std / compute_indicators:
+    drop-in replacements for the per-radar copies (candles sorted once).
+  - RollingSMA / RollingStd / RollingRSI / BollingerBands / ZScore / IndicatorState:
+    streaming state, O(1) per new close, with peek() for the still-forming candle.
+  - rolling_mean / rolling_std / rolling_rsi: vectorized NumPy batch path for
+    backfills, over the last axis (works on a single series or a products x time matrix).
+Plus percentile(), the latency-percentile helper shared by the stats reporters.
+"""
+
+import math
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np  # Optional: only needed for the batch path
+except ImportError:
+    np = None
+
+
+# ─── Candle helpers ───
+
+def closes_from_candles(candles: List[Dict]) -> List[float]:
+    """Closes in chronological order (Coinbase returns newest first)."""
+    return [float(c.get("close", 0)) for c in sorted(candles, key=lambda x: int(x.get("start", 0)))]
+
+
+def compute_indicators(candles: List[Dict], rsi_period: int = 14, ma_period: int = 20) -> Dict[str, float]:
+    """rsi/ma/std from one sort of the candle list. Same values as the three calculate_* calls."""
+    closes = closes_from_candles(candles)
+    return {
+        f"rsi_{rsi_period}": rsi_from_closes(closes, rsi_period),
+        f"ma_{ma_period}": (sum(closes[-ma_period:]) / ma_period if len(closes) >= ma_period
+                            else float(candles[-1].get("close", 0)) if candles else 0),
+        f"std_{ma_period}": std_from_closes(closes, ma_period),
+    }
+
+
+def calculate_rsi(candles: List[Dict], period: int = 14) -> float:
+    """Calculate RSI from candles."""
+    return rsi_from_closes(closes_from_candles(candles), period)
+
+
+def calculate_ma(candles: List[Dict], period: int = 20) -> float:
+    """Calculate Simple Moving Average."""
+    if len(candles) < period:
+        return float(candles[-1].get("close", 0)) if candles else 0
+    closes = closes_from_candles(candles)[-period:]
+    return sum(closes) / len(closes)
+
+
+def calculate_std(candles: List[Dict], period: int = 20) -> float:
+    """Calculate (population) Standard Deviation."""
+    return std_from_closes(closes_from_candles(candles), period)
+
+
+def rsi_from_closes(closes: List[float], period: int = 14) -> float:
+    """Cutler RSI: simple mean of the last `period` gains/losses (the radars' formula)."""
+    if len(closes) < period + 1:
+        return 50.0
+    gain = loss = 0.0
+    for i in range(len(closes) - period, len(closes)):
+        change = closes[i] - closes[i - 1]
+        if change > 0:
+            gain += change
+        elif change < 0:
+            loss -= change
+    return _rsi(gain / period, loss / period)
+
+
+def std_from_closes(closes: List[float], period: int = 20) -> float:
+    if len(closes) < period:
+        return 0.01
+    window = closes[-period:]
+    ma = sum(window) / period
+    return math.sqrt(sum((c - ma) ** 2 for c in window) / period)
+
+
+def _rsi(avg_gain: float, avg_loss: float) -> float:
+    if avg_loss <= 0:
+        return 100.0 if avg_gain > 0 else 50.0
+    rs = avg_gain / avg_loss
+    return max(0.0, min(100.0, 100 - (100 / (1 + rs))))
+
+
+# ─── Summary statistics ───
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0.0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+# ─── Streaming state ───
+#
+# update(x) commits a closed value; peek(x) answers "what if x were the next
+# close" without changing state, which is how the forming candle is handled.
+
+class RollingSMA:
+    """Simple moving average over a fixed window."""
+
+    __slots__ = ("period", "_window", "_sum")
+
+    def __init__(self, period: int = 20):
+        self.period = period
+        self._window = deque(maxlen=period)
+        self._sum = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return len(self._window) == self.period
+
+    @property
+    def value(self) -> float:
+        return self._sum / len(self._window) if self._window else 0.0
+
+    def update(self, x: float) -> float:
+        if len(self._window) == self.period:
+            self._sum -= self._window[0]
+        self._window.append(x)
+        self._sum += x
+        return self.value
+
+    def peek(self, x: float) -> float:
+        if len(self._window) == self.period:
+            return (self._sum - self._window[0] + x) / self.period
+        return (self._sum + x) / (len(self._window) + 1)
+
+
+class RollingStd:
+    """Population std (and mean) over a fixed window, Welford add/remove updates."""
+
+    __slots__ = ("period", "_window", "_mean", "_m2")
+
+    def __init__(self, period: int = 20):
+        self.period = period
+        self._window = deque(maxlen=period)
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return len(self._window) == self.period
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def value(self) -> float:
+        n = len(self._window)
+        return math.sqrt(max(self._m2, 0.0) / n) if n else 0.0
+
+    def update(self, x: float) -> float:
+        self._mean, self._m2 = self._step(x)
+        self._window.append(x)
+        return self.value
+
+    def peek(self, x: float) -> Tuple[float, float]:
+        """(mean, std) if x were appended."""
+        mean, m2 = self._step(x)
+        n = min(len(self._window) + 1, self.period)
+        return mean, math.sqrt(max(m2, 0.0) / n)
+
+    def _step(self, x: float) -> Tuple[float, float]:
+        n = len(self._window)
+        if n == self.period:
+            old = self._window[0]
+            delta = x - old
+            mean = self._mean + delta / n
+            return mean, self._m2 + delta * (x - mean + old - self._mean)
+        delta = x - self._mean
+        mean = self._mean + delta / (n + 1)
+        return mean, self._m2 + delta * (x - mean)
+
+
+class RollingRSI:
+    """
+    RSI over the last `period` changes.
+    wilder=False matches the radars' Cutler formula (simple mean of the window);
+    wilder=True is classic Wilder smoothing, seeded with that same simple mean.
+    """
+
+    __slots__ = ("period", "wilder", "_changes", "_gain", "_loss", "_last", "_count", "_seeded")
+
+    def __init__(self, period: int = 14, wilder: bool = False):
+        self.period = period
+        self.wilder = wilder
+        self._changes = deque(maxlen=period)
+        self._gain = 0.0   # window sums, or smoothed averages once Wilder is seeded
+        self._loss = 0.0
+        self._last = None
+        self._count = 0    # closes seen
+        self._seeded = False
+
+    @property
+    def ready(self) -> bool:
+        return self._count >= self.period + 1
+
+    @property
+    def value(self) -> float:
+        if not self.ready:
+            return 50.0
+        if self._seeded:
+            return _rsi(self._gain, self._loss)
+        return _rsi(self._gain / self.period, self._loss / self.period)
+
+    def update(self, x: float) -> float:
+        if self._last is not None:
+            change = x - self._last
+            self._gain, self._loss, self._seeded = self._step(change)
+            if not self._seeded:
+                self._changes.append(change)
+        self._last = x
+        self._count += 1
+        return self.value
+
+    def peek(self, x: float) -> float:
+        if self._last is None or self._count < self.period:
+            return 50.0
+        gain, loss, seeded = self._step(x - self._last)
+        if seeded:
+            return _rsi(gain, loss)
+        return _rsi(gain / self.period, loss / self.period)
+
+    def _step(self, change: float) -> Tuple[float, float, bool]:
+        up = change if change > 0 else 0.0
+        down = -change if change < 0 else 0.0
+        p = self.period
+        if self._seeded:
+            return (self._gain * (p - 1) + up) / p, (self._loss * (p - 1) + down) / p, True
+        gain, loss = self._gain + up, self._loss + down
+        if len(self._changes) == p:
+            old = self._changes[0]
+            if old > 0:
+                gain -= old
+            elif old < 0:
+                loss += old
+        if self.wilder and self._count >= p:
+            # This change completes the first window: switch to averages
+            return gain / p, loss / p, True
+        return gain, loss, False
+
+
+class BollingerBands:
+    """(middle, upper, lower) bands at k population std devs."""
+
+    __slots__ = ("k", "_std")
+
+    def __init__(self, period: int = 20, k: float = 2.0):
+        self.k = k
+        self._std = RollingStd(period)
+
+    @property
+    def value(self) -> Tuple[float, float, float]:
+        mid, sd = self._std.mean, self._std.value
+        return mid, mid + self.k * sd, mid - self.k * sd
+
+    def update(self, x: float) -> Tuple[float, float, float]:
+        self._std.update(x)
+        return self.value
+
+    def peek(self, x: float) -> Tuple[float, float, float]:
+        mid, sd = self._std.peek(x)
+        return mid, mid + self.k * sd, mid - self.k * sd
+
+
+class ZScore:
+    """(price - mean) / std over a rolling window of closes."""
+
+    __slots__ = ("_std",)
+
+    def __init__(self, period: int = 20):
+        self._std = RollingStd(period)
+
+    def update(self, x: float) -> float:
+        self._std.update(x)
+        return self.score(x)
+
+    def score(self, price: float) -> float:
+        sd = self._std.value
+        return (price - self._std.mean) / sd if sd > 0 else 0.0
+
+
+class IndicatorState:
+    """
+    Streaming rsi/ma/std for one (product, granularity) series.
+    sync() takes the newest-first candle list the radars already fetch, commits
+    every candle except the newest (once each, by start time) and peeks the newest,
+    so results match compute_indicators() on the same list. With fewer than
+    ma_period closes, ma falls back to the newest close (the legacy helpers
+    returned the oldest one, an artifact of Coinbase's newest-first order).
+    """
+
+    __slots__ = ("rsi_period", "ma_period", "rsi", "std", "last_start", "_seen")
+
+    def __init__(self, rsi_period: int = 14, ma_period: int = 20, wilder: bool = False):
+        self.rsi_period = rsi_period
+        self.ma_period = ma_period
+        self.rsi = RollingRSI(rsi_period, wilder=wilder)
+        self.std = RollingStd(ma_period)
+        self.last_start = -1
+        self._seen = 0
+
+    def update(self, close: float):
+        """Commit one closed candle's close."""
+        self.rsi.update(close)
+        self.std.update(close)
+        self._seen += 1
+
+    def snapshot(self, forming_close: Optional[float] = None) -> Dict[str, float]:
+        """Indicator values, optionally including a provisional close."""
+        if forming_close is None:
+            rsi, (ma, std), n = self.rsi.value, (self.std.mean, self.std.value), self._seen
+        else:
+            rsi, (ma, std), n = self.rsi.peek(forming_close), self.std.peek(forming_close), self._seen + 1
+        if n < self.ma_period:
+            ma = forming_close if forming_close is not None else ma
+            std = 0.01
+        return {f"rsi_{self.rsi_period}": rsi, f"ma_{self.ma_period}": ma, f"std_{self.ma_period}": std}
+
+    def sync(self, candles: List[Dict]) -> Dict[str, float]:
+        """Fold new candles in (O(new candles)) and return the current snapshot."""
+        if not candles:
+            return self.snapshot()
+        if int(candles[0].get("start", 0)) < int(candles[-1].get("start", 0)):
+            candles = sorted(candles, key=lambda c: int(c.get("start", 0)), reverse=True)
+        newest = candles[0]
+        if int(newest.get("start", 0)) <= self.last_start:
+            return self.snapshot()
+        
+        # Walk back from the newest only as far as the last committed candle
+        fresh = []
+        for candle in candles[1:]:
+            start = int(candle.get("start", 0))
+            if start <= self.last_start:
+                break
+            fresh.append((start, float(candle.get("close", 0))))
+        for start, close in reversed(fresh):
+            self.update(close)
+            self.last_start = start
+        return self.snapshot(float(newest.get("close", 0)))
+
+
+# ─── Vectorized batch path (NumPy) ───
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Batch indicators require numpy (pip install numpy)")
+
+
+def rolling_mean(x, period: int = 20):
+    """SMA for every full window along the last axis (length n - period + 1)."""
+    _require_numpy()
+    x = np.asarray(x, dtype=np.float64)
+    c = np.cumsum(x, axis=-1)
+    c = np.concatenate([np.zeros(x.shape[:-1] + (1,)), c], axis=-1)
+    return (c[..., period:] - c[..., :-period]) / period
+
+
+def rolling_std(x, period: int = 20):
+    """Population std for every full window along the last axis."""
+    _require_numpy()
+    x = np.asarray(x, dtype=np.float64)
+    windows = np.lib.stride_tricks.sliding_window_view(x, period, axis=-1)
+    return windows.std(axis=-1)
+
+
+def rolling_rsi(x, period: int = 14, wilder: bool = False):
+    """RSI for every point with `period` prior changes (length n - period)."""
+    _require_numpy()
+    x = np.asarray(x, dtype=np.float64)
+    changes = np.diff(x, axis=-1)
+    gains = np.clip(changes, 0, None)
+    losses = np.clip(-changes, 0, None)
+    if wilder:
+        avg_gain = np.empty(gains.shape[:-1] + (gains.shape[-1] - period + 1,))
+        avg_loss = np.empty_like(avg_gain)
+        avg_gain[..., 0] = gains[..., :period].mean(axis=-1)
+        avg_loss[..., 0] = losses[..., :period].mean(axis=-1)
+        for i in range(1, avg_gain.shape[-1]):
+            avg_gain[..., i] = (avg_gain[..., i - 1] * (period - 1) + gains[..., period + i - 1]) / period
+            avg_loss[..., i] = (avg_loss[..., i - 1] * (period - 1) + losses[..., period + i - 1]) / period
+    else:
+        avg_gain = rolling_mean(gains, period)
+        avg_loss = rolling_mean(losses, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    rsi = np.where(avg_loss <= 0, np.where(avg_gain > 0, 100.0, 50.0), rsi)
+    return np.clip(rsi, 0, 100)
@@ -3,15 +3,71 @@
 Trade Journal Module
 Logging, forensics, and performance analytics.
 The consequence loop lives here.
+
+Storage: append-only JSONL segments are the source of truth. New records go
+to data/trades.jsonl (the active segment) through a group-commit
+JournalWriter (open handle, buffered/flush/fsync durability). It is rolled
+daily and/or by size into data/trades/<day>.<n>.jsonl, and each sealed
+segment gets an entry in data/trades/segments.json (min/max timestamp,
+record counts by type and outcome) so query() can skip whole segments.
+
+In memory the journal keeps only light per-row columns (byte offset, indexed
+fields, timestamp, pnl, p_bayesian) plus secondary indexes field -> value ->
+row numbers; full records are read back by offset and kept in a bounded LRU.
+Loading is lazy (first query or write). With numpy installed the columns are
+periodically compacted into data/trades.npz, so startup only parses the
+JSONL written since the last compaction. Performance stats are kept by
+trade_stats.RunningStats accumulators fed as each CLOSE row is added.
 """
 
 import json
 import math
+import os
 import time
+from bisect import bisect_right
+from collections import Counter, OrderedDict
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime, timezone
 
+try:
+    import numpy as np  # Optional: columnar compaction
+except ImportError:
+    np = None
+
+from journal_writer import JournalWriter
+from trade_stats import RunningStats
+
+
+# Fields with a secondary index (value -> row numbers)
+INDEXED_FIELDS = ("type", "category", "event_type", "outcome", "hour_tier", "product_id")
+
+# Index key for absent / null fields (survives numpy's trailing-NUL stripping)
+MISSING = "\x1e"
+
+# Per-segment value counts kept in the manifest (lets query() skip segments)
+SEGMENT_COUNTS = ("type", "outcome")
+
+COLUMNS_VERSION = 2
+MANIFEST_VERSION = 1
+ROLL_MODES = ("daily", None)
+
+
+def _key(value) -> str:
+    """Index key for a field value."""
+    if value is None:
+        return MISSING
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _iso(when) -> Optional[str]:
+    """Query bound -> ISO string comparable with record timestamps (naive datetimes are UTC)."""
+    if when is None or isinstance(when, str):
+        return when
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.astimezone(timezone.utc).isoformat()
+
 
 class TradeJournal:
     """
@@ -19,172 +75,474 @@ class TradeJournal:
     This is the memory that prevents repeated mistakes.
     """
 
-    def __init__(self, journal_path: str = "data/trades.jsonl"):
+    def __init__(self, journal_path: str = "data/trades.jsonl",
+                 cache_size: int = 10_000, compact_every: int = 50_000,
+                 windows: Optional[Dict[str, RunningStats]] = None,
+                 durability: str = "flush", max_delay: float = 0.05,
+                 roll: Optional[str] = "daily", max_segment_bytes: Optional[int] = 64 << 20):
+        if roll not in ROLL_MODES:
+            raise ValueError(f"roll must be one of {ROLL_MODES}")
         self.path = Path(journal_path)
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.trades: List[Dict] = []
-        self._load()
+        self.columns_path = self.path.with_suffix(".npz")
+        self.segments_dir = self.path.with_suffix("")
+        self.manifest_path = self.segments_dir / "segments.json"
+        self.roll = roll
+        self.max_segment_bytes = max_segment_bytes
+        self.cache_size = cache_size
+        self.compact_every = compact_every
+        self.durability = durability
+        self.max_delay = max_delay
+        self._writer: Optional[JournalWriter] = None
+
+        self._loaded = False
+        self._size = 0                # Bytes of the active segment covered by the columns
+        self._compacted_rows = 0
+        self._segments: List[Dict] = []   # Sealed segment manifest entries, oldest first
+        self._seg_rows: List[int] = []    # First row number of each sealed segment
+        self._active_row = 0              # First row number of the active segment
+        self._offsets: List[int] = []
+        self._lengths: List[int] = []
+        self._cols: Dict[str, list] = {}
+        self._index: Dict[str, Dict[str, List[int]]] = {}
+        self._cache: "OrderedDict[int, Dict]" = OrderedDict()
+        self._stats = RunningStats()
+        # Named windowed stats, e.g. get_stats("last_7d")
+        self.windows = windows if windows is not None else {
+            "last_50": RunningStats(max_trades=50),
+            "last_7d": RunningStats(max_age=7 * 86400),
+        }
+        self._reset()
+
+    def _reset(self):
+        self._size = 0
+        self._compacted_rows = 0
+        self._seg_rows = []
+        self._active_row = 0
+        self._offsets, self._lengths = [], []
+        self._cols = {f: [] for f in INDEXED_FIELDS}
+        self._cols.update(timestamp=[], pnl_usd=[], p_bayesian=[])
+        self._index = {f: {} for f in INDEXED_FIELDS}
+        self._cache.clear()
+        for stats in (self._stats, *self.windows.values()):
+            stats.reset()
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._offsets)
+
+    @property
+    def trades(self) -> List[Dict]:
+        """Every record in order. Materializes the whole journal — prefer the query methods."""
+        self._ensure_loaded()
+        return self._records(range(len(self._offsets)))
+
+    # ─── Loading ───
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        # Opening the writer first repairs a torn trailing line
+        self._writer = JournalWriter(self.path, self.durability, self.max_delay)
+        self._segments = self._load_manifest()
+        known = {m["file"] for m in self._segments}
+        orphans = [p.name for p in sorted(self.segments_dir.glob("*.jsonl")) if p.name not in known]
+        self._segments += [{"file": name} for name in orphans]  # Rolled but not yet in the manifest
+
+        covered, start = 0, 0
+        if np is not None and self.columns_path.exists():
+            covered, start = self._load_columns()
+        files = [self._segment_path(i) for i in range(len(self._segments))] + [self.path]
+        for i in range(covered, len(files)):
+            if len(self._seg_rows) <= i:
+                self._seg_rows.append(len(self._offsets))
+            self._size = self._scan(files[i], start if i == covered else 0)
+        self._active_row = self._seg_rows.pop()
+
+        if orphans:
+            for i, meta in enumerate(self._segments):
+                if "records" not in meta:
+                    meta.update(self._segment_meta(i))
+            self._save_manifest()
+        if np is not None and len(self._offsets) - self._compacted_rows >= self.compact_every:
+            self.compact()
+
+    def _scan(self, path: Path, start: int) -> int:
+        """Index JSONL records of one segment from byte `start`; returns the end offset."""
+        if not path.exists():
+            return start
+        offset = start
+        with open(path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        record = None
+                    if isinstance(record, dict):
+                        self._add_row(record, offset, len(line))
+                offset += len(line)
+        return offset
+
+    def _add_row(self, record: Dict, offset: int, length: int) -> int:
+        row = len(self._offsets)
+        self._offsets.append(offset)
+        self._lengths.append(length)
+        for field in INDEXED_FIELDS:
+            key = _key(record.get(field))
+            self._cols[field].append(key)
+            self._index[field].setdefault(key, []).append(row)
+        self._cols["timestamp"].append(record.get("timestamp") or "")
+        self._cols["pnl_usd"].append(record.get("pnl_usd", 0))
+        p = record.get("p_bayesian")
+        self._cols["p_bayesian"].append(float(p) if isinstance(p, (int, float)) else math.nan)
+        if record.get("type") == "CLOSE":
+            self._update_stats(row)
+        return row
+
+    def _update_stats(self, row: int):
+        """Fold a CLOSE row into the running stats (O(1) per accumulator)."""
+        cols = self._cols
+        hour_tier = cols["hour_tier"][row]
+        args = (cols["pnl_usd"][row], cols["outcome"][row], cols["p_bayesian"][row],
+                None if hour_tier == MISSING else hour_tier, cols["timestamp"][row])
+        self._stats.add(*args)
+        for stats in self.windows.values():
+            stats.add(*args)
+
+    def _load_columns(self) -> Tuple[int, int]:
+        """
+        Restore rows from the .npz snapshot. Returns (segments fully covered, bytes
+        covered of the next one); (0, 0) if the snapshot no longer matches the JSONL.
+        """
+        try:
+            with np.load(self.columns_path) as z:
+                source_bytes = int(z["source_bytes"])
+                names = z["segments"].tolist()
+                covered = len(names)
+                current = [m["file"] for m in self._segments[:covered]]
+                if (int(z["version"]) != COLUMNS_VERSION or names != current
+                        or not self._covers(self._segment_path(covered), source_bytes)):
+                    return 0, 0
+                self._offsets = z["offset"].tolist()
+                self._lengths = z["length"].tolist()
+                self._seg_rows = z["seg_rows"].tolist()
+                for field in INDEXED_FIELDS:
+                    column = z[field]
+                    self._cols[field] = column.tolist()
+                    self._index[field] = _group_rows(column)
+                self._cols["timestamp"] = z["timestamp"].tolist()
+                self._cols["pnl_usd"] = z["pnl_usd"].tolist()
+                self._cols["p_bayesian"] = z["p_bayesian"].tolist()
+        except (OSError, KeyError, ValueError) as e:
+            print(f"⚠️ Ignoring journal columns {self.columns_path}: {e}")
+            self._reset()
+            return 0, 0
+        self._compacted_rows = len(self._offsets)
+        for row in self._index["type"].get("CLOSE", []):
+            self._update_stats(row)
+        return covered, source_bytes
+
+    @staticmethod
+    def _covers(path: Path, source_bytes: int) -> bool:
+        """The snapshot is valid if the segment still has a line boundary where it stopped."""
+        if source_bytes == 0:
+            return True
+        if not path.exists() or path.stat().st_size < source_bytes:
+            return False
+        with open(path, "rb") as f:
+            f.seek(source_bytes - 1)
+            return f.read(1) == b"\n"
+
+    def compact(self) -> bool:
+        """Write the in-memory columns to the .npz snapshot (atomic replace). Needs numpy."""
+        self._ensure_loaded()
+        if np is None:
+            return False
+        self._writer.commit()
+        arrays = {f: np.array(self._cols[f], dtype=str) for f in INDEXED_FIELDS}
+        arrays.update(
+            offset=np.array(self._offsets, dtype=np.int64),
+            length=np.array(self._lengths, dtype=np.int64),
+            timestamp=np.array(self._cols["timestamp"], dtype=str),
+            pnl_usd=np.array(self._cols["pnl_usd"], dtype=np.float64),
+            p_bayesian=np.array(self._cols["p_bayesian"], dtype=np.float64),
+            seg_rows=np.array(self._seg_rows + [self._active_row], dtype=np.int64),
+            segments=np.array([m["file"] for m in self._segments], dtype=str),
+            source_bytes=np.int64(self._size),
+            version=np.int64(COLUMNS_VERSION),
+        )
+        tmp = self.columns_path.with_suffix(".npz.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, self.columns_path)
+        self._compacted_rows = len(self._offsets)
+        return True
+
+    # ─── Record access ───
+
+    def _records(self, rows: Iterable[int]) -> List[Dict]:
+        """Full records for row numbers, via the LRU or by offset from the JSONL."""
+        rows = list(rows)
+        out: Dict[int, Dict] = {}
+        missing = []
+        for row in rows:
+            record = self._cache.get(row)
+            if record is None:
+                missing.append(row)
+            else:
+                self._cache.move_to_end(row)
+                out[row] = record
+        if missing:
+            self._writer.commit()  # Buffered records must be in the file before reading back
+            by_segment: Dict[int, List[int]] = {}
+            for row in sorted(missing):
+                by_segment.setdefault(self._segment_of(row), []).append(row)
+            for segment, seg_rows in by_segment.items():
+                with open(self._segment_path(segment), "rb") as f:
+                    for row in seg_rows:
+                        f.seek(self._offsets[row])
+                        out[row] = self._remember(row, json.loads(f.read(self._lengths[row])))
+        return [out[row] for row in rows]
+
+    def _segment_of(self, row: int) -> int:
+        """Segment number holding a row (len(self._segments) = the active segment)."""
+        if row >= self._active_row:
+            return len(self._segments)
+        return bisect_right(self._seg_rows, row) - 1
+
+    def _segment_path(self, segment: int) -> Path:
+        if segment >= len(self._segments):
+            return self.path
+        return self.segments_dir / self._segments[segment]["file"]
+
+    def _remember(self, row: int, record: Dict) -> Dict:
+        self._cache[row] = record
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return record
+
+    def _rows(self, field: str, value) -> List[int]:
+        """Row numbers where field == value (field must be indexed)."""
+        self._ensure_loaded()
+        return self._index[field].get(_key(value), [])
+
+    def find(self, limit: Optional[int] = None, **criteria) -> List[Dict]:
+        """Records matching every indexed field == value (e.g. type="CLOSE", outcome="loss"), oldest first."""
+        self._ensure_loaded()
+        rows = None
+        for field, value in criteria.items():
+            if field not in self._index:
+                raise ValueError(f"{field!r} is not indexed (indexed: {', '.join(INDEXED_FIELDS)})")
+            if rows is None:
+                rows = self._rows(field, value)
+            else:
+                key, column = _key(value), self._cols[field]
+                rows = [r for r in rows if column[r] == key]
+        rows = range(len(self._offsets)) if rows is None else rows
+        if limit is not None:
+            rows = list(rows)[-limit:] if limit else []
+        return self._records(rows)
 
-    def _load(self):
-        """Load existing trades from disk."""
-        if self.path.exists():
-            with open(self.path) as f:
+    # ─── Segments ───
+
+    def _load_manifest(self) -> List[Dict]:
+        if not self.manifest_path.exists():
+            return []
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                return manifest["segments"]
+            print(f"⚠️ Unknown journal manifest version in {self.manifest_path}, rebuilding")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Unreadable journal manifest {self.manifest_path}: {e}, rebuilding")
+        return []
+
+    def _save_manifest(self):
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "segments": self._segments}, f, indent=1)
+        os.replace(tmp, self.manifest_path)
+
+    def _segment_meta(self, segment: int) -> Dict:
+        """Manifest entry fields for a segment, from the in-memory columns."""
+        bounds = self._seg_rows + [self._active_row, len(self._offsets)]
+        lo, hi = bounds[segment], bounds[segment + 1]
+        path = self._segment_path(segment)
+        stamps = [t for t in self._cols["timestamp"][lo:hi] if t]
+        return {
+            "min_ts": min(stamps, default=""),
+            "max_ts": max(stamps, default=""),
+            "records": hi - lo,
+            "bytes": path.stat().st_size if path.exists() else 0,
+            "counts": {f: dict(Counter(self._cols[f][lo:hi])) for f in SEGMENT_COUNTS},
+        }
+
+    def _should_roll(self, record: Dict, incoming: int) -> bool:
+        if self._active_row == len(self._offsets):
+            return False  # Nothing in the active segment yet
+        if self.max_segment_bytes and self._size + incoming > self.max_segment_bytes:
+            return True
+        if self.roll == "daily":
+            first_day = self._cols["timestamp"][self._active_row][:10]
+            day = str(record.get("timestamp") or "")[:10]
+            return bool(first_day) and bool(day) and day != first_day
+        return False
+
+    def rotate(self) -> Optional[str]:
+        """Seal the active segment into the segments dir. Returns the segment file name."""
+        self._ensure_loaded()
+        if self._active_row == len(self._offsets):
+            return None
+        self._writer.close()
+        meta = self._segment_meta(len(self._segments))
+        day = meta["min_ts"][:10] or datetime.now(timezone.utc).date().isoformat()
+        seq = sum(1 for m in self._segments if m["file"].startswith(f"{day}."))
+        name = f"{day}.{seq:03d}.jsonl"
+
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+        os.replace(self.path, self.segments_dir / name)
+        self._segments.append({"file": name, **meta})
+        self._seg_rows.append(self._active_row)
+        self._active_row = len(self._offsets)
+        self._size = 0
+        self._save_manifest()
+        self._writer = JournalWriter(self.path, self.durability, self.max_delay)
+        print(f"🗂️ Journal segment sealed: {name} ({meta['records']} records)")
+        return name
+
+    def segments(self) -> List[Dict]:
+        """Manifest entries for sealed segments plus a live entry for the active one."""
+        self._ensure_loaded()
+        active = {"file": self.path.name, "active": True, **self._segment_meta(len(self._segments))}
+        return [dict(m) for m in self._segments] + [active]
+
+    def query(self, start=None, end=None, **filters) -> Iterator[Dict]:
+        """
+        Stream records with start <= timestamp < end (datetimes or ISO strings, either
+        bound optional) and record[field] == value for every filter, oldest first.
+        Segments outside the time range, or whose counts rule a filter out, are not read.
+        Memory use is one record at a time.
+        """
+        self._ensure_loaded()
+        self._writer.commit()
+        start, end = _iso(start), _iso(end)
+        for segment in range(len(self._segments) + 1):
+            if segment < len(self._segments) and not _segment_may_match(self._segments[segment], start, end, filters):
+                continue
+            path = self._segment_path(segment)
+            if not path.exists():
+                continue
+            with open(path, "rb") as f:
                 for line in f:
-                    line = line.strip()
-                    if line:
-                        try:
-                            self.trades.append(json.loads(line))
-                        except json.JSONDecodeError:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if not isinstance(record, dict):
+                        continue
+                    if start is not None or end is not None:
+                        ts = record.get("timestamp") or ""
+                        if not ts or (start is not None and ts < start) or (end is not None and ts >= end):
                             continue
+                    if all(record.get(field) == value for field, value in filters.items()):
+                        yield record
+
+    # ─── Writing ───
 
-    def _append(self, record: Dict):
-        """Append a record to the journal file."""
-        with open(self.path, "a") as f:
-            f.write(json.dumps(record) + "\n")
+    def _append(self, record: Dict, durability: Optional[str] = None):
+        """Append a record to the journal file (durability: buffered / flush / fsync)."""
+        self._ensure_loaded()
+        data = (json.dumps(record) + "\n").encode()
+        if self._should_roll(record, len(data)):
+            self.rotate()
+        offset = self._writer.write(data, durability)
+        row = self._add_row(record, offset, len(data))
+        self._size = offset + len(data)
+        self._remember(row, record)
+        if np is not None and len(self._offsets) - self._compacted_rows >= self.compact_every:
+            self.compact()
 
-    def log_entry(self, trade: Dict):
+    def log_entry(self, trade: Dict, durability: Optional[str] = None):
         """Log a trade entry."""
         record = {
             "type": "ENTRY",
             "timestamp": datetime.now(timezone.utc).isoformat(),
             **trade
         }
-        self.trades.append(record)
-        self._append(record)
+        self._append(record, durability)
 
-    def log_close(self, trade: Dict):
+    def log_close(self, trade: Dict, durability: Optional[str] = None):
         """Log a trade close with full forensics."""
         record = {
             "type": "CLOSE",
             "timestamp": datetime.now(timezone.utc).isoformat(),
             **trade
         }
-        self.trades.append(record)
-        self._append(record)
+        self._append(record, durability)
+
+    def flush(self, sync: bool = False):
+        """Commit buffered records (fsync too if sync)."""
+        if self._writer is not None:
+            self._writer.commit(sync)
+
+    def close(self):
+        """Flush and close the journal file."""
+        if self._writer is not None:
+            self._writer.close()
+
+    # ─── Queries ───
 
     def get_recent_trades(self, n: int = 10) -> List[Dict]:
         """Get last N closed trades."""
-        closed = [t for t in self.trades if t.get("type") == "CLOSE"]
-        return closed[-n:]
+        closed = self._rows("type", "CLOSE")
+        return self._records(closed[-n:])
 
     def get_similar_trades(self, category: str, event_type: str) -> List[Dict]:
         """Find trades in similar markets."""
-        return [
-            t for t in self.trades
-            if t.get("type") == "CLOSE"
-            and (t.get("category") == category or t.get("event_type") == event_type)
-        ]
+        rows = set(self._rows("category", category)) | set(self._rows("event_type", event_type))
+        types = self._cols["type"]
+        return self._records(sorted(r for r in rows if types[r] == "CLOSE"))
 
-    def get_stats(self) -> Dict:
-        """Calculate comprehensive trading statistics."""
-        closed = [t for t in self.trades if t.get("type") == "CLOSE"]
-        
-        if not closed:
-            return {
-                "total_trades": 0,
-                "win_rate": 0,
-                "sharpe": 0,
-                "brier_score": 0.25,
-                "max_drawdown": 0,
-                "total_pnl": 0,
-                "avg_win": 0,
-                "avg_loss": 0,
-                "profit_factor": 0
-            }
-        
-        wins = [t for t in closed if t.get("outcome") == "win"]
-        losses = [t for t in closed if t.get("outcome") == "loss"]
-        
-        total = len(closed)
-        win_rate = len(wins) / total if total > 0 else 0
-        
-        # P&L
-        pnls = [t.get("pnl_usd", 0) for t in closed]
-        total_pnl = sum(pnls)
-        
-        avg_win = sum(t.get("pnl_usd", 0) for t in wins) / len(wins) if wins else 0
-        avg_loss = sum(t.get("pnl_usd", 0) for t in losses) / len(losses) if losses else 0
-        
-        gross_profit = sum(t.get("pnl_usd", 0) for t in wins)
-        gross_loss = abs(sum(t.get("pnl_usd", 0) for t in losses))
-        profit_factor = gross_profit / gross_loss if gross_loss > 0 else float('inf')
-        
-        # Sharpe ratio (annualized)
-        if len(pnls) > 1:
-            mean_pnl = sum(pnls) / len(pnls)
-            std_pnl = math.sqrt(sum((p - mean_pnl) ** 2 for p in pnls) / (len(pnls) - 1))
-            sharpe = (mean_pnl / std_pnl) * math.sqrt(365) if std_pnl > 0 else 0
-        else:
-            sharpe = 0
-        
-        # Max drawdown
-        running = 0
-        peak = 0
-        max_dd = 0
-        for p in pnls:
-            running += p
-            peak = max(peak, running)
-            dd = (peak - running) / peak if peak > 0 else 0
-            max_dd = max(max_dd, dd)
-        
-        # Brier score (if probability data available)
-        predictions = [(t.get("p_bayesian", 0.5), 1.0 if t["outcome"] == "win" else 0.0)
-                       for t in closed if "p_bayesian" in t]
-        brier = sum((p - a) ** 2 for p, a in predictions) / len(predictions) if predictions else 0.25
-        
-        # Win rate by hour tier
-        tier_stats = {}
-        for tier in ["winning", "learning"]:
-            tier_trades = [t for t in closed if t.get("hour_tier") == tier]
-            if tier_trades:
-                tier_wins = sum(1 for t in tier_trades if t["outcome"] == "win")
-                tier_stats[tier] = {
-                    "trades": len(tier_trades),
-                    "win_rate": tier_wins / len(tier_trades),
-                    "pnl": sum(t.get("pnl_usd", 0) for t in tier_trades)
-                }
-        
-        return {
-            "total_trades": total,
-            "wins": len(wins),
-            "losses": len(losses),
-            "win_rate": win_rate,
-            "total_pnl": total_pnl,
-            "avg_win": avg_win,
-            "avg_loss": avg_loss,
-            "profit_factor": profit_factor,
-            "sharpe": sharpe,
-            "max_drawdown": max_dd,
-            "brier_score": brier,
-            "tier_stats": tier_stats
-        }
+    def get_stats(self, window: Optional[str] = None) -> Dict:
+        """
+        Comprehensive trading statistics, from running accumulators (O(1)).
+        window: name of a windowed accumulator (e.g. "last_50", "last_7d"); None = all trades.
+        """
+        self._ensure_loaded()
+        stats = self._stats if window is None else self.windows[window]
+        return stats.to_dict()
 
     def get_consequence_context(self, market_category: str = "") -> str:
         """
         Generate consequence context for the conscience layer.
         This is loaded BEFORE every trade decision to make past failures visible.
-        
+
         Per LaylaEleira: "Make the cost of past failures visible before the next output."
         """
         closed = self.get_recent_trades(20)
         if not closed:
             return "No trade history yet. First trades — extra caution."
-        
+
         losses = [t for t in closed if t.get("outcome") == "loss"]
-        
+
         if not losses:
             return f"Last {len(closed)} trades: all wins. Stay disciplined."
-        
+
         context_lines = [
             f"⚠️ CONSEQUENCE CONTEXT ({len(losses)}/{len(closed)} recent losses):"
         ]
-        
+
         for loss in losses[-3:]:  # Show last 3 losses
             context_lines.append(
                 f"  • Lost ${abs(loss.get('pnl_usd', 0)):.2f} on {loss.get('market', '?')} "
                 f"(dissonance={loss.get('dissonance', '?')}, {loss.get('hour_tier', '?')} hour)"
             )
-        
+
         # Similar market warning
         if market_category:
             similar_losses = [
@@ -195,21 +553,45 @@ class TradeJournal:
                 context_lines.append(
                     f"  ⚠️ {len(similar_losses)} losses in similar '{market_category}' markets recently"
                 )
-        
+
         return "\n".join(context_lines)
 
-    def export_csv(self, path: str = "data/trades_export.csv"):
-        """Export trades to CSV for analysis."""
+    def export_csv(self, path: str = "data/trades_export.csv", start=None, end=None):
+        """Export closed trades to CSV for analysis, streaming (constant memory)."""
         import csv
-        closed = [t for t in self.trades if t.get("type") == "CLOSE"]
-        if not closed:
-            return
-        
+
         fields = ["trade_id", "market", "side", "entry_price", "exit_price",
                    "size_usd", "pnl_usd", "pnl_pct", "outcome", "hour_tier",
                    "regime", "p_bayesian", "conviction", "timestamp", "closed_at"]
-        
-        with open(path, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
-            writer.writeheader()
-            writer.writerows(closed)
+
+        f = writer = None
+        try:
+            for record in self.query(start, end, type="CLOSE"):
+                if writer is None:
+                    f = open(path, "w", newline="")
+                    writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+                    writer.writeheader()
+                writer.writerow(record)
+        finally:
+            if f is not None:
+                f.close()
+
+
+def _segment_may_match(meta: Dict, start: Optional[str], end: Optional[str], filters: Dict) -> bool:
+    """Can a sealed segment hold matches, judging by its manifest entry?"""
+    if start is not None and meta.get("max_ts") and meta["max_ts"] < start:
+        return False
+    if end is not None and meta.get("min_ts") and meta["min_ts"] >= end:
+        return False
+    counts = meta.get("counts", {})
+    return all(_key(value) in counts[field] for field, value in filters.items() if field in counts)
+
+
+def _group_rows(column) -> Dict[str, List[int]]:
+    """value -> ascending row numbers for a numpy string column, without a Python loop per row."""
+    if len(column) == 0:
+        return {}
+    values, inverse = np.unique(column, return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.cumsum(np.bincount(inverse))[:-1]
+    return {value: rows.tolist() for value, rows in zip(values.tolist(), np.split(order, bounds))}
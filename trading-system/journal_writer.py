@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Journal Writer
+Append-only JSONL writer with group commit and per-record durability.
+
+The file handle stays open. Each write picks a durability level:
+- "buffered": returns immediately; the record reaches the OS within
+  `max_delay` (background flusher) or once `max_buffer` bytes are queued.
+- "flush":    returns once the record is written to the OS (survives a
+  process crash, not a power loss). Same guarantee as the old open/append.
+- "fsync":    returns once the record is fsynced to disk.
+Writes to the OS are cheap and happen under the lock. fsyncs are group
+committed: the first fsync writer becomes the leader and fsyncs everything
+written so far, writers arriving meanwhile wait and share the next fsync.
+`commit_delay` lets the leader wait briefly to gather a bigger group.
+
+On open, a torn trailing line (crash mid-write) is repaired: a fragment that
+still parses gets its newline back, otherwise it is cut off and saved to
+<path>.torn for forensics.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+DURABILITY_LEVELS = ("buffered", "flush", "fsync")
+
+
+def repair_torn_tail(path: Path) -> int:
+    """Fix an unterminated last line. Returns the number of bytes removed."""
+    if not path.exists():
+        return 0
+    with open(path, "r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return 0
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return 0
+
+        # Find the start of the last line
+        pos = size
+        while pos > 0:
+            step = min(65536, pos)
+            f.seek(pos - step)
+            chunk = f.read(step)
+            nl = chunk.rfind(b"\n")
+            if nl >= 0:
+                pos = pos - step + nl + 1
+                break
+            pos -= step
+        f.seek(pos)
+        tail = f.read()
+
+        try:
+            json.loads(tail)
+            f.seek(0, os.SEEK_END)
+            f.write(b"\n")
+            print(f"🩹 Journal {path}: restored newline after last record")
+            return 0
+        except ValueError:
+            pass
+
+        with open(f"{path}.torn", "ab") as torn:
+            torn.write(tail + b"\n")
+        f.truncate(pos)
+        print(f"🩹 Journal {path}: cut {len(tail)}-byte torn line (saved to {path}.torn)")
+        return len(tail)
+
+
+class JournalWriter:
+    """Group-committing append writer for a JSONL journal."""
+
+    def __init__(self, path, durability: str = "flush", max_delay: float = 0.05,
+                 max_buffer: int = 1 << 20, commit_delay: float = 0.0):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"durability must be one of {DURABILITY_LEVELS}")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.durability = durability
+        self.max_delay = max_delay
+        self.max_buffer = max_buffer
+        self.commit_delay = commit_delay
+
+        repair_torn_tail(self.path)
+        self._file = open(self.path, "ab")
+        self.size = self._file.tell()         # Bytes accepted so far (incl. queued)
+
+        self._buf: List[bytes] = []
+        self._buf_bytes = 0
+        self._buf_since = 0.0
+        self._seq = 0                          # Last accepted record
+        self._flushed = 0                      # Last record handed to the OS
+        self._synced = 0                       # Last record fsynced
+        self._committing = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self.stats = {"records": 0, "commits": 0, "fsyncs": 0, "bytes": 0}
+
+        self._flusher = threading.Thread(target=self._run_flusher, name="journal-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def write(self, data: bytes, durability: str = None) -> int:
+        """Append one encoded line; returns its byte offset once `durability` is met."""
+        durability = durability or self.durability
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"durability must be one of {DURABILITY_LEVELS}")
+        with self._cond:
+            if self._closed:
+                raise ValueError(f"journal writer for {self.path} is closed")
+            offset = self.size
+            self.size += len(data)
+            if not self._buf:
+                self._buf_since = time.monotonic()
+            self._buf.append(data)
+            self._buf_bytes += len(data)
+            self._seq += 1
+            seq = self._seq
+            self.stats["records"] += 1
+            if durability == "buffered":
+                if self._buf_bytes >= self.max_buffer:
+                    self._cond.notify_all()
+                return offset
+            if durability == "flush":
+                self._write_out()
+                return offset
+        self._commit(seq, sync=True)
+        return offset
+
+    def commit(self, sync: bool = False):
+        """Make everything written so far durable to at least flush (or fsync) level."""
+        with self._cond:
+            seq = self._seq
+        self._commit(seq, sync)
+
+    def _write_out(self):
+        """Hand the queued records to the OS in one write (caller holds the lock)."""
+        if not self._buf:
+            return
+        data = b"".join(self._buf)
+        self._file.write(data)
+        self._file.flush()
+        self._buf, self._buf_bytes = [], 0
+        self._flushed = self._seq
+        self.stats["commits"] += 1
+        self.stats["bytes"] += len(data)
+
+    def _commit(self, seq: int, sync: bool):
+        with self._cond:
+            if self._flushed < seq:
+                self._write_out()
+            if not sync:
+                return
+            # Group commit: one leader fsyncs for everyone queued behind it
+            while self._committing and self._synced < seq:
+                self._cond.wait()
+            if self._synced >= seq:
+                return
+            self._committing = True
+
+        synced = False
+        try:
+            if self.commit_delay:
+                time.sleep(self.commit_delay)
+            with self._cond:
+                self._write_out()
+                upto = self._flushed
+            os.fsync(self._file.fileno())
+            synced = True
+        finally:
+            with self._cond:
+                self._committing = False
+                if synced:
+                    self._synced = max(self._synced, upto)
+                    self.stats["fsyncs"] += 1
+                self._cond.notify_all()
+
+    def _run_flusher(self):
+        """Hand buffered records to the OS within max_delay."""
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+                if not self._buf:
+                    self._cond.wait(self.max_delay)
+                    continue
+                due = self._buf_since + self.max_delay - time.monotonic()
+                if due > 0 and self._buf_bytes < self.max_buffer:
+                    self._cond.wait(due)
+                    continue
+            self.commit()
+
+    def close(self):
+        """Flush anything buffered and close the file."""
+        with self._cond:
+            if self._closed:
+                return
+        self.commit()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._file.close()
+        atexit.unregister(self.close)
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return dict(self.stats, pending=self._seq - self._flushed,
+                        records_per_commit=self.stats["records"] / max(self.stats["commits"], 1),
+                        records_per_fsync=self.stats["records"] / max(self.stats["fsyncs"], 1))
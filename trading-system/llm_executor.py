@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+LLM Executor
+One long-lived executor for LM Studio chat calls, shared by all scouts.
+
+Requests run on a background asyncio loop over a single pooled aiohttp
+session (keep-alive to the LM Studio host), bounded by a semaphore since a
+local model serves only a couple of generations at a time. Every call carries
+a deadline that covers queueing plus inference; when it expires the request
+task is cancelled, which aborts the HTTP exchange instead of leaving a
+thread blocked on it. Without aiohttp it falls back to a persistent thread
+pool over a pooled requests.Session (deadline enforced on the caller side,
+queued calls are dropped, a running one is bounded by its read timeout).
+
+Metrics: queue wait, inference latency (p50/p99), timeouts and errors.
+
+    llm = get_llm_executor("http://localhost:1234")
+    text = llm.chat("gemma-2-2b-it", prompt, max_tokens=10, deadline=5.0)
+"""
+
+import asyncio
+import atexit
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Optional
+
+import requests
+
+from indicators import percentile
+
+try:
+    import aiohttp  # Optional: cancellable requests; thread-pool fallback otherwise
+except ImportError:
+    aiohttp = None
+
+SAMPLE_WINDOW = 1000  # Latency samples kept for percentiles
+
+
+class LLMExecutor:
+    """Shared, deadline-bounded chat-completions executor for one LM Studio endpoint."""
+
+    def __init__(self, base_url: str, max_concurrency: int = 2, connect_timeout: float = 2.0):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.connect_timeout = connect_timeout
+        self.mode = "asyncio" if aiohttp is not None else "threads"
+        self.stats = {"submitted": 0, "completed": 0, "timeouts": 0, "errors": 0, "in_flight": 0}
+        self._queue_waits: deque = deque(maxlen=SAMPLE_WINDOW)
+        self._latencies: deque = deque(maxlen=SAMPLE_WINDOW)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._semaphore = None
+        self._pool = None
+        self._closed = False
+        atexit.register(self.close)
+
+    # ─── Lifecycle ───
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"LLM executor for {self.base_url} is closed")
+            if self.mode == "threads":
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm")
+                    self._session = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.max_concurrency)
+                    self._session.mount("http://", adapter)
+                    self._session.mount("https://", adapter)
+            elif self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="llm-loop", daemon=True)
+                self._thread.start()
+
+    def _ensure_session(self):
+        """Create the pooled session lazily (runs inside the executor loop)."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    def close(self):
+        """Release the session and stop the loop/pool; calls still queued are dropped."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._loop is not None:
+            if self._session is not None:
+                asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result(timeout=2)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=2)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._session.close()
+        atexit.unregister(self.close)
+
+    # ─── Calls ───
+
+    def submit(self, model: str, prompt: str, max_tokens: int = 100, temperature: float = 0.3,
+               deadline: float = 5.0) -> Future:
+        """Queue one chat call; the Future resolves to the reply text or raises FutureTimeout."""
+        self._ensure_started()
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        with self._lock:
+            self.stats["submitted"] += 1
+        submitted = time.monotonic()
+        if self.mode == "asyncio":
+            return asyncio.run_coroutine_threadsafe(self._call_async(payload, submitted, deadline), self._loop)
+        return self._pool.submit(self._call_sync, payload, submitted, deadline)
+
+    def chat(self, model: str, prompt: str, max_tokens: int = 100, temperature: float = 0.3,
+             deadline: float = 5.0) -> str:
+        """Blocking chat call; raises FutureTimeout once `deadline` seconds have passed."""
+        future = self.submit(model, prompt, max_tokens, temperature, deadline)
+        try:
+            # The loop enforces the deadline itself; the slack only guards a stalled loop
+            return future.result(timeout=deadline + (1.0 if self.mode == "asyncio" else 0.0))
+        except FutureTimeout:
+            if future.cancel():
+                self._record(timeout=True)
+            raise
+
+    async def chat_async(self, model: str, prompt: str, max_tokens: int = 100, temperature: float = 0.3,
+                         deadline: float = 5.0) -> str:
+        """chat() for callers on another event loop."""
+        return await asyncio.wrap_future(self.submit(model, prompt, max_tokens, temperature, deadline))
+
+    async def _call_async(self, payload: Dict, submitted: float, deadline: float) -> str:
+        session = self._ensure_session()
+        started = None
+
+        async def call():
+            nonlocal started
+            async with self._semaphore:
+                started = time.monotonic()
+                self._record(queue_wait=started - submitted, in_flight=+1)
+                try:
+                    async with session.post(f"{self.base_url}/v1/chat/completions", json=payload,
+                                            timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout)) as resp:
+                        resp.raise_for_status()
+                        body = await resp.json(content_type=None)
+                finally:
+                    self._record(in_flight=-1)
+                return body["choices"][0]["message"]["content"]
+
+        try:
+            content = await asyncio.wait_for(call(), timeout=deadline - (time.monotonic() - submitted))
+        except asyncio.TimeoutError:
+            self._record(timeout=True, latency=None if started is None else time.monotonic() - started)
+            raise FutureTimeout(f"LLM call exceeded {deadline:g}s") from None
+        except Exception:
+            self._record(error=True)
+            raise
+        self._record(latency=time.monotonic() - started)
+        return content
+
+    def _call_sync(self, payload: Dict, submitted: float, deadline: float) -> str:
+        started = time.monotonic()
+        remaining = deadline - (started - submitted)
+        self._record(queue_wait=started - submitted)
+        if remaining <= 0:
+            self._record(timeout=True)
+            raise FutureTimeout(f"LLM call queued past its {deadline:g}s deadline")
+        self._record(in_flight=+1)
+        try:
+            resp = self._session.post(f"{self.base_url}/v1/chat/completions", json=payload,
+                                      timeout=(self.connect_timeout, remaining))
+            resp.raise_for_status()
+            content = resp.json()["choices"][0]["message"]["content"]
+        except requests.Timeout:
+            self._record(timeout=True, latency=time.monotonic() - started)
+            raise FutureTimeout(f"LLM call exceeded {deadline:g}s") from None
+        except Exception:
+            self._record(error=True)
+            raise
+        finally:
+            self._record(in_flight=-1)
+        self._record(latency=time.monotonic() - started)
+        return content
+
+    # ─── Metrics ───
+
+    def _record(self, queue_wait: Optional[float] = None, latency: Optional[float] = None,
+                timeout: bool = False, error: bool = False, in_flight: int = 0):
+        with self._lock:
+            if queue_wait is not None:
+                self._queue_waits.append(queue_wait)
+            if latency is not None:
+                self._latencies.append(latency)
+                if not timeout:
+                    self.stats["completed"] += 1
+            self.stats["timeouts"] += timeout
+            self.stats["errors"] += error
+            self.stats["in_flight"] += in_flight
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            waits = sorted(self._queue_waits)
+            latencies = sorted(self._latencies)
+            stats = dict(self.stats, mode=self.mode)
+        stats["queue_wait_p50_ms"] = percentile(waits, 50) * 1000
+        stats["queue_wait_p99_ms"] = percentile(waits, 99) * 1000
+        stats["latency_p50_ms"] = percentile(latencies, 50) * 1000
+        stats["latency_p99_ms"] = percentile(latencies, 99) * 1000
+        return stats
+
+
+# ─── Shared instances ───
+
+_executors: Dict[str, LLMExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_llm_executor(base_url: str, max_concurrency: int = 2) -> LLMExecutor:
+    """Process-wide executor per LM Studio endpoint (created on first use)."""
+    key = base_url.rstrip("/")
+    with _executors_lock:
+        executor = _executors.get(key)
+        if executor is None or executor._closed:
+            executor = _executors[key] = LLMExecutor(key, max_concurrency)
+        return executor
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Market Data Cache
+Process-wide cache in front of CoinbaseClient so the radar, the scouts and
+the healthcheck never refetch the same market data.
+
+Drop-in for the client's market-data surface (analyze_ticker,
+get_products_snapshot, get_product, get_product_book, get_candles,
+get_recent_candles); anything else passes through to the client. Each field
+has its own TTL:
+- "book":     ~1s   (top of book moves constantly)
+- "metadata": ~60s  (product snapshot / volume_24h)
+- "candles":  forever for fully closed ranges; "forming" TTL while the
+  range still includes the current candle. Forming ranges are keyed on the
+  candle they reach into, not their `end` (usually "now"), so repeat
+  requests within a candle share one entry. get_recent_candles goes through
+  a shared CandleStore, which keeps closed candles and delta-fetches.
+
+Fetches are single-flight: concurrent misses on one key share one request,
+whether the callers are threads or coroutines (the `aio` view gives the
+AsyncCoinbaseClient-shaped async surface over the same entries). Errors are
+not cached as values; a failed refresh serves the last good value for up to
+STALE_FACTOR x TTL and counts it as stale. A failure also backs the key off
+for one TTL: callers get the stale value (or the failure) without a refetch,
+so an endpoint that is down isn't hammered once per caller. Entries past that window are
+swept every SWEEP_EVERY writes, so dead keys don't crowd the LRU.
+
+    market = get_market_cache(client)          # same instance for the same client
+    ticker = market.analyze_ticker("BTC-USD")
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+from candle_store import CandleStore
+from coinbase_client import GRANULARITY_SECONDS, format_ticker
+
+DEFAULT_TTLS = {"book": 1.0, "metadata": 60.0, "forming": 1.0, "candles": None}  # None = forever
+STALE_FACTOR = 5.0        # Serve a stale value this many TTLs past expiry if the refresh fails
+MAX_ENTRIES = 10_000      # Per field, LRU
+SWEEP_EVERY = 1_000       # Writes between sweeps of entries too old to serve even stale
+
+
+def _usable(value) -> bool:
+    """Only successful responses are cached (an empty candle list may be an error too)."""
+    if isinstance(value, dict):
+        return "error" not in value
+    if isinstance(value, list):
+        return bool(value)
+    return value is not None
+
+
+class MarketDataCache:
+    """Per-field TTL cache with single-flight fetches over a CoinbaseClient."""
+
+    FIELDS = ("book", "metadata", "candles")
+
+    def __init__(self, client, async_client=None, ttls: Optional[Dict[str, Optional[float]]] = None,
+                 candle_dir: Optional[str] = None):
+        self.client = client
+        self.async_client = async_client
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.book_source = getattr(client, "book_source", None)  # e.g. MarketDataFeed; cached REST otherwise
+        self.candles = CandleStore(self, cache_dir=candle_dir)
+        self.aio = AsyncMarketView(self) if async_client is not None else None
+
+        self._entries: Dict[str, "OrderedDict[tuple, tuple]"] = {f: OrderedDict() for f in self.FIELDS}
+        self._inflight: Dict[tuple, Future] = {}
+        self._failed: Dict[tuple, tuple] = {}      # (field,) + key -> (retry_at, failed value)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.stats = {f: {"hits": 0, "misses": 0, "coalesced": 0, "expired": 0, "stale": 0,
+                          "errors": 0, "backoff": 0, "hit_age": 0.0, "max_hit_age": 0.0}
+                      for f in self.FIELDS}
+
+    def __getattr__(self, name):
+        # Only called for attributes we don't define: accounts, orders, auth...
+        return getattr(self.client, name)
+
+    # ─── Core ───
+
+    def _begin(self, field: str, key: tuple, ttl: Optional[float]):
+        """("hit", value) | ("wait", future) | ("lead", future, stale value or None)."""
+        now = time.monotonic()
+        with self._lock:
+            entries = self._entries[field]
+            stats = self.stats[field]
+            entry = entries.get(key)
+            if entry is not None:
+                fetched_at, value, _ = entry
+                age = now - fetched_at
+                if ttl is None or age <= ttl:
+                    entries.move_to_end(key)
+                    stats["hits"] += 1
+                    stats["hit_age"] += age
+                    stats["max_hit_age"] = max(stats["max_hit_age"], age)
+                    return "hit", value
+            failed = self._failed.get((field,) + key)
+            if failed is not None:
+                if now < failed[0]:
+                    stats["backoff"] += 1
+                    if entry is not None and now - entry[0] <= ttl * STALE_FACTOR:
+                        stats["stale"] += 1
+                        return "hit", entry[1]
+                    return "hit", failed[1]
+                del self._failed[(field,) + key]
+            future = self._inflight.get((field,) + key)
+            if future is not None:
+                stats["coalesced"] += 1
+                return "wait", future
+            future = self._inflight[(field,) + key] = Future()
+            stats["misses"] += 1
+            stale = None
+            if entry is not None:
+                stats["expired"] += 1
+                if ttl is not None and now - entry[0] <= ttl * STALE_FACTOR:
+                    stale = entry[1]
+            return "lead", future, stale
+
+    def _finish(self, field: str, key: tuple, future: Future, value, stale, ttl: Optional[float]):
+        with self._lock:
+            del self._inflight[(field,) + key]
+            if _usable(value):
+                self._failed.pop((field,) + key, None)
+                entries = self._entries[field]
+                entries[key] = (time.monotonic(), value, ttl)
+                entries.move_to_end(key)
+                while len(entries) > MAX_ENTRIES:
+                    entries.popitem(last=False)
+                self._writes += 1
+                if self._writes % SWEEP_EVERY == 0:
+                    self._sweep()
+            else:
+                self.stats[field]["errors"] += 1
+                if ttl is not None:
+                    self._failed[(field,) + key] = (time.monotonic() + ttl, value)
+                if stale is not None:
+                    self.stats[field]["stale"] += 1
+                    value = stale
+        future.set_result(value)
+        return value
+
+    def _sweep(self):
+        """Drop entries past their stale window (caller holds the lock)."""
+        now = time.monotonic()
+        for entries in self._entries.values():
+            dead = [key for key, (fetched_at, _, ttl) in entries.items()
+                    if ttl is not None and now - fetched_at > ttl * STALE_FACTOR]
+            for key in dead:
+                del entries[key]
+        for key in [k for k, (retry_at, _) in self._failed.items() if now >= retry_at]:
+            del self._failed[key]
+
+    def _fail(self, field: str, key: tuple, future: Future, exc: BaseException):
+        with self._lock:
+            del self._inflight[(field,) + key]
+            self.stats[field]["errors"] += 1
+        future.set_exception(exc)
+
+    def _cached(self, field: str, key: tuple, ttl: Optional[float], fetch: Callable[[], object]):
+        state = self._begin(field, key, ttl)
+        if state[0] == "hit":
+            return state[1]
+        if state[0] == "wait":
+            return state[1].result()
+        _, future, stale = state
+        try:
+            value = fetch()
+        except BaseException as e:
+            self._fail(field, key, future, e)
+            raise
+        return self._finish(field, key, future, value, stale, ttl)
+
+    async def _cached_async(self, field: str, key: tuple, ttl: Optional[float], fetch):
+        state = self._begin(field, key, ttl)
+        if state[0] == "hit":
+            return state[1]
+        if state[0] == "wait":
+            return await asyncio.wrap_future(state[1])
+        _, future, stale = state
+        try:
+            value = await fetch()
+        except BaseException as e:
+            self._fail(field, key, future, e)
+            raise
+        return self._finish(field, key, future, value, stale, ttl)
+
+    def _candle_key(self, product_id: str, start: str, end: str, granularity: str) -> Tuple[tuple, Optional[float]]:
+        """
+        (key, ttl) for a candle range. Closed ranges never change; ranges
+        reaching into the forming candle do, and are keyed on that candle.
+        """
+        seconds = GRANULARITY_SECONDS.get(granularity, 3600)
+        now = int(time.time())
+        forming_start = now - (now % seconds)
+        if int(end) <= forming_start:
+            return (product_id, granularity, start, end), self.ttls["candles"]
+        return (product_id, granularity, start, "forming", forming_start), self.ttls["forming"]
+
+    # ─── Market data (CoinbaseClient surface) ───
+
+    def get_products_snapshot(self, product_ids: List[str] = None, ttl: float = None) -> Dict[str, Dict]:
+        snapshot = self._cached("metadata", ("snapshot",), self.ttls["metadata"] if ttl is None else ttl,
+                                lambda: self.client.get_products_snapshot(ttl=0) or {"error": "empty snapshot"})
+        if "error" in snapshot:
+            return {}
+        if product_ids is None:
+            return dict(snapshot)
+        return {pid: snapshot[pid] for pid in product_ids if pid in snapshot}
+
+    def get_product(self, product_id: str) -> Dict:
+        return self._cached("metadata", ("product", product_id), self.ttls["metadata"],
+                            lambda: self.client.get_product(product_id))
+
+    def get_product_book(self, product_id: str, limit: int = 20) -> Dict:
+        return self._cached("book", (product_id, limit), self.ttls["book"],
+                            lambda: self.client.get_product_book(product_id, limit))
+
+    def get_candles(self, product_id: str, start: str, end: str, granularity: str = "ONE_HOUR") -> List[Dict]:
+        key, ttl = self._candle_key(product_id, start, end, granularity)
+        return self._cached("candles", key, ttl, lambda: self.client.get_candles(product_id, start, end, granularity))
+
+    def get_recent_candles(self, product_id: str, granularity: str = "ONE_HOUR", limit: int = 50) -> List[Dict]:
+        return self.candles.get_recent(product_id, granularity, limit)
+
+    def analyze_ticker(self, product_id: str) -> Dict:
+        """Same as CoinbaseClient.analyze_ticker, from cached metadata and book."""
+        product = self.get_products_snapshot([product_id]).get(product_id)
+        if product is None:
+            product = self.get_product(product_id)
+        book = self.book_source.get_product_book(product_id) if self.book_source else {"error": "no feed"}
+        if "error" in book:
+            book = self.get_product_book(product_id)
+        return format_ticker(product_id, product, book)
+
+    # ─── Stats ───
+
+    def get_stats(self) -> Dict:
+        """Per-field hits/misses/coalesced/expired/stale/errors, hit rate and average age of hits."""
+        with self._lock:
+            stats = {f: dict(s, entries=len(self._entries[f])) for f, s in self.stats.items()}
+            inflight = len(self._inflight)
+        for s in stats.values():
+            lookups = s["hits"] + s["misses"] + s["coalesced"]
+            s["hit_rate"] = (s["hits"] + s["coalesced"]) / lookups if lookups else 0.0
+            s["avg_hit_age_ms"] = s.pop("hit_age") / s["hits"] * 1000 if s["hits"] else 0.0
+            s["max_hit_age_ms"] = s.pop("max_hit_age") * 1000
+        stats["candle_store"] = self.candles.get_stats()
+        stats["inflight"] = inflight
+        return stats
+
+
+class AsyncMarketView:
+    """AsyncCoinbaseClient-shaped view over a MarketDataCache (same entries, same single-flight)."""
+
+    def __init__(self, cache: MarketDataCache):
+        self.cache = cache
+        self.client = cache.async_client
+
+    @property
+    def book_source(self):
+        return self.cache.book_source
+
+    @book_source.setter
+    def book_source(self, source):
+        self.cache.book_source = source
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    async def get_products_snapshot(self, product_ids: List[str] = None, ttl: float = None) -> Dict[str, Dict]:
+        cache = self.cache
+
+        async def fetch():
+            return await self.client.get_products_snapshot(ttl=0) or {"error": "empty snapshot"}
+
+        snapshot = await cache._cached_async("metadata", ("snapshot",),
+                                             cache.ttls["metadata"] if ttl is None else ttl, fetch)
+        if "error" in snapshot:
+            return {}
+        if product_ids is None:
+            return dict(snapshot)
+        return {pid: snapshot[pid] for pid in product_ids if pid in snapshot}
+
+    async def get_product(self, product_id: str) -> Dict:
+        return await self.cache._cached_async("metadata", ("product", product_id), self.cache.ttls["metadata"],
+                                              lambda: self.client.get_product(product_id))
+
+    async def get_product_book(self, product_id: str, limit: int = 20) -> Dict:
+        return await self.cache._cached_async("book", (product_id, limit), self.cache.ttls["book"],
+                                              lambda: self.client.get_product_book(product_id, limit))
+
+    async def get_candles(self, product_id: str, start: str, end: str, granularity: str = "ONE_HOUR") -> List[Dict]:
+        key, ttl = self.cache._candle_key(product_id, start, end, granularity)
+        return await self.cache._cached_async("candles", key, ttl,
+                                              lambda: self.client.get_candles(product_id, start, end, granularity))
+
+    async def get_recent_candles(self, product_id: str, granularity: str = "ONE_HOUR", limit: int = 50) -> List[Dict]:
+        return await self.cache.candles.get_recent_async(self, product_id, granularity, limit)
+
+    async def analyze_ticker(self, product_id: str) -> Dict:
+        """Async analyze_ticker from cached metadata and book (fetched concurrently on a miss)."""
+        book = self.book_source.get_product_book(product_id) if self.book_source else {"error": "no feed"}
+        if "error" in book:
+            snapshot, book = await asyncio.gather(self.get_products_snapshot([product_id]),
+                                                  self.get_product_book(product_id))
+        else:
+            snapshot = await self.get_products_snapshot([product_id])
+        product = snapshot.get(product_id)
+        if product is None:
+            product = await self.get_product(product_id)
+        return format_ticker(product_id, product, book)
+
+
+# ─── Shared instances ───
+
+_caches: Dict[int, MarketDataCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_market_cache(client, async_client=None, **kwargs) -> MarketDataCache:
+    """
+    The process-wide cache for `client` (created on first use; a cache passes
+    through unchanged). A later call can attach the async client.
+    """
+    if isinstance(client, MarketDataCache):
+        return client
+    with _caches_lock:
+        cache = _caches.get(id(client))
+        if cache is None or cache.client is not client:
+            cache = _caches[id(client)] = MarketDataCache(client, async_client, **kwargs)
+        elif async_client is not None and cache.aio is None:
+            cache.async_client = async_client
+            cache.aio = AsyncMarketView(cache)
+        return cache
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Market Data Feed
+Streams Coinbase Advanced Trade ticker / level2 channels and keeps an
+in-memory top-of-book per product, so the radar reads books from memory
+instead of polling /product_book every 60s.
+
+Books are order_book.OrderBook instances updated delta by delta.
+get_product_book() returns the same dict shape as CoinbaseClient.get_product_book
+(best_bid, best_ask, mid_price, spread, spread_pct, bid_depth, ask_depth, depth-within-10bps, imbalance, raw).
+Set `client.book_source = feed` and analyze_ticker will use it, falling back
+to REST whenever the feed has no fresh book for a product.
+
+Transports are pluggable: WebSocketTransport for live data, ReplayTransport
+to play back a recorded JSONL session offline.
+
+WS Docs: https://docs.cdp.coinbase.com/advanced-trade/docs/ws-overview
+"""
+
+import json
+import sys
+import time
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from order_book import OrderBook
+
+try:
+    import websocket  # Optional: websocket-client, only needed for live data
+except ImportError:
+    websocket = None
+
+
+WS_URL = "wss://advanced-trade-ws.coinbase.com"
+
+
+class FeedClosed(Exception):
+    """Raised by a transport when the connection (or recording) ends."""
+
+
+# ─── Transports ───
+
+class WebSocketTransport:
+    """Blocking websocket-client connection to the Advanced Trade feed."""
+
+    def __init__(self, url: str = WS_URL, timeout: float = 30.0):
+        if websocket is None:
+            raise ImportError("WebSocketTransport requires websocket-client (pip install websocket-client)")
+        self.url = url
+        self.timeout = timeout
+        self._ws = None
+
+    def connect(self):
+        self._ws = websocket.create_connection(self.url, timeout=self.timeout)
+
+    def send(self, message: Dict):
+        self._ws.send(json.dumps(message))
+
+    def recv(self) -> str:
+        try:
+            return self._ws.recv()
+        except Exception as e:
+            raise FeedClosed(str(e) or type(e).__name__)
+
+    def close(self):
+        if self._ws is not None:
+            try:
+                self._ws.close()
+            finally:
+                self._ws = None
+
+
+class ReplayTransport:
+    """
+    Offline stand-in for the websocket: plays back recorded messages (one JSON
+    object per line, or an in-memory list). `realtime=True` sleeps between
+    messages according to their recorded "timestamp" field.
+    """
+
+    def __init__(self, source: Union[str, Iterable], realtime: bool = False, max_delay: float = 5.0):
+        self.source = source
+        self.realtime = realtime
+        self.max_delay = max_delay
+        self.sent: List[Dict] = []
+        self._messages = None
+        self._last_ts = None
+
+    def connect(self):
+        if isinstance(self.source, (str, Path)):
+            with open(self.source) as f:
+                self._messages = iter([line for line in f if line.strip()])
+        else:
+            self._messages = iter(list(self.source))
+        self._last_ts = None
+
+    def send(self, message: Dict):
+        self.sent.append(message)
+
+    def recv(self) -> str:
+        try:
+            message = next(self._messages)
+        except StopIteration:
+            raise FeedClosed("end of recording")
+        if self.realtime:
+            self._pace(message)
+        return message if isinstance(message, str) else json.dumps(message)
+
+    def _pace(self, message):
+        data = json.loads(message) if isinstance(message, str) else message
+        ts = _parse_ts(data.get("timestamp"))
+        if ts is not None and self._last_ts is not None:
+            time.sleep(min(max(ts - self._last_ts, 0), self.max_delay))
+        self._last_ts = ts if ts is not None else self._last_ts
+
+    def close(self):
+        self._messages = None
+
+
+class RecordingTransport:
+    """Wraps another transport and appends every received message to a JSONL file."""
+
+    def __init__(self, inner, path: str):
+        self.inner = inner
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def connect(self):
+        self.inner.connect()
+
+    def send(self, message: Dict):
+        self.inner.send(message)
+
+    def recv(self) -> str:
+        raw = self.inner.recv()
+        with open(self.path, "a") as f:
+            f.write(raw.strip() + "\n")
+        return raw
+
+    def close(self):
+        self.inner.close()
+
+
+# ─── Feed ───
+
+class MarketDataFeed:
+    """
+    Maintains per-product books from ticker + level2 messages.
+    Sequence gaps mark the books stale and force a reconnect, which
+    makes Coinbase send a fresh level2 snapshot. After a plain disconnect
+    books age out via stale_after until the new snapshot arrives.
+    """
+
+    def __init__(self, product_ids: List[str], transport=None,
+                 channels: Iterable[str] = ("level2", "ticker", "heartbeats"),
+                 stale_after: float = 30.0, max_backoff: float = 60.0, depth_levels: int = 5):
+        self.product_ids = list(product_ids)
+        self.transport = transport if transport is not None else WebSocketTransport()
+        self.channels = list(channels)
+        self.stale_after = stale_after
+        self.max_backoff = max_backoff
+        self.depth_levels = depth_levels
+
+        self._books: Dict[str, OrderBook] = {}
+        self._tickers: Dict[str, Dict] = {}
+        self._updated: Dict[str, float] = {}
+        self._synced: Dict[str, bool] = {}
+        self._last_seq = None
+        self._listeners: List[Callable[[str, str], None]] = []
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+        self.stats = {"messages": 0, "gaps": 0, "reconnects": 0, "errors": 0, "last_message": 0.0}
+
+    # ─── Lifecycle ───
+
+    def start(self):
+        """Run the feed in a background daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self.run, name="market-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        try:
+            self.transport.close()
+        except Exception:
+            pass
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def run(self, reconnect: bool = True):
+        """Connect, subscribe and process messages; reconnect with backoff until stop()."""
+        self._running = True
+        backoff = 1.0
+        while self._running:
+            try:
+                self._connect()
+                backoff = 1.0
+                while self._running:
+                    if not self.handle_message(self.transport.recv()):
+                        break  # Sequence gap: resubscribe for a fresh snapshot
+            except FeedClosed as e:
+                print(f"📶 Feed closed: {e}")
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"📶 Feed error: {type(e).__name__}: {e}")
+            finally:
+                try:
+                    self.transport.close()
+                except Exception:
+                    pass
+            if not (self._running and reconnect):
+                break
+            self.stats["reconnects"] += 1
+            time.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+        self._running = False
+
+    def _connect(self):
+        self.transport.connect()
+        self._last_seq = None
+        for channel in self.channels:
+            message = {"type": "subscribe", "channel": channel}
+            if channel != "heartbeats":
+                message["product_ids"] = self.product_ids
+            self.transport.send(message)
+
+    def add_listener(self, callback: Callable[[str, str], None]):
+        """
+        callback(product_id, kind) is called from the feed thread whenever a
+        product's top of book moves ("book") or its ticker price changes ("ticker").
+        Keep it cheap (e.g. RadarScheduler.notify).
+        """
+        self._listeners.append(callback)
+
+    def _emit(self, product_id: str, kind: str):
+        for callback in self._listeners:
+            try:
+                callback(product_id, kind)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"📶 Listener error: {type(e).__name__}: {e}")
+
+    # ─── Message handling ───
+
+    def handle_message(self, raw: Union[str, Dict]) -> bool:
+        """Apply one feed message. Returns False on a sequence gap."""
+        msg = json.loads(raw) if isinstance(raw, str) else raw
+        self.stats["messages"] += 1
+        self.stats["last_message"] = time.time()
+
+        seq = msg.get("sequence_num")
+        if seq is not None:
+            if self._last_seq is not None and seq != self._last_seq + 1:
+                self.stats["gaps"] += 1
+                print(f"📶 Sequence gap: expected {self._last_seq + 1}, got {seq}")
+                self._last_seq = None
+                self._mark_all_stale()
+                return False
+            self._last_seq = seq
+
+        channel = msg.get("channel")
+        if channel == "l2_data":
+            for event in msg.get("events", []):
+                self._apply_level2(event)
+        elif channel == "ticker":
+            for event in msg.get("events", []):
+                for ticker in event.get("tickers", []):
+                    self._apply_ticker(ticker)
+        return True
+
+    def _apply_level2(self, event: Dict):
+        pid = event.get("product_id")
+        if not pid:
+            return
+        with self._lock:
+            if event.get("type") == "snapshot":
+                book = self._books.get(pid)
+                if book is None:
+                    book = self._books[pid] = OrderBook(pid)
+                book.clear()
+                self._synced[pid] = True
+            elif not self._synced.get(pid):
+                return  # Updates are meaningless until we have a snapshot
+            book = self._books[pid]
+            touch = (book.best_bid(), book.best_ask())
+            for update in event.get("updates", []):
+                book.update(update.get("side"), float(update["price_level"]), float(update["new_quantity"]))
+            self._updated[pid] = time.time()
+            moved = touch != (book.best_bid(), book.best_ask())
+        if moved and self._listeners:
+            self._emit(pid, "book")
+
+    def _apply_ticker(self, ticker: Dict):
+        pid = ticker.get("product_id")
+        if not pid:
+            return
+        with self._lock:
+            previous = self._tickers.get(pid)
+            self._tickers[pid] = {
+                "price": float(ticker.get("price") or 0),
+                "best_bid": float(ticker.get("best_bid") or 0),
+                "best_ask": float(ticker.get("best_ask") or 0),
+                "best_bid_quantity": float(ticker.get("best_bid_quantity") or 0),
+                "best_ask_quantity": float(ticker.get("best_ask_quantity") or 0),
+                "volume_24h": float(ticker.get("volume_24_h") or 0),
+                "updated": time.time(),
+            }
+            moved = previous is None or previous["price"] != self._tickers[pid]["price"]
+        if moved and self._listeners:
+            self._emit(pid, "ticker")
+
+    def _mark_all_stale(self):
+        with self._lock:
+            self._synced.clear()
+            self._updated.clear()
+
+    # ─── Queries ───
+
+    def get_product_book(self, product_id: str, limit: int = 20) -> Dict:
+        """Top-of-book in CoinbaseClient.get_product_book's shape, or {"error": ...} if not fresh."""
+        now = time.time()
+        with self._lock:
+            if self._synced.get(product_id) and now - self._updated.get(product_id, 0) <= self.stale_after:
+                return self._books[product_id].to_book_dict(self.depth_levels, limit)
+            ticker = self._tickers.get(product_id)
+            if not ticker or now - ticker["updated"] > self.stale_after:
+                return {"error": f"No fresh feed data for {product_id}"}
+        # Ticker-only: a one-level book, so no real depth to report
+        book = OrderBook.from_levels(
+            product_id,
+            [(ticker["best_bid"], ticker["best_bid_quantity"])],
+            [(ticker["best_ask"], ticker["best_ask_quantity"])]
+        ).to_book_dict(self.depth_levels, limit)
+        for key in ("bid_depth_usd_10bps", "ask_depth_usd_10bps", "imbalance"):
+            book.pop(key)
+        return book
+
+    def get_order_book(self, product_id: str) -> Optional[OrderBook]:
+        """The live OrderBook for a product (shared, updated in place), or None until synced."""
+        with self._lock:
+            return self._books.get(product_id) if self._synced.get(product_id) else None
+
+    def is_fresh(self, product_id: str) -> bool:
+        return "error" not in self.get_product_book(product_id, limit=1)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            fresh = [pid for pid in self.product_ids if self._synced.get(pid)]
+        return dict(self.stats, synced_products=len(fresh), running=self._running)
+
+
+def _parse_ts(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        # Coinbase sends nanosecond precision; trim to microseconds for fromisoformat
+        head, _, frac = value.rstrip("Z").partition(".")
+        return datetime.fromisoformat(f"{head}.{(frac + '000000')[:6]}+00:00").timestamp()
+    except ValueError:
+        return None
+
+
+if __name__ == "__main__":
+    # Replay a recorded session and print the resulting books:
+    #   python3 market_feed.py data/feed_recording.jsonl BTC-USD ETH-USD
+    if len(sys.argv) < 3:
+        print("usage: market_feed.py <recording.jsonl> <product_id> [...]")
+        sys.exit(1)
+    feed = MarketDataFeed(sys.argv[2:], transport=ReplayTransport(sys.argv[1]), stale_after=float("inf"))
+    feed.run(reconnect=False)
+    for pid in feed.product_ids:
+        book = feed.get_product_book(pid)
+        book.pop("raw", None)
+        print(pid, json.dumps(book))
+    print(json.dumps(feed.get_stats()))
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Mock LLM server.
+A local OpenAI-compatible /v1/chat/completions endpoint (the API shape both
+DeepSeek and LM Studio speak) with configurable latency, for exercising the
+analyzer and the scouts without network or credentials. Replies are canned by
+prompt type: trade validation -> JSON verdict, sentiment -> a number, anything
+else -> one sentence. Counts requests and prompt sizes.
+
+Run standalone: python3 mock_llm.py [--port 1234] [--latency-ms 200]
+or in-process:  server = MockLLM(latency=0.2); server.start(); ... server.url
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockLLM(ThreadingHTTPServer):
+    """Canned chat completions after `latency` seconds; every `fail_every`-th request returns 500."""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, latency: float = 0.0, port: int = 0, confidence: float = 0.8,
+                 sentiment: float = 0.62, fail_every: int = 0):
+        super().__init__(("127.0.0.1", port), MockLLMHandler)
+        self.latency = latency
+        self.confidence = confidence
+        self.sentiment = sentiment
+        self.fail_every = fail_every       # Every Nth request fails (0 = never)
+        self.stats = {"requests": 0, "failed": 0, "prompt_chars": 0, "by_model": {}}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "MockLLM":
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def handle_error(self, request, client_address):
+        # Clients that hit their deadline hang up mid-reply; that's expected, not an error
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def record(self, model: str, prompt: str) -> bool:
+        """Count a request; returns False if this one should fail."""
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["prompt_chars"] += len(prompt)
+            self.stats["by_model"][model] = self.stats["by_model"].get(model, 0) + 1
+            if self.fail_every and self.stats["requests"] % self.fail_every == 0:
+                self.stats["failed"] += 1
+                return False
+            return True
+
+    def reply(self, prompt: str) -> str:
+        lowered = prompt.lower()
+        if "'approved'" in lowered or "validate the following trade" in lowered:
+            return json.dumps({"approved": self.confidence >= 0.7, "confidence": self.confidence,
+                               "reason": "mock verdict"})
+        if "sentiment" in lowered:
+            return f"{self.sentiment:.2f}"
+        return "Mock market summary: BTC range-bound, dominance steady. No major events."
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+        ok = server.record(body.get("model", "?"), prompt)
+        time.sleep(server.latency)
+        if not ok:
+            self.send_error(500)
+            return
+
+        payload = json.dumps({
+            "id": "mock",
+            "object": "chat.completion",
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": server.reply(prompt)}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 20},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--confidence", type=float, default=0.8)
+    args = parser.parse_args()
+    server = MockLLM(args.latency_ms / 1000, args.port, args.confidence)
+    print(f"🤖 Mock LLM on {server.url} (latency {args.latency_ms:.0f}ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Order Book Module
+Compact level-2 book for one product.
+
+Each side is a pair of parallel array('d') columns (price, size) kept sorted
+ascending, so a level is found with bisect in O(log n) and updates in place;
+inserting or removing a level is a memmove inside the array. Queries walk the
+arrays by index from the touch outward and allocate nothing per level.
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Tuple
+
+BID = "bid"
+ASK = "ask"
+
+
+class OrderBook:
+    """
+    Level-2 book with incremental deltas.
+    Bids and asks are both stored ascending: best bid is the last bid,
+    best ask is the first ask.
+    """
+
+    __slots__ = ("product_id", "_bid_px", "_bid_sz", "_ask_px", "_ask_sz")
+
+    def __init__(self, product_id: str = ""):
+        self.product_id = product_id
+        self._bid_px = array("d")
+        self._bid_sz = array("d")
+        self._ask_px = array("d")
+        self._ask_sz = array("d")
+
+    @classmethod
+    def from_levels(cls, product_id: str, bids: Iterable[Tuple[float, float]],
+                    asks: Iterable[Tuple[float, float]]) -> "OrderBook":
+        book = cls(product_id)
+        book.apply_snapshot(bids, asks)
+        return book
+
+    @classmethod
+    def from_pricebook(cls, price_book: Dict) -> "OrderBook":
+        """Build from a REST pricebook ({"bids": [{"price", "size"}], "asks": [...]})."""
+        return cls.from_levels(
+            price_book.get("product_id", ""),
+            ((float(b["price"]), float(b.get("size", 0))) for b in price_book.get("bids", [])),
+            ((float(a["price"]), float(a.get("size", 0))) for a in price_book.get("asks", []))
+        )
+
+    # ─── Updates ───
+
+    def apply_snapshot(self, bids: Iterable[Tuple[float, float]], asks: Iterable[Tuple[float, float]]):
+        """Replace the whole book."""
+        bid_levels = sorted((p, s) for p, s in bids if p > 0 and s > 0)
+        ask_levels = sorted((p, s) for p, s in asks if p > 0 and s > 0)
+        self._bid_px = array("d", (p for p, _ in bid_levels))
+        self._bid_sz = array("d", (s for _, s in bid_levels))
+        self._ask_px = array("d", (p for p, _ in ask_levels))
+        self._ask_sz = array("d", (s for _, s in ask_levels))
+
+    def update(self, side: str, price: float, size: float):
+        """Apply one level-2 delta (absolute size at a level; 0 removes it). side: bid / ask / offer."""
+        if side == BID:
+            px, sz = self._bid_px, self._bid_sz
+        else:
+            px, sz = self._ask_px, self._ask_sz
+        i = bisect_left(px, price)
+        found = i < len(px) and px[i] == price
+        if size > 0:
+            if found:
+                sz[i] = size
+            else:
+                px.insert(i, price)
+                sz.insert(i, size)
+        elif found:
+            del px[i]
+            del sz[i]
+
+    def clear(self):
+        self.apply_snapshot((), ())
+
+    # ─── Queries ───
+
+    def __len__(self) -> int:
+        return len(self._bid_px) + len(self._ask_px)
+
+    def best_bid(self) -> float:
+        return self._bid_px[-1] if self._bid_px else 0.0
+
+    def best_ask(self) -> float:
+        return self._ask_px[0] if self._ask_px else 0.0
+
+    def mid_price(self) -> float:
+        bid, ask = self.best_bid(), self.best_ask()
+        return (bid + ask) / 2 if (bid + ask) > 0 else 0.0
+
+    def spread_pct(self) -> float:
+        mid = self.mid_price()
+        return (self.best_ask() - self.best_bid()) / mid if mid > 0 else 0.0
+
+    def depth(self, side: str, levels: int = 5) -> float:
+        """Base size on the top `levels` levels of a side."""
+        total = 0.0
+        if side == BID:
+            sz = self._bid_sz
+            for i in range(len(sz) - 1, max(len(sz) - levels, 0) - 1, -1):
+                total += sz[i]
+        else:
+            sz = self._ask_sz
+            for i in range(min(levels, len(sz))):
+                total += sz[i]
+        return total
+
+    def depth_within_bps(self, side: str, bps: float, notional: bool = False) -> float:
+        """Size (or quote notional) resting within `bps` basis points of the mid."""
+        mid = self.mid_price()
+        if mid <= 0:
+            return 0.0
+        total = 0.0
+        if side == BID:
+            px, sz = self._bid_px, self._bid_sz
+            floor = mid * (1 - bps / 10_000)
+            i = len(px) - 1
+            while i >= 0 and px[i] >= floor:
+                total += px[i] * sz[i] if notional else sz[i]
+                i -= 1
+        else:
+            px, sz = self._ask_px, self._ask_sz
+            cap = mid * (1 + bps / 10_000)
+            i = 0
+            while i < len(px) and px[i] <= cap:
+                total += px[i] * sz[i] if notional else sz[i]
+                i += 1
+        return total
+
+    def vwap(self, side: str, size: float) -> float:
+        """
+        Average price to fill `size` base units taking liquidity:
+        side="buy" walks the asks, side="sell" walks the bids.
+        Returns 0.0 if the book is too thin to fill the whole size.
+        """
+        if size <= 0:
+            return self.best_ask() if side == "buy" else self.best_bid()
+        remaining = size
+        cost = 0.0
+        if side == "buy":
+            px, sz = self._ask_px, self._ask_sz
+            i, step, end = 0, 1, len(px)
+        else:
+            px, sz = self._bid_px, self._bid_sz
+            i, step, end = len(px) - 1, -1, -1
+        while i != end and remaining > 0:
+            take = sz[i] if sz[i] < remaining else remaining
+            cost += take * px[i]
+            remaining -= take
+            i += step
+        return cost / size if remaining <= 1e-12 else 0.0
+
+    def imbalance(self, levels: int = 5) -> float:
+        """(bid depth - ask depth) / total over the top levels, in [-1, 1]."""
+        bid, ask = self.depth(BID, levels), self.depth(ASK, levels)
+        total = bid + ask
+        return (bid - ask) / total if total > 0 else 0.0
+
+    # ─── Output ───
+
+    def levels(self, side: str, limit: int = 20):
+        """Top `limit` (price, size) levels from the touch outward."""
+        if side == BID:
+            n = len(self._bid_px)
+            return [(self._bid_px[i], self._bid_sz[i]) for i in range(n - 1, max(n - limit, 0) - 1, -1)]
+        return [(self._ask_px[i], self._ask_sz[i]) for i in range(min(limit, len(self._ask_px)))]
+
+    def to_book_dict(self, depth_levels: int = 5, raw_levels: int = 20, depth_bps: float = 10) -> Dict:
+        """Same keys as CoinbaseClient.get_product_book, plus real-depth fields."""
+        best_bid, best_ask = self.best_bid(), self.best_ask()
+        mid_price = self.mid_price()
+        return {
+            "best_bid": best_bid,
+            "best_ask": best_ask,
+            "mid_price": mid_price,
+            "spread": best_ask - best_bid,
+            "spread_pct": self.spread_pct(),
+            "bid_depth": self.depth(BID, depth_levels),
+            "ask_depth": self.depth(ASK, depth_levels),
+            "bid_depth_usd_10bps": self.depth_within_bps(BID, depth_bps, notional=True),
+            "ask_depth_usd_10bps": self.depth_within_bps(ASK, depth_bps, notional=True),
+            "imbalance": self.imbalance(depth_levels),
+            "raw": {
+                "product_id": self.product_id,
+                "bids": [{"price": str(p), "size": str(s)} for p, s in self.levels(BID, raw_levels)],
+                "asks": [{"price": str(p), "size": str(s)} for p, s in self.levels(ASK, raw_levels)],
+            }
+        }
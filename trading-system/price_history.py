@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Price History
+Fixed-capacity, timestamped ring buffer of (time, price, volume) samples per
+product, backed by array('d'), for ScoutAlpha's momentum.
+
+Appends are O(1) (overwrite the oldest slot). Lookbacks are by time, not by
+sample count: momentum over a horizon compares the latest price with the
+sample nearest to `now - horizon` (binary search over the ring), and returns
+None when the history doesn't reach back that far (or the nearest sample is
+more than 10% of the horizon, min 30s, off, e.g. across a restart gap). Running
+cumulative sums of price*volume and volume make the volume-weighted
+momentum (last price vs the window's VWAP) O(log n) too.
+
+snapshot()/restore() round-trip the raw arrays, so a restart keeps its
+warm-up instead of waiting an hour for a 1h lookback.
+"""
+
+import math
+import threading
+import time
+from array import array
+from typing import Dict, Optional
+
+HORIZONS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "4h": 14400}
+LOOKBACK_TOLERANCE = 0.1    # Fraction of the horizon the base sample may be off by
+MIN_TOLERANCE = 30.0        # Seconds (half a typical 60s scan interval)
+SNAPSHOT_VERSION = 1
+
+
+class PriceHistory:
+    """Ring buffer for one product; timestamps must be non-decreasing."""
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._t = array("d", bytes(8 * capacity))
+        self._p = array("d", bytes(8 * capacity))
+        self._v = array("d", bytes(8 * capacity))
+        self._cum_pv = array("d", bytes(8 * capacity))  # Running sums up to and incl. each sample
+        self._cum_v = array("d", bytes(8 * capacity))
+        self._head = 0       # Next slot to write
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _slot(self, i: int) -> int:
+        """Physical slot of logical index i (0 = oldest)."""
+        return (self._head - self._count + i) % self.capacity
+
+    # ─── Updates ───
+
+    def append(self, timestamp: float, price: float, volume: float = 0.0):
+        """O(1). Out-of-order samples are dropped."""
+        if self._count and timestamp < self._t[self._slot(self._count - 1)]:
+            return
+        prev = self._slot(self._count - 1) if self._count else None
+        slot = self._head
+        self._t[slot] = timestamp
+        self._p[slot] = price
+        self._v[slot] = volume
+        self._cum_pv[slot] = (self._cum_pv[prev] if prev is not None else 0.0) + price * volume
+        self._cum_v[slot] = (self._cum_v[prev] if prev is not None else 0.0) + volume
+        self._head = (slot + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    # ─── Queries ───
+
+    @property
+    def last_price(self) -> Optional[float]:
+        return self._p[self._slot(self._count - 1)] if self._count else None
+
+    @property
+    def span(self) -> float:
+        """Seconds between the oldest and newest sample."""
+        if self._count < 2:
+            return 0.0
+        return self._t[self._slot(self._count - 1)] - self._t[self._slot(0)]
+
+    def _index_at(self, timestamp: float) -> int:
+        """Logical index of the first sample at or after `timestamp` (count if none)."""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._t[self._slot(mid)] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _nearest(self, timestamp: float, tolerance: float) -> Optional[int]:
+        """Logical index of the sample nearest to `timestamp`, if within tolerance."""
+        i = self._index_at(timestamp)
+        best = None
+        for j in (i - 1, i):
+            if 0 <= j < self._count:
+                gap = abs(self._t[self._slot(j)] - timestamp)
+                if gap <= tolerance and (best is None or gap < best[0]):
+                    best = (gap, j)
+        return best[1] if best else None
+
+    def momentum(self, horizon: float, now: Optional[float] = None) -> Optional[float]:
+        """% change of the latest price vs the price `horizon` seconds before `now`."""
+        if self._count < 2:
+            return None
+        now = self._t[self._slot(self._count - 1)] if now is None else now
+        j = self._nearest(now - horizon, max(horizon * LOOKBACK_TOLERANCE, MIN_TOLERANCE))
+        if j is None or j == self._count - 1:
+            return None
+        base = self._p[self._slot(j)]
+        return (self.last_price - base) / base * 100 if base else None
+
+    def momenta(self, horizons: Dict[str, float] = HORIZONS, now: Optional[float] = None) -> Dict[str, Optional[float]]:
+        return {name: self.momentum(seconds, now) for name, seconds in horizons.items()}
+
+    def volume_weighted_momentum(self, horizon: float, now: Optional[float] = None) -> Optional[float]:
+        """% of the latest price above the volume-weighted average price over the last `horizon` seconds."""
+        if self._count < 2:
+            return None
+        now = self._t[self._slot(self._count - 1)] if now is None else now
+        i = self._index_at(now - horizon)
+        if i >= self._count - 1:
+            return None
+        end = self._slot(self._count - 1)
+        pv, v = self._cum_pv[end], self._cum_v[end]
+        if i > 0:
+            pv -= self._cum_pv[self._slot(i - 1)]
+            v -= self._cum_v[self._slot(i - 1)]
+        if v <= 0:
+            return None
+        vwap = pv / v
+        return (self.last_price - vwap) / vwap * 100
+
+    # ─── Snapshot ───
+
+    def snapshot(self) -> Dict:
+        """Oldest-first raw arrays; restore() rebuilds the running sums."""
+        slots = [self._slot(i) for i in range(self._count)]
+        return {
+            "capacity": self.capacity,
+            "t": array("d", (self._t[s] for s in slots)).tobytes(),
+            "p": array("d", (self._p[s] for s in slots)).tobytes(),
+            "v": array("d", (self._v[s] for s in slots)).tobytes(),
+        }
+
+    @classmethod
+    def restore(cls, snapshot: Dict, capacity: Optional[int] = None) -> "PriceHistory":
+        history = cls(capacity or snapshot["capacity"])
+        t, p, v = (array("d", snapshot[k]) for k in ("t", "p", "v"))
+        for sample in zip(t, p, v):
+            history.append(*sample)
+        return history
+
+
+class PriceHistoryStore:
+    """
+    PriceHistory per product; persisted across restarts as a StateStore component.
+    record() and snapshot() hold a lock, so a checkpoint on the scan thread is
+    safe while a timed-out Alpha worker is still recording.
+    """
+
+    STATE_VERSION = SNAPSHOT_VERSION
+
+    def __init__(self, capacity: int = 4096, max_age: float = 2 * HORIZONS["4h"]):
+        self.capacity = capacity
+        self.max_age = max_age       # Samples older than this are not restored
+        self.histories: Dict[str, PriceHistory] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, product_id: str) -> PriceHistory:
+        with self._lock:
+            history = self.histories.get(product_id)
+            if history is None:
+                history = self.histories[product_id] = PriceHistory(self.capacity)
+            return history
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self.histories
+
+    def record(self, product_id: str, price: float, volume: float = 0.0,
+               timestamp: Optional[float] = None) -> PriceHistory:
+        history = self[product_id]
+        with self._lock:
+            history.append(time.time() if timestamp is None else timestamp, price, volume)
+        return history
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            histories = {pid: h.snapshot() for pid, h in self.histories.items()}
+        return {"version": SNAPSHOT_VERSION, "saved_at": time.time(), "histories": histories}
+
+    def restore(self, snapshot: Dict, now: Optional[float] = None) -> int:
+        """Load a snapshot (dropping samples older than max_age). Returns samples restored."""
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return 0
+        cutoff = (time.time() if now is None else now) - self.max_age
+        restored = 0
+        for pid, snap in snapshot["histories"].items():
+            history = PriceHistory(self.capacity)
+            for sample in zip(*(array("d", snap[k]) for k in ("t", "p", "v"))):
+                if sample[0] >= cutoff and not math.isnan(sample[1]):
+                    history.append(*sample)
+            if len(history):
+                with self._lock:
+                    self.histories[pid] = history
+                restored += len(history)
+        return restored
+
+    # StateStore component interface
+    def snapshot_state(self) -> Dict:
+        return self.snapshot()
+
+    def restore_state(self, state: Dict):
+        self.restore(state)
@@ -2,11 +2,118 @@
 """
 Bayesian Probability Estimation Module
 Sequential updating with signal reliability tracking.
+estimate_batch() computes a whole scan's posteriors in log-odds space in one
+NumPy pass; predictions go to a bounded, array-backed history. Executed
+trades' forecasts are tracked by trade_id in a CalibrationTracker.
 """
 
 import math
 import json
-from typing import Dict, Optional
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from calibration import CalibrationTracker
+from indicators import np
+
+EPSILON = 0.001                                   # Probabilities are clipped to [EPSILON, 1 - EPSILON]
+LOGIT_MAX = math.log((1 - EPSILON) / EPSILON)     # ... which is +-LOGIT_MAX in log-odds
+SHORT_SIDES = ("NO", "SELL")                       # Sides that win when the probability is low
+
+
+def _float_array(values) -> array:
+    """array('d') copy of a sequence; NumPy vectors are copied as one buffer."""
+    if np is not None and isinstance(values, np.ndarray):
+        out = array("d")
+        out.frombytes(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+        return out
+    return array("d", values)
+
+
+class PredictionHistory:
+    """
+    Fixed-capacity ring of (p_market, p_estimated, actual) in array('d')
+    columns; actual is NaN until marked. Batches are written with at most two
+    slice assignments, so recording a few hundred predictions is one memcpy.
+    """
+
+    def __init__(self, capacity: int = 10_000):
+        self.capacity = capacity
+        self.p_market = array("d", [math.nan]) * capacity
+        self.p_estimated = array("d", [math.nan]) * capacity
+        self.actual = array("d", [math.nan]) * capacity
+        self._head = 0        # Next slot to write
+        self._count = 0
+        self.total = 0        # Predictions ever recorded
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, p_market: float, p_estimated: float):
+        head = self._head
+        self.p_market[head] = p_market
+        self.p_estimated[head] = p_estimated
+        self.actual[head] = math.nan
+        self._advance(1)
+
+    def extend(self, p_market: Sequence[float], p_estimated: Sequence[float]):
+        """Record a batch (arrays, lists or NumPy vectors of equal length)."""
+        columns = [_float_array(p_market), _float_array(p_estimated)]
+        n = len(columns[1])
+        columns.append(array("d", [math.nan]) * n)
+        overwritten = max(n - self.capacity, 0)  # Older than the ring; counted in total, never stored
+        if overwritten:
+            columns = [c[-self.capacity:] for c in columns]
+            n = self.capacity
+        first = min(n, self.capacity - self._head)
+        for target, values in zip((self.p_market, self.p_estimated, self.actual), columns):
+            target[self._head:self._head + first] = values[:first]
+            target[:n - first] = values[first:]
+        self._advance(n)
+        self.total += overwritten
+
+    def _advance(self, n: int):
+        self._head = (self._head + n) % self.capacity
+        self._count = min(self._count + n, self.capacity)
+        self.total += n
+
+    def _slot(self, back: int) -> int:
+        """Slot of the prediction `back` steps before the newest (0 = newest)."""
+        return (self._head - 1 - back) % self.capacity
+
+    def mark_last(self, actual: float):
+        if self._count:
+            self.actual[self._slot(0)] = actual
+
+    def brier(self, last_n: int = 20) -> Optional[float]:
+        """Mean squared error over the labelled predictions among the last N (None if none)."""
+        total, labelled = 0.0, 0
+        for back in range(min(last_n, self._count)):
+            slot = self._slot(back)
+            actual = self.actual[slot]
+            if actual == actual:  # Not NaN
+                total += (self.p_estimated[slot] - actual) ** 2
+                labelled += 1
+        return total / labelled if labelled else None
+
+    def snapshot(self) -> Dict:
+        """Oldest-first columns as bytes."""
+        slots = [self._slot(back) for back in reversed(range(self._count))]
+        return {"capacity": self.capacity, "total": self.total,
+                **{name: array("d", (getattr(self, name)[i] for i in slots)).tobytes()
+                   for name in ("p_market", "p_estimated", "actual")}}
+
+    def restore(self, state: Dict):
+        p_market, p_estimated, actual = (array("d", state[k]) for k in ("p_market", "p_estimated", "actual"))
+        self.__init__(self.capacity)
+        self.extend(p_market, p_estimated)
+        n = len(self.actual) if len(actual) > self.capacity else len(actual)
+        for back, value in enumerate(reversed(actual[-n:])):
+            self.actual[self._slot(back)] = value
+        self.total = state["total"]
 
 
 class BayesianEstimator:
@@ -16,10 +123,15 @@ class BayesianEstimator:
     based on whether that source was correct.
     """
 
+    STATE_VERSION = 2
+
     def __init__(self, signal_config: Dict):
         self.reliability = dict(signal_config["initial_reliability"])
         self.ema_alpha = signal_config.get("ema_alpha", 0.05)
-        self.prediction_history = []  # Track for Brier score
+        # Track for Brier score (bounded ring, newest history_size predictions)
+        self.prediction_history = PredictionHistory(signal_config.get("history_size", 10_000))
+        # Executed trades' forecasts by trade_id, labelled when each trade closes
+        self.calibration = CalibrationTracker(signal_config.get("calibration_size", 4096))
 
     def estimate(self, p_market: float, signals: Dict[str, Optional[float]]) -> float:
         """
@@ -33,6 +145,14 @@ class BayesianEstimator:
         Returns:
             Posterior probability estimate (0-1)
         """
+        posterior = self._posterior(p_market, signals, self.reliability)
+        
+        # Store for Brier score calculation
+        self.prediction_history.append(p_market, posterior)
+        
+        return posterior
+
+    def _posterior(self, p_market: float, signals: Dict[str, Optional[float]], reliability: Dict[str, float]) -> float:
         posterior = self._clip(p_market)
         
         for source, signal_value in signals.items():
@@ -40,19 +160,80 @@ class BayesianEstimator:
                 continue
             
             signal_value = self._clip(signal_value)
-            rel = self.reliability.get(source, 0.5)
+            rel = reliability.get(source, 0.5)
             
             posterior = self._bayesian_update(posterior, signal_value, rel)
         
-        # Store for Brier score calculation
-        self.prediction_history.append({
-            "p_market": p_market,
-            "p_estimated": posterior,
-            "signals": {k: v for k, v in signals.items() if v is not None}
-        })
-        
         return posterior
 
+    def signal_matrix(self, signals: List[Dict[str, Optional[float]]]) -> Tuple[List[str], "np.ndarray"]:
+        """Signal dicts -> (sources, candidates x sources matrix); NaN where a signal is missing."""
+        sources = list(dict.fromkeys(k for row in signals for k, v in row.items() if v is not None))
+        column = {source: j for j, source in enumerate(sources)}
+        matrix = np.full((len(signals), len(sources)), np.nan)
+        for i, row in enumerate(signals):
+            for source, value in row.items():
+                if value is not None:
+                    matrix[i, column[source]] = value
+        return sources, matrix
+
+    def estimate_batch(self, p_market, signals, sources: Optional[List[str]] = None,
+                       reliability=None, record: bool = True):
+        """
+        Posteriors for many candidates at once.
+
+        Args:
+            p_market: Market-implied probability, scalar or one per candidate
+            signals: candidates x sources matrix (NaN = no signal) with
+                     `sources` naming its columns, or a list of signal dicts
+            reliability: One reliability per column of `sources` (default: the learned ones)
+            record: Add the predictions to prediction_history
+
+        Each update multiplies the odds by LR = P(signal | true) / P(signal | false),
+        so the posterior is a running sum of log-likelihood ratios, clamped to
+        the same [EPSILON, 1 - EPSILON] after every step as estimate(). Sources
+        are applied in column order. Returns a NumPy vector (a list without NumPy).
+        """
+        if np is None:
+            rows = signals if sources is None else [
+                {source: None if v != v else v for source, v in zip(sources, row)} for row in signals]
+            markets = list(p_market) if isinstance(p_market, (list, tuple)) else [p_market] * len(rows)
+            rel = self.reliability if reliability is None else dict(self.reliability, **dict(zip(sources or [], reliability)))
+            posteriors = [self._posterior(p, row, rel) for p, row in zip(markets, rows)]
+            if record and posteriors:
+                self.prediction_history.extend(markets, posteriors)
+            return posteriors
+
+        if sources is None:
+            sources, signals = self.signal_matrix(signals)
+        matrix = np.asarray(signals, dtype=float).reshape(-1, len(sources))
+        n = len(matrix)
+        rel = np.asarray(reliability if reliability is not None
+                         else [self.reliability.get(source, 0.5) for source in sources], dtype=float)
+
+        s = np.clip(matrix, EPSILON, 1 - EPSILON)
+        noise = (1 - rel) * 0.5
+        llr = np.log(s * rel + noise) - np.log((1 - s) * rel + noise)
+        llr[np.isnan(llr)] = 0.0  # Missing signal: no update
+
+        p0 = np.clip(np.broadcast_to(np.asarray(p_market, dtype=float), (n,)), EPSILON, 1 - EPSILON)
+        log_odds = np.log(p0 / (1 - p0))
+        for j in range(llr.shape[1]):
+            log_odds = np.clip(log_odds + llr[:, j], -LOGIT_MAX, LOGIT_MAX)
+        posteriors = 1 / (1 + np.exp(-log_odds))
+
+        if record and n:
+            self.prediction_history.extend(np.broadcast_to(np.asarray(p_market, dtype=float), (n,)), posteriors)
+        return posteriors
+
+    def snapshot_state(self) -> Dict:
+        """Learned reliabilities and prediction history for StateStore."""
+        return {"reliability": dict(self.reliability), "prediction_history": self.prediction_history.snapshot()}
+
+    def restore_state(self, state: Dict):
+        self.reliability.update(state["reliability"])
+        self.prediction_history.restore(state["prediction_history"])
+
     def _bayesian_update(self, prior: float, signal: float, reliability: float) -> float:
         """
         Single Bayesian update step.
@@ -92,6 +273,8 @@ class BayesianEstimator:
             return
         
         actual = 1.0 if outcome == "win" else 0.0
+        if "trade_id" in trade:
+            self.calibration.record_outcome(trade["trade_id"], actual)
         p_bayesian = trade.get("p_bayesian", 0.5)
         side = trade.get("side", "YES")
         
@@ -128,57 +311,178 @@ class BayesianEstimator:
 
     def get_brier_score(self, last_n: int = 20) -> float:
         """
-        Calculate Brier score for last N predictions.
-        Brier = mean((predicted - actual)^2)
-        Lower is better. < 0.20 is well-calibrated.
+        Brier score: mean((predicted - actual)^2). Lower is better, < 0.20 is
+        well-calibrated. O(1) over the resolved trade forecasts in the
+        calibration tracker; until a trade has closed, falls back to the
+        last N labelled predictions in prediction_history.
         """
-        recent = [p for p in self.prediction_history[-last_n:] if "actual" in p]
-        if not recent:
+        brier = self.calibration.brier()
+        if brier is not None:
+            return brier
+        brier = self.prediction_history.brier(last_n)
+        if brier is None:
             return 0.25  # No data, return neutral
-        
-        brier = sum((p["p_estimated"] - p["actual"]) ** 2 for p in recent) / len(recent)
         return brier
 
-    def mark_outcome(self, actual_outcome: float):
-        """Mark the most recent prediction with the actual outcome (0 or 1)."""
-        if self.prediction_history:
-            self.prediction_history[-1]["actual"] = actual_outcome
+    def record_forecast(self, trade: Dict):
+        """Register an executed trade's win probability (and each signal's) for calibration."""
+        short = trade.get("side") in SHORT_SIDES
+        p_win = trade.get("p_bayesian", 0.5)
+        signals = {source: (1 - value if short else value)
+                   for source, value in trade.get("signals_used", {}).items() if value is not None}
+        self.calibration.record_forecast(trade["trade_id"], 1 - p_win if short else p_win, signals)
+
+    def mark_outcome(self, actual_outcome: float, trade_id: Optional[str] = None):
+        """
+        Mark a prediction with the actual outcome (0 or 1): the forecast
+        recorded for trade_id if given, else the most recent prediction.
+        """
+        if trade_id is not None:
+            self.calibration.record_outcome(trade_id, actual_outcome)
+        else:
+            self.prediction_history.mark_last(actual_outcome)
+
+    def get_calibration_report(self) -> Dict:
+        """Brier/log-loss, reliability diagram and per-signal scores over tracked trades."""
+        return {**self.calibration.get_stats(),
+                "reliability_diagram": self.calibration.reliability_diagram(),
+                "signals": self.calibration.signal_scores()}
 
     def get_reliability_report(self) -> Dict[str, float]:
         """Get current reliability scores for all sources."""
         return dict(self.reliability)
 
     @staticmethod
-    def _clip(p: float, epsilon: float = 0.001) -> float:
+    def _clip(p: float, epsilon: float = EPSILON) -> float:
         """Clip probability to avoid 0 and 1 (which break Bayes)."""
         return max(epsilon, min(1 - epsilon, p))
 
 
+# Context keys never sent to the analyzer (bulky raw data the model doesn't need)
+PROMPT_DROP_KEYS = ("candles", "raw", "bids", "asks", "signals_used")
+
+
+def compact_context(value, max_list: int = 10):
+    """Prompt-sized copy of a context: drop raw fields and long lists, round floats."""
+    if isinstance(value, dict):
+        return {k: compact_context(v, max_list) for k, v in value.items()
+                if k not in PROMPT_DROP_KEYS and not (isinstance(v, list) and len(v) > max_list)}
+    if isinstance(value, list):
+        return [compact_context(v, max_list) for v in value]
+    if isinstance(value, float):
+        return float(f"{value:.6g}")
+    return value
+
+
+def _bucket(value, step: float):
+    return None if value is None else round(float(value) / step)
+
+
 class DeepSeekAnalyzer:
     """
     Hook for DeepSeek V3.2 for complex trade validation.
+
+    Responses are cached by a feature fingerprint (product, trigger type and
+    bucketed z-score / RSI / p_bayesian) for `cache_ttl` seconds, LRU-bounded
+    to `cache_size` entries; concurrent identical requests share one HTTP
+    call. Prompts carry a compact context (no candles / raw book, rounded
+    floats) and go through one pooled requests.Session.
     """
-    def __init__(self, secrets_path: str = "/home/openclaw/.secrets/deepseek.json"):
-        with open(secrets_path) as f:
-            secrets = json.load(f)
-        self.api_key = secrets["api_key"]
-        self.base_url = secrets.get("base_url", "https://api.deepseek.com/v1")
 
-    def validate_trade(self, context: Dict) -> Dict:
-        """
-        Send trade context to DeepSeek for validation.
-        """
+    Z_BUCKET = 0.25
+    RSI_BUCKET = 5.0
+    P_BUCKET = 0.02
+
+    def __init__(self, secrets_path: str = "/home/openclaw/.secrets/deepseek.json",
+                 api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 cache_ttl: float = 300.0, cache_size: int = 512, timeout: float = 30):
+        if api_key is None:
+            with open(secrets_path) as f:
+                secrets = json.load(f)
+            api_key = secrets["api_key"]
+            base_url = base_url or secrets.get("base_url")
+        self.api_key = api_key
+        self.base_url = base_url or "https://api.deepseek.com/v1"
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.timeout = timeout
+
         import requests
-        headers = {
+        self.session = requests.Session()
+        self.session.headers.update({
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
-        }
-        
+        })
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=16)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._cache: "OrderedDict[tuple, Tuple[float, Dict]]" = OrderedDict()
+        self._inflight: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "hits": 0, "misses": 0, "coalesced": 0, "errors": 0,
+                      "call_time": 0.0, "prompt_chars": 0}
+
+    def fingerprint(self, context: Dict) -> tuple:
+        """Cache key: what the verdict depends on, bucketed so near-identical setups share it."""
+        data = context.get("market_data", {})
+        trigger = context.get("trigger", {})
+        z = data.get("z_score")
+        if z is None and data.get("std_20"):
+            z = (data.get("market_price", 0) - data.get("ma_20", 0)) / data["std_20"]
+        return (
+            data.get("product_id"),
+            trigger.get("type"),
+            _bucket(z, self.Z_BUCKET),
+            _bucket(data.get("rsi_14"), self.RSI_BUCKET),
+            _bucket(context.get("p_bayesian"), self.P_BUCKET),
+        )
+
+    def validate_trade(self, context: Dict) -> Dict:
+        """
+        Send trade context to DeepSeek for validation (cached, coalesced).
+        """
+        key = self.fingerprint(context)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return dict(entry[1])
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            return dict(future.result())
+
+        failed = False
+        try:
+            result = self._request(context)
+        except Exception as e:
+            failed = True
+            result = {"approved": False, "confidence": 0, "reason": f"API Error: {str(e)}"}
+        with self._lock:
+            del self._inflight[key]
+            if failed:
+                self.stats["errors"] += 1  # Not cached: the next lookup retries
+            else:
+                self._cache[key] = (time.monotonic() + self.cache_ttl, result)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        future.set_result(result)
+        return dict(result)
+
+    def _request(self, context: Dict) -> Dict:
         prompt = f"""You are a Senior Trading Quantitative Researcher. 
 Validate the following trade opportunity. 
 
 Context:
-{json.dumps(context, indent=2)}
+{json.dumps(compact_context(context), separators=(",", ":"))}
 
 Analyze:
 1. Is the entry logic sound?
@@ -187,18 +491,35 @@ Analyze:
 
 Output JSON only with fields: 'approved' (bool), 'confidence' (float), 'reason' (string)."""
 
+        start = time.monotonic()
         try:
-            resp = requests.post(
+            resp = self.session.post(
                 f"{self.base_url}/chat/completions",
-                headers=headers,
                 json={
                     "model": "deepseek-chat", # Placeholder for v3.2
                     "messages": [{"role": "user", "content": prompt}],
                     "response_format": {"type": "json_object"}
                 },
-                timeout=30
+                timeout=self.timeout
             )
+            resp.raise_for_status()
             data = resp.json()
             return json.loads(data["choices"][0]["message"]["content"])
-        except Exception as e:
-            return {"approved": False, "confidence": 0, "reason": f"API Error: {str(e)}"}
+        finally:
+            with self._lock:
+                self.stats["calls"] += 1
+                self.stats["call_time"] += time.monotonic() - start
+                self.stats["prompt_chars"] += len(prompt)
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats, cached=len(self._cache), inflight=len(self._inflight))
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = (stats["hits"] + stats["coalesced"]) / lookups if lookups else 0.0
+        stats["avg_call_ms"] = stats["call_time"] / stats["calls"] * 1000 if stats["calls"] else 0.0
+        stats["avg_prompt_chars"] = stats["prompt_chars"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
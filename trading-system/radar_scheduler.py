@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Radar Scheduler
+Event-driven re-evaluation for the radars. Instead of rescanning every product
+on a fixed 60s loop, a product is re-evaluated when something about it changes:
+a top-of-book move reported by MarketDataFeed, or a candle closing.
+
+- Debounce: the first event for a product opens a `debounce` window; further
+  events inside it are coalesced into the same evaluation.
+- min_interval: a product is never re-evaluated more often than this.
+- Back-pressure: at most one pending entry per product, so a slow handler makes
+  events coalesce rather than queue up; max_batch caps one handler call.
+- max_idle: products without events are still refreshed this often, which keeps
+  the old 60s cadence when there is no feed (REST-only).
+
+Latency is measured from the first market event behind an evaluation to the
+handler returning, i.e. event -> evaluate_opportunity decision.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+from coinbase_client import GRANULARITY_SECONDS
+from indicators import percentile
+
+# Reasons that count as market events for the latency metric
+MARKET_REASONS = ("book", "ticker", "candle")
+
+
+class _Pending:
+    __slots__ = ("first_event", "due", "reasons")
+
+    def __init__(self, due: float, first_event: Optional[float], reason: str):
+        self.due = due
+        self.first_event = first_event
+        self.reasons = {reason}
+
+
+class RadarScheduler:
+    """
+    Calls handler(product_ids) with batches of products that have due events.
+    notify() is thread-safe and cheap, so it can be registered directly as a
+    MarketDataFeed listener.
+    """
+
+    def __init__(self, handler: Callable[[List[str]], object], product_ids: Iterable[str],
+                 debounce: float = 0.5, min_interval: float = 5.0, max_idle: float = 60.0,
+                 candle_granularity: Optional[str] = "FIFTEEN_MINUTE", candle_grace: float = 3.0,
+                 max_batch: int = 50, latency_window: int = 2000):
+        self.handler = handler
+        self.product_ids = list(product_ids)
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self.max_idle = max_idle
+        self.candle_seconds = GRANULARITY_SECONDS.get(candle_granularity) if candle_granularity else None
+        self.candle_grace = candle_grace
+        self.max_batch = max_batch
+
+        self._pending: Dict[str, _Pending] = {}
+        self._last_eval: Dict[str, float] = {}
+        self._latencies = deque(maxlen=latency_window)
+        self._cond = threading.Condition()
+        self._running = False
+        self._next_candle = self._candle_boundary(time.time())
+
+        self.stats = {"events": 0, "coalesced": 0, "evaluations": 0, "batches": 0,
+                      "candle_closes": 0, "idle_refreshes": 0, "errors": 0, "max_backlog": 0}
+
+    # ─── Events ───
+
+    def notify(self, product_id: str, reason: str = "book", event_time: Optional[float] = None):
+        """Record an event for a product. event_time is time.monotonic() (default: now)."""
+        now = time.monotonic()
+        with self._cond:
+            self.stats["events"] += 1
+            self._enqueue(product_id, reason, now if event_time is None else event_time, now)
+            self._cond.notify()
+
+    def _enqueue(self, product_id: str, reason: str, event_time: float, now: float):
+        market = reason in MARKET_REASONS
+        pending = self._pending.get(product_id)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            pending.reasons.add(reason)
+            if market and (pending.first_event is None or event_time < pending.first_event):
+                pending.first_event = event_time
+            return
+
+        delay = self.debounce if market else 0.0
+        last = self._last_eval.get(product_id)
+        due = now + delay if last is None else max(now + delay, last + self.min_interval)
+        self._pending[product_id] = _Pending(due, event_time if market else None, reason)
+        self.stats["max_backlog"] = max(self.stats["max_backlog"], len(self._pending))
+
+    def _candle_boundary(self, wall: float) -> Optional[float]:
+        """Wall-clock time of the next candle close (plus grace for the API to finalize it)."""
+        if not self.candle_seconds:
+            return None
+        return (int(wall) // self.candle_seconds + 1) * self.candle_seconds + self.candle_grace
+
+    def _fire_timers(self, now: float):
+        """Candle closes and idle refreshes. Caller holds the lock."""
+        wall = time.time()
+        if self._next_candle is not None and wall >= self._next_candle:
+            self.stats["candle_closes"] += 1
+            for pid in self.product_ids:
+                self._enqueue(pid, "candle", now, now)
+            self._next_candle = self._candle_boundary(wall)
+
+        for pid in self.product_ids:
+            if pid not in self._pending and now - self._last_eval.get(pid, now) >= self.max_idle:
+                self.stats["idle_refreshes"] += 1
+                self._enqueue(pid, "idle", now, now)
+
+    # ─── Loop ───
+
+    def run(self, should_run: Optional[Callable[[], bool]] = None, poll: float = 1.0):
+        """
+        Evaluate every product once, then react to events until stop()
+        (or until should_run() returns False, checked at least every `poll` seconds).
+        """
+        self._running = True
+        with self._cond:
+            now = time.monotonic()
+            for pid in self.product_ids:
+                self._enqueue(pid, "start", now, now)
+
+        while self._running and (should_run is None or should_run()):
+            batch = self._next_batch(poll)
+            if batch:
+                self._evaluate(batch)
+        self._running = False
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def _next_batch(self, poll: float) -> List:
+        with self._cond:
+            now = time.monotonic()
+            self._fire_timers(now)
+            ready = sorted((p.due, pid) for pid, p in self._pending.items() if p.due <= now)
+            if ready:
+                return [(pid, self._pending.pop(pid)) for _, pid in ready[:self.max_batch]]
+
+            wait = poll
+            if self._pending:
+                wait = min(wait, min(p.due for p in self._pending.values()) - now)
+            if self._next_candle is not None:
+                wait = min(wait, self._next_candle - time.time())
+            self._cond.wait(max(wait, 0.001))
+            return []
+
+    def _evaluate(self, batch: List):
+        try:
+            self.handler([pid for pid, _ in batch])
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"⚠️ Scheduler handler error: {type(e).__name__}: {e}", flush=True)
+
+        done = time.monotonic()
+        with self._cond:
+            self.stats["evaluations"] += len(batch)
+            self.stats["batches"] += 1
+            for pid, pending in batch:
+                self._last_eval[pid] = done
+                if pending.first_event is not None:
+                    self._latencies.append(done - pending.first_event)
+
+    # ─── Metrics ───
+
+    def get_stats(self) -> Dict:
+        with self._cond:
+            latencies = sorted(self._latencies)
+            stats = dict(self.stats, pending=len(self._pending))
+        stats["latency_p50_ms"] = percentile(latencies, 50) * 1000
+        stats["latency_p99_ms"] = percentile(latencies, 99) * 1000
+        stats["latency_max_ms"] = (latencies[-1] if latencies else 0.0) * 1000
+        return stats
@@ -6,6 +6,7 @@ Circuit breakers, drawdown control, daily limits.
 
 import math
 import time
+from array import array
 from typing import Dict, List
 from datetime import datetime, timezone
 
@@ -16,6 +17,8 @@ class RiskManager:
     This is the last line of defense before capital destruction.
     """
 
+    STATE_VERSION = 1
+
     def __init__(self, risk_config: Dict):
         self.config = risk_config
         self.daily_pnl = 0.0
@@ -163,6 +166,33 @@ class RiskManager:
             self.weekly_pnl = 0.0
             self.last_reset_week = week_key
 
+    # ─── State snapshot ───
+
+    def snapshot_state(self) -> Dict:
+        """Counters, pause and portfolio history (as two float arrays) for StateStore."""
+        return {
+            "daily_pnl": self.daily_pnl,
+            "weekly_pnl": self.weekly_pnl,
+            "consecutive_losses": self.consecutive_losses,
+            "last_reset_day": self.last_reset_day,
+            "last_reset_week": self.last_reset_week,
+            "pause_until": self.pause_until,
+            "history_t": array("d", (h["timestamp"] for h in self.portfolio_history)),
+            "history_v": array("d", (h["value"] for h in self.portfolio_history)),
+            "alerts": list(self.alerts),
+        }
+
+    def restore_state(self, state: Dict):
+        self.daily_pnl = state["daily_pnl"]
+        self.weekly_pnl = state["weekly_pnl"]
+        self.consecutive_losses = state["consecutive_losses"]
+        self.last_reset_day = state["last_reset_day"]
+        self.last_reset_week = state["last_reset_week"]
+        self.pause_until = state["pause_until"]
+        self.portfolio_history = [{"timestamp": t, "value": v}
+                                  for t, v in zip(state["history_t"], state["history_v"])]
+        self.alerts = list(state["alerts"])  # A snapshot from yesterday is reset by check_trade
+
     def get_alerts(self) -> List[Dict]:
         """Get and clear pending alerts."""
         alerts = list(self.alerts)
@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+"""
+Scanner Service
+The one scanner behind every radar variant (radar.py, radar_simple.py,
+radar_v22.py, radar_v23.py). A scan is:
+
+    source.prepare -> fetch (serial | threads | asyncio) -> BatchScanner
+    -> signal pre-filter -> TradingEngine.evaluate_batch -> alert sinks
+
+Pluggable pieces:
+- Data sources: RestSource (REST poll + CandleStore delta fetches),
+  FeedSource (books from a MarketDataFeed, live websocket or replayed
+  recording), ReplaySource (recorded scan snapshots, fully offline) and
+  SwarmSource (the ScoutSwarm scan radar.py used).
+- Alert sinks: anything with send(channel_id, message) — see alerts.py
+  (DiscordSink, StdoutSink, MemorySink, and AlertDispatcher to keep
+  delivery off the scan path).
+- Concurrency: "serial", "threads" (pooled) or "asyncio" (AsyncCoinbaseClient).
+
+run() schedules scans with radar_scheduler.RadarScheduler. Benchmark: bench_scanner.py.
+With state_path, engine/risk/estimator (and the source's own state, e.g. scout
+price history) are restored at startup and checkpointed after scans
+(state_store.StateStore). Each radar needs its own state_path: a snapshot
+holds one strategy's positions, risk counters and reliabilities.
+"""
+
+import json
+import threading
+import time
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from batch_scanner import BatchScanner
+from candle_store import CandleStore
+from indicators import percentile
+from radar_scheduler import RadarScheduler
+from state_store import StateStore
+
+PRODUCTS = [
+    "BTC-USD", "ETH-USD", "SOL-USD", "XRP-USD",
+    "ADA-USD", "AVAX-USD", "LINK-USD", "DOT-USD", "DOGE-USD"
+]
+
+CHANNELS = {
+    "signals": "1470434240108957969",
+    "executor": "1469873664265818115",
+    "live_trades": "1470434241723502770",
+    "journal": "1470434243304751148"
+}
+
+MODES = ("serial", "threads", "asyncio")
+
+
+# ─── Data sources ───
+
+class RestSource:
+    """Tickers over REST (product snapshot + book), candles through a CandleStore."""
+
+    def __init__(self, client, async_client=None, candle_store: CandleStore = None,
+                 granularity: str = "FIFTEEN_MINUTE", candle_limit: int = 50):
+        self.client = client
+        self.async_client = async_client
+        self.candles = candle_store if candle_store is not None else CandleStore(client)
+        self.granularity = granularity
+        self.candle_limit = candle_limit
+
+    @property
+    def supports_async(self) -> bool:
+        return self.async_client is not None
+
+    def start(self):
+        pass
+
+    def attach(self, notify: Callable[[str, str], None]):
+        """Register a scheduler callback for market events (REST has none)."""
+
+    def prepare(self, product_ids: List[str]):
+        # One metadata call for the whole scan (analyze_ticker reads from it)
+        self.client.get_products_snapshot(product_ids)
+
+    async def prepare_async(self, product_ids: List[str]):
+        await self.async_client.get_products_snapshot(product_ids)
+
+    def fetch(self, product_id: str) -> Optional[Tuple[Dict, List[Dict]]]:
+        ticker = self.client.analyze_ticker(product_id)
+        if "error" in ticker:
+            return None
+        candles = self.candles.get_recent(product_id, self.granularity, self.candle_limit,
+                                          last_price=ticker["market_price"])
+        return ticker, candles
+
+    async def fetch_async(self, product_id: str) -> Optional[Tuple[Dict, List[Dict]]]:
+        ticker = await self.async_client.analyze_ticker(product_id)
+        if "error" in ticker:
+            return None
+        candles = await self.candles.get_recent_async(
+            self.async_client, product_id, self.granularity, self.candle_limit,
+            last_price=ticker["market_price"]
+        )
+        return ticker, candles
+
+    def status(self) -> str:
+        return ""
+
+    def close(self):
+        pass
+
+
+class FeedSource(RestSource):
+    """
+    RestSource whose books come from a MarketDataFeed (falling back to REST
+    when the feed is stale). Book moves are forwarded to the scheduler.
+    """
+
+    def __init__(self, client, feed, async_client=None, candle_store: CandleStore = None, **kwargs):
+        super().__init__(client, async_client, candle_store, **kwargs)
+        self.feed = feed
+        client.book_source = feed
+        if async_client is not None:
+            async_client.book_source = feed
+
+    def start(self):
+        self.feed.start()
+
+    def attach(self, notify: Callable[[str, str], None]):
+        self.feed.add_listener(notify)
+
+    def status(self) -> str:
+        stats = self.feed.get_stats()
+        return f"Feed: {stats['synced_products']} synced, {stats['gaps']} gaps"
+
+    def close(self):
+        self.feed.stop()
+
+
+class ReplaySource:
+    """
+    Offline source: plays back (ticker, candles) snapshots recorded with
+    ScannerService(record_path=...), one JSON object per line. Each fetch
+    returns the product's next snapshot; with loop=True playback wraps around.
+    """
+
+    supports_async = False
+    finite = True
+
+    def __init__(self, path: str, loop: bool = False):
+        self.loop = loop
+        self._snapshots: Dict[str, List[Dict]] = {}
+        self._position: Dict[str, int] = {}
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._snapshots.setdefault(record["product_id"], []).append(record)
+
+    @property
+    def product_ids(self) -> List[str]:
+        return list(self._snapshots)
+
+    @property
+    def exhausted(self) -> bool:
+        return not self.loop and all(
+            self._position.get(pid, 0) >= len(records) for pid, records in self._snapshots.items()
+        )
+
+    def start(self):
+        pass
+
+    def attach(self, notify: Callable[[str, str], None]):
+        pass
+
+    def prepare(self, product_ids: List[str]):
+        pass
+
+    def fetch(self, product_id: str) -> Optional[Tuple[Dict, List[Dict]]]:
+        records = self._snapshots.get(product_id)
+        if not records:
+            return None
+        i = self._position.get(product_id, 0)
+        if i >= len(records):
+            if not self.loop:
+                return None
+            i = 0
+        self._position[product_id] = i + 1
+        return dict(records[i]["ticker"]), records[i]["candles"]
+
+    def status(self) -> str:
+        return ""
+
+    def close(self):
+        pass
+
+
+class SwarmSource:
+    """
+    ScoutSwarm-backed source (radar.py): one full_scan per batch under a hard
+    timeout (a backstop; the swarm enforces its own, shorter scan deadline and
+    returns partial results), then per-product tickers and ScoutBeta's cached
+    candles. After consecutive timeouts the next swarm scan is held back an
+    extra 5s per timeout (max 30s) so LM Studio can recover.
+    """
+
+    supports_async = False
+    BACKOFF_STEP = 5.0
+    MAX_BACKOFF = 30.0
+
+    def __init__(self, swarm, timeout: float = 45.0):
+        self.swarm = swarm
+        self.timeout = timeout
+        self.results: Dict = {}
+        self.consecutive_timeouts = 0
+        self._tickers: Dict[str, Dict] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._future = None
+        self._closed = threading.Event()
+
+    def start(self):
+        pass
+
+    def attach(self, notify: Callable[[str, str], None]):
+        pass
+
+    def prepare(self, product_ids: List[str]):
+        # A timed-out scan keeps running in the worker; don't stack another behind it
+        if self._future is not None and not self._future.done():
+            self.results = {"opportunities": [], "sentiment": 0.5, "timeout": True}
+        else:
+            if self.consecutive_timeouts:
+                # Same extra delay the old radar loop slept after timeouts
+                self._closed.wait(min(self.consecutive_timeouts * self.BACKOFF_STEP, self.MAX_BACKOFF))
+            self._future = self._executor.submit(self.swarm.full_scan, product_ids)
+            try:
+                self.results = self._future.result(timeout=self.timeout)
+            except FutureTimeout:
+                print(f"⚠️ SCAN TIMEOUT: Scout swarm exceeded {self.timeout}s - forcing continuation")
+                self.results = {"opportunities": [], "sentiment": 0.5, "timeout": True}
+            except Exception as e:
+                print(f"⚠️ SCAN ERROR: {e}")
+                self.results = {"opportunities": [], "sentiment": 0.5, "error": True}
+
+        if self.results.get("timeout"):
+            self.consecutive_timeouts += 1
+            if self.consecutive_timeouts >= 3:
+                print(f"⚠️ {self.consecutive_timeouts} consecutive timeouts - LM Studio may be down")
+        else:
+            self.consecutive_timeouts = 0
+        self._tickers = {o["product_id"]: o for o in self.results.get("opportunities", [])}
+
+    def fetch(self, product_id: str) -> Optional[Tuple[Dict, List[Dict]]]:
+        ticker = self._tickers.get(product_id)
+        if ticker is None:
+            return None
+        return ticker, self.swarm.beta.candles.recent(product_id, "FIFTEEN_MINUTE", 50)
+
+    def status(self) -> str:
+        status = f"Sentiment: {self.results.get('sentiment', 0.5):.2f}"
+        degraded = [f"{name}={state}" for name, state in self.results.get("scout_status", {}).items()
+                    if state != "ok"]
+        if degraded:
+            return status + f" ⚠️PARTIAL ({', '.join(degraded)})"
+        return status + (" ⚠️TIMEOUT" if self.results.get("timeout") else "")
+
+    def state_components(self) -> Dict:
+        return {"scouts": self.swarm.alpha.price_history}
+
+    def close(self):
+        self._closed.set()
+        self._executor.shutdown(wait=False)
+
+
+# ─── Service ───
+
+class ScannerService:
+    """
+    Scans products through a data source and alerts on gated signals.
+    engine=None skips the gates and reports pre-filter signals only.
+    prefilter=False hands every ticker to the engine (radar.py behaviour).
+
+    Alerts are edge-triggered: once a product alerts on a side, it isn't
+    re-evaluated (no analyzer call, no alert) until its Gate 2 trigger clears
+    or flips, or `alert_cooldown` seconds pass. Event-driven rescans every
+    few seconds would otherwise repeat the same signal.
+    """
+
+    # Radar pre-filter, stricter than the engine's own Gate 2 trigger
+    SIGNAL_Z = 2.0
+    SIGNAL_BUY_RSI = 35
+    SIGNAL_SELL_RSI = 65
+
+    def __init__(self, source, engine=None, sinks: Iterable = (), channels: Dict[str, str] = None,
+                 mode: str = "serial", max_workers: int = 8, prefilter: bool = True,
+                 product_ids: List[str] = None, record_path: str = None,
+                 status_interval: float = 60.0, on_scan: Callable[[Dict], None] = None,
+                 latency_window: int = 1000, state_path: str = None, checkpoint_every: float = 60.0,
+                 alert_cooldown: float = 60.0):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        if mode == "asyncio" and not source.supports_async:
+            raise ValueError("asyncio mode needs a source with an async client")
+        self.source = source
+        self.engine = engine
+        self.sinks = list(sinks)
+        self.channels = channels or CHANNELS
+        self.mode = mode
+        self.max_workers = max_workers
+        self.prefilter = prefilter
+        self.product_ids = list(product_ids or PRODUCTS)
+        self.record_path = record_path
+        self.status_interval = status_interval
+        self.on_scan = on_scan
+        self.alert_cooldown = alert_cooldown  # Default matches the scheduler's max_idle rescan
+        self.batch = BatchScanner(trigger_z=self.SIGNAL_Z, buy_max_rsi=self.SIGNAL_BUY_RSI,
+                                  sell_min_rsi=self.SIGNAL_SELL_RSI)
+        self.scheduler = None
+
+        self._pool = None
+        self._loop = None
+        self._latencies = deque(maxlen=latency_window)
+        self._latest: Dict[str, float] = {}
+        self._alerted: Dict[str, Tuple[str, float]] = {}  # product_id -> (side, monotonic time of alert)
+        self._last_status = time.time()
+        self.stats = {"scans": 0, "products": 0, "signals": 0, "triggers": 0, "errors": 0, "scan_time": 0.0,
+                      "suppressed": 0}
+
+        # Warm start: resume positions, risk counters and learned state from the last checkpoint
+        self.state = None
+        if state_path:
+            self.state = StateStore(state_path, interval=checkpoint_every)
+            if hasattr(engine, "state_components"):
+                self.state.register_all(engine.state_components())
+            if hasattr(source, "state_components"):
+                self.state.register_all(source.state_components())
+            self.state.restore()
+
+    # ─── Scanning ───
+
+    def scan(self, product_ids: List[str] = None) -> Dict:
+        """One scan over product_ids (default: all). Returns opportunities and triggers."""
+        product_ids = list(product_ids or self.product_ids)
+        start = time.perf_counter()
+
+        rows = self._fetch_all(product_ids)
+        tickers = [ticker for ticker, _ in rows]
+        opportunities, signalled = self.batch.scan(tickers, [candles for _, candles in rows])
+        for ticker in opportunities:
+            self._set_signal(ticker)
+            self._latest[ticker["product_id"]] = ticker["market_price"]
+
+        candidates = signalled if self.prefilter else opportunities
+        triggered = self._evaluate(self._unalerted(opportunities, candidates))
+
+        elapsed = time.perf_counter() - start
+        self._latencies.append(elapsed)
+        self.stats["scans"] += 1
+        self.stats["products"] += len(product_ids)
+        self.stats["signals"] += len(signalled)
+        self.stats["triggers"] += len(triggered)
+        self.stats["scan_time"] += elapsed
+
+        result = {"opportunities": opportunities, "triggered": triggered, "elapsed": elapsed}
+        if self.state is not None:
+            self.state.maybe_checkpoint()
+        if self.on_scan is not None:
+            self.on_scan(result)
+        if time.time() - self._last_status >= self.status_interval:
+            self._last_status = time.time()
+            self.print_status()
+        return result
+
+    def _fetch_all(self, product_ids: List[str]) -> List[Tuple[Dict, List[Dict]]]:
+        if self.mode == "asyncio":
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            rows = self._loop.run_until_complete(self._fetch_async(product_ids))
+        else:
+            self.source.prepare(product_ids)
+            if self.mode == "threads":
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scan")
+                rows = list(self._pool.map(self._safe_fetch, product_ids))
+            else:
+                rows = [self._safe_fetch(pid) for pid in product_ids]
+
+        rows = [row for row in rows if row is not None]
+        if self.record_path:
+            with open(self.record_path, "a") as f:
+                for ticker, candles in rows:
+                    f.write(json.dumps({"product_id": ticker["product_id"], "ticker": ticker,
+                                        "candles": candles}) + "\n")
+        return rows
+
+    def _safe_fetch(self, product_id: str):
+        try:
+            return self.source.fetch(product_id)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"  Error scanning {product_id}: {e}", flush=True)
+            return None
+
+    async def _fetch_async(self, product_ids: List[str]):
+        await self.source.prepare_async(product_ids)
+        results = await asyncio.gather(
+            *(self.source.fetch_async(pid) for pid in product_ids), return_exceptions=True
+        )
+        rows = []
+        for pid, result in zip(product_ids, results):
+            if isinstance(result, Exception):
+                self.stats["errors"] += 1
+                print(f"  Error scanning {pid}: {result}", flush=True)
+            else:
+                rows.append(result)
+        return rows
+
+    @staticmethod
+    def _set_signal(ticker: Dict):
+        """Radar signal fields from BatchScanner's trigger_type."""
+        if ticker["trigger_type"] == "MEAN_REVERSION_BUY":
+            ticker["signal"] = "BUY"
+            ticker["strength"] = abs(ticker["z_score"])
+        elif ticker["trigger_type"] == "TREND_EXHAUSTION_SELL":
+            ticker["signal"] = "SELL"
+            ticker["strength"] = ticker["z_score"]
+        else:
+            ticker["signal"] = None
+            ticker["strength"] = 0
+
+    def _unalerted(self, opportunities: List[Dict], candidates: List[Dict]) -> List[Dict]:
+        """
+        Forget alerts whose trigger has cleared or flipped side, then drop
+        candidates still covered by a recent alert on the same side.
+        """
+        if self.engine is None or not self._alerted:
+            return candidates
+        now = time.monotonic()
+        for ticker in opportunities:
+            alerted = self._alerted.get(ticker["product_id"])
+            if alerted is not None and (self.engine.trigger_side(ticker) != alerted[0]
+                                        or now - alerted[1] >= self.alert_cooldown):
+                del self._alerted[ticker["product_id"]]
+        fresh = [opp for opp in candidates if opp["product_id"] not in self._alerted]
+        self.stats["suppressed"] += len(candidates) - len(fresh)
+        return fresh
+
+    def _evaluate(self, candidates: List[Dict]) -> List[Tuple[Dict, Dict]]:
+        """Run the gates over the whole candidate set (top-K by edge reach the analyzer) and alert on passes."""
+        if self.engine is None or not candidates:
+            return [(opp, {}) for opp in candidates]
+        try:
+            batch = self.engine.evaluate_batch(candidates)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"  Error evaluating {len(candidates)} candidates: {e}", flush=True)
+            return []
+        triggered = []
+        for i in batch.passed:
+            details = batch.details(i)
+            triggered.append((candidates[i], details))
+            self.alert(candidates[i], details)
+        return triggered
+
+    # ─── Alerts ───
+
+    def alert(self, opp: Dict, details: Dict):
+        pid = opp["product_id"]
+        side = details.get("side", opp.get("signal") or "?")
+        signal_msg = (
+            f"📡 **SIGNAL: {side} {pid}**\n"
+            f"Price: ${opp['market_price']:,.2f}\n"
+            f"Z-Score: {opp['z_score']:.2f} | RSI: {opp['rsi_14']:.1f}\n"
+            f"Target: ${details.get('target', 0):,.2f} | Stop: ${details.get('stop', 0):,.2f}"
+        )
+        exec_msg = (
+            f"🚨 **TRADE: {side} {pid}** @ ${opp['market_price']:,.2f}\n"
+            f"Math: Z={opp['z_score']:.2f}, RSI={opp['rsi_14']:.1f}\n"
+            f"Target: ${details.get('target', 0):,.2f} | Stop: ${details.get('stop', 0):,.2f}\n"
+            f"Mode: {getattr(self.engine, 'mode', 'paper')}"
+        )
+        self._alerted[pid] = (side, time.monotonic())
+        for sink in self.sinks:
+            sink.send(self.channels["signals"], signal_msg)
+            sink.send(self.channels["executor"], exec_msg)
+        print(f"🔥 ALERT: {side} {pid} @ ${opp['market_price']:,.2f}", flush=True)
+
+    # ─── Loop ───
+
+    def run(self, should_run: Callable[[], bool] = None, **scheduler_kwargs):
+        """
+        Scan every product once, then rescan products on source events
+        (book moves, candle closes) and at least every 60s. Blocks until
+        should_run() is False or stop() is called. Finite sources (replays)
+        are scanned back to back until exhausted instead.
+        """
+        try:
+            if getattr(self.source, "finite", False):
+                while not self.source.exhausted and (should_run is None or should_run()):
+                    self.scan()
+                return
+            self.scheduler = RadarScheduler(self.scan, self.product_ids, **scheduler_kwargs)
+            self.source.attach(self.scheduler.notify)
+            self.source.start()
+            self.scheduler.run(should_run=should_run)
+        finally:
+            self.close()
+
+    def stop(self):
+        if self.scheduler is not None:
+            self.scheduler.stop()
+
+    def close(self):
+        if self.state is not None:
+            self.state.checkpoint()
+        self.source.close()
+        for sink in self.sinks:
+            if hasattr(sink, "close"):
+                sink.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        if self._loop is not None:
+            async_client = getattr(self.source, "async_client", None)
+            if async_client is not None:
+                self._loop.run_until_complete(async_client.close())
+            self._loop.close()
+            self._loop = None
+
+    # ─── Metrics ───
+
+    def reset_stats(self):
+        self._latencies.clear()
+        for key in self.stats:
+            self.stats[key] = 0.0 if key == "scan_time" else 0
+
+    def get_stats(self) -> Dict:
+        latencies = sorted(self._latencies)
+        stats = dict(self.stats, mode=self.mode)
+        stats["scans_per_sec"] = self.stats["scans"] / self.stats["scan_time"] if self.stats["scan_time"] else 0.0
+        stats["scan_p50_ms"] = percentile(latencies, 50) * 1000
+        stats["scan_p99_ms"] = percentile(latencies, 99) * 1000
+        if self.scheduler is not None:
+            stats["scheduler"] = self.scheduler.get_stats()
+        alerts = [sink.get_stats() for sink in self.sinks if hasattr(sink, "get_stats")]
+        if alerts:
+            stats["alerts"] = alerts
+        if hasattr(self.engine, "get_gate_stats"):
+            stats["gates"] = self.engine.get_gate_stats()
+        if self.state is not None:
+            stats["state"] = self.state.get_stats()
+        return stats
+
+    def print_status(self):
+        stats = self.get_stats()
+        btc = self._latest.get("BTC-USD")
+        eth = self._latest.get("ETH-USD")
+        line = (
+            f"[{datetime.now().strftime('%H:%M:%S')}] BTC: {f'${btc:,.0f}' if btc else 'N/A'} | "
+            f"ETH: {f'${eth:,.0f}' if eth else 'N/A'} | Scans: {stats['scans']} | "
+            f"Triggers: {stats['triggers']} | Scan p50/p99: {stats['scan_p50_ms']:.0f}/{stats['scan_p99_ms']:.0f}ms"
+        )
+        if "scheduler" in stats:
+            line += f" | Event latency p50: {stats['scheduler']['latency_p50_ms']:.0f}ms"
+        for alerts in stats.get("alerts", []):
+            line += f" | Alert queue: {alerts['queue_depth']} (dropped {alerts['dropped']})"
+        slowest = max(stats.get("gates", {}).items(), key=lambda kv: kv[1]["p99_ms"], default=None)
+        if slowest and slowest[1]["runs"]:
+            line += f" | Slowest gate: {slowest[0]} p99 {slowest[1]['p99_ms']:.0f}ms"
+        source_status = self.source.status()
+        print(line + (f" | {source_status}" if source_status else ""), flush=True)
@@ -6,16 +6,25 @@ Scout Module v5.1 — Crypto-Only Pivot (LM Studio Timeout Fix)
 ScoutAlpha: Crypto Momentum (price changes, volume spikes)
 ScoutBeta: Crypto Orderbook (Coinbase depth, spread) - NO LM Studio dependency
 ScoutGamma: Sentiment (news/social classification) - LM Studio with circuit breaker
+LM Studio calls go through one shared, deadline-cancelling LLMExecutor (llm_executor.py),
+Coinbase market data through the process-wide MarketDataCache (market_cache.py)
+ScoutSwarm: fans all of them out concurrently under one scan deadline
 """
 
+import re
 import json
 import time
-import requests
+import asyncio
 import threading
 from typing import Dict, List, Optional
 from datetime import datetime, timezone
 from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 
+from indicators import IndicatorState
+from llm_executor import LLMExecutor, get_llm_executor
+from market_cache import get_market_cache
+from price_history import HORIZONS, PriceHistoryStore
+
 
 class CircuitBreaker:
     """Circuit breaker pattern for LM Studio calls."""
@@ -58,90 +67,77 @@ class ScoutAlpha:
     Job: Track price momentum, volume changes, multi-timeframe analysis.
     """
 
-    def __init__(self, coinbase_client, lm_studio_url: str = "http://100.103.223.74:1234"):
-        self.client = coinbase_client
+    NEWS_DEADLINE = 6.0  # Seconds, queueing + inference
+
+    def __init__(self, coinbase_client, lm_studio_url: str = "http://100.103.223.74:1234",
+                 llm: Optional[LLMExecutor] = None):
+        self.client = get_market_cache(coinbase_client)
         self.lm_url = lm_studio_url
+        self.llm = llm or get_llm_executor(lm_studio_url)
         self.scout_id = "alpha"
-        self.price_history = {}
+        self.price_history = PriceHistoryStore()
         self.circuit_breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=300)
 
-    def scan_momentum(self, product_ids: List[str]) -> Dict:
-        """Track price momentum across products."""
+    def scan_momentum(self, product_ids: List[str], tickers: Optional[Dict[str, Dict]] = None) -> Dict:
+        """Track price momentum across products. `tickers` (pid -> analyze_ticker result) skips the fetch."""
         results = {
             "scout_id": self.scout_id,
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "momentum": {}
         }
         
+        if tickers is None:
+            # One metadata call for the whole scan (analyze_ticker reads from it)
+            self.client.get_products_snapshot(product_ids)
+        
         for pid in product_ids:
             try:
-                ticker = self.client.analyze_ticker(pid)
+                ticker = tickers[pid] if tickers is not None else self.client.analyze_ticker(pid)
                 if "error" not in ticker:
                     price = ticker["market_price"]
                     vol = ticker.get("volume_24h", 0)
                     
-                    if pid not in self.price_history:
-                        self.price_history[pid] = []
-                    self.price_history[pid].append(price)
-                    
-                    if len(self.price_history[pid]) > 60:
-                        self.price_history[pid] = self.price_history[pid][-60:]
-                    
-                    history = self.price_history[pid]
-                    momentum_1h = 0
-                    if len(history) >= 2:
-                        momentum_1h = ((price - history[0]) / history[0]) * 100
+                    # Weighted by the rolling 24h volume at each sample (no per-trade volume here)
+                    history = self.price_history.record(pid, price, vol)
+                    momenta = {name: None if m is None else round(m, 4) for name, m in history.momenta().items()}
+                    vw_momentum = history.volume_weighted_momentum(HORIZONS["1h"])
                     
                     results["momentum"][pid] = {
                         "price": price,
                         "volume_24h": vol,
-                        "momentum_1h_pct": round(momentum_1h, 4),
-                        "samples": len(history)
+                        "momentum_1h_pct": momenta["1h"] or 0,
+                        "momentum_pct": momenta,
+                        "vw_momentum_1h_pct": None if vw_momentum is None else round(vw_momentum, 4),
+                        "samples": len(history),
+                        "span_s": round(history.span)
                     }
             except Exception as e:
                 results["momentum"][pid] = {"error": str(e)}
         
         return results
 
-    def _fetch_news_summary(self) -> Optional[str]:
-        """Internal method to fetch news from LM Studio."""
-        try:
-            resp = requests.post(
-                f"{self.lm_url}/v1/chat/completions",
-                json={
-                    "model": "qwen2.5-vl-3b-instruct",
-                    "messages": [{"role": "user", "content": 
-                        "In 2 sentences, summarize the current crypto market conditions. "
-                        "Focus on BTC dominance, overall market trend, and any major events."}],
-                    "temperature": 0.3,
-                    "max_tokens": 100
-                },
-                timeout=(2, 4)  # (connect_timeout, read_timeout)
-            )
-            return resp.json()["choices"][0]["message"]["content"]
-        except Exception:
-            return None
-
     def get_crypto_news_summary(self) -> str:
-        """Ask LM Studio for news summary with hard timeout via ThreadPoolExecutor."""
+        """Ask LM Studio for a news summary; the shared executor cancels it at the deadline."""
         if not self.circuit_breaker.can_execute():
             return "LM Studio circuit open — skipped"
         
         try:
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(self._fetch_news_summary)
-                result = future.result(timeout=6)  # Hard 6 second timeout
-                
-                if result:
-                    self.circuit_breaker.record_success()
-                    return result
-                else:
-                    self.circuit_breaker.record_failure()
-                    return "LM Studio no response"
+            result = self.llm.chat(
+                "qwen2.5-vl-3b-instruct",
+                "In 2 sentences, summarize the current crypto market conditions. "
+                "Focus on BTC dominance, overall market trend, and any major events.",
+                max_tokens=100, temperature=0.3, deadline=self.NEWS_DEADLINE
+            )
+            if result:
+                self.circuit_breaker.record_success()
+                return result
+            else:
+                self.circuit_breaker.record_failure()
+                return "LM Studio no response"
                     
         except FutureTimeout:
             self.circuit_breaker.record_failure()
-            return "LM Studio timeout (6s)"
+            return f"LM Studio timeout ({self.NEWS_DEADLINE:g}s)"
         except Exception as e:
             self.circuit_breaker.record_failure()
             return f"LM Studio error: {type(e).__name__}"
@@ -156,81 +152,44 @@ class ScoutBeta:
 
     def __init__(self, coinbase_client, lm_studio_url: str = None):
         """Note: lm_studio_url parameter kept for API compatibility but NOT used."""
-        self.client = coinbase_client
+        self.client = get_market_cache(coinbase_client)
         self.scout_id = "beta"
-        self.price_history = {}
+        self.candles = self.client.candles  # Shared with every other consumer of the cache
+        self.indicators = {}  # product_id -> IndicatorState
 
-    def scan_coinbase(self, product_ids: List[str]) -> List[Dict]:
-        """Scan specified products for trading opportunities."""
+    def scan_coinbase(self, product_ids: List[str], tickers: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+        """Scan specified products for trading opportunities. `tickers` skips the ticker fetch."""
         opportunities = []
+        if tickers is None:
+            # One metadata call for the whole scan (analyze_ticker reads from it)
+            self.client.get_products_snapshot(product_ids)
         for pid in product_ids:
-            try:
-                ticker = self.client.analyze_ticker(pid)
-                if "error" not in ticker:
-                    # Get real technical indicators from 15-min candles
-                    candles = self.client.get_recent_candles(pid, "FIFTEEN_MINUTE", 50)
-                    if candles:
-                        ticker["rsi_14"] = self._calculate_rsi(candles, 14)
-                        ticker["ma_20"] = self._calculate_ma(candles, 20)
-                        ticker["std_20"] = self._calculate_std(candles, 20)
-                        ticker["candles"] = candles[-20:]
-                    else:
-                        ticker["rsi_14"] = 50.0
-                        ticker["ma_20"] = ticker["market_price"]
-                        ticker["std_20"] = ticker["market_price"] * 0.01
-                    
-                    opportunities.append(ticker)
-            except Exception as e:
-                pass
+            ticker = tickers[pid] if tickers is not None else None
+            opportunity = self.scan_product(pid, ticker)
+            if opportunity is not None:
+                opportunities.append(opportunity)
         return opportunities
 
-    def _calculate_rsi(self, candles: List[Dict], period: int = 14) -> float:
-        """Calculate RSI from candle data."""
-        if len(candles) < period + 1:
-            return 50.0
-        
-        sorted_candles = sorted(candles, key=lambda x: x.get("start", 0))
-        closes = [float(c.get("close", 0)) for c in sorted_candles]
-        
-        if len(closes) < period + 1:
-            return 50.0
-            
-        changes = [closes[i] - closes[i-1] for i in range(1, len(closes))]
-        recent_changes = changes[-period:]
-        
-        gains = [c for c in recent_changes if c > 0]
-        losses = [-c for c in recent_changes if c < 0]
-        
-        avg_gain = sum(gains) / period if gains else 0
-        avg_loss = sum(losses) / period if losses else 0
-        
-        if avg_loss == 0:
-            return 100.0 if avg_gain > 0 else 50.0
-        
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        return max(0, min(100, rsi))
-
-    def _calculate_ma(self, candles: List[Dict], period: int = 20) -> float:
-        """Calculate Simple Moving Average."""
-        if len(candles) < period:
-            return float(candles[-1].get("close", 0)) if candles else 0
-        
-        sorted_candles = sorted(candles, key=lambda x: x.get("start", 0))
-        closes = [float(c.get("close", 0)) for c in sorted_candles[-period:]]
-        return sum(closes) / len(closes)
-
-    def _calculate_std(self, candles: List[Dict], period: int = 20) -> float:
-        """Calculate Standard Deviation."""
-        if len(candles) < period:
-            return 0.01
-        
-        sorted_candles = sorted(candles, key=lambda x: x.get("start", 0))
-        closes = [float(c.get("close", 0)) for c in sorted_candles[-period:]]
-        
-        ma = sum(closes) / len(closes)
-        variance = sum((c - ma) ** 2 for c in closes) / len(closes)
-        return variance ** 0.5
+    def scan_product(self, pid: str, ticker: Optional[Dict] = None) -> Optional[Dict]:
+        """One product: ticker (fetched unless given) plus 15m candle indicators; None on error."""
+        try:
+            ticker = dict(ticker) if ticker is not None else self.client.analyze_ticker(pid)
+            if "error" in ticker:
+                return None
+            # Get real technical indicators from 15-min candles
+            candles = self.candles.get_recent(pid, "FIFTEEN_MINUTE", 50, last_price=ticker["market_price"])
+            if candles:
+                if pid not in self.indicators:
+                    self.indicators[pid] = IndicatorState()
+                ticker.update(self.indicators[pid].sync(candles))
+                ticker["candles"] = candles[-20:]
+            else:
+                ticker["rsi_14"] = 50.0
+                ticker["ma_20"] = ticker["market_price"]
+                ticker["std_20"] = ticker["market_price"] * 0.01
+            return ticker
+        except Exception:
+            return None
 
 
 class ScoutGamma:
@@ -240,41 +199,16 @@ class ScoutGamma:
     Job: Fast sentiment classification from market context.
     """
 
-    def __init__(self, lm_studio_url: str = "http://100.103.223.74:1234"):
+    SENTIMENT_DEADLINE = 5.0  # Seconds, queueing + inference
+
+    def __init__(self, lm_studio_url: str = "http://100.103.223.74:1234", llm: Optional[LLMExecutor] = None):
         self.lm_url = lm_studio_url
+        self.llm = llm or get_llm_executor(lm_studio_url)
         self.scout_id = "gamma"
         self.circuit_breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=300)
 
-    def _fetch_sentiment(self, texts: List[str]) -> Optional[float]:
-        """Internal method to fetch sentiment from LM Studio."""
-        prompt = (
-            "You are a crypto sentiment classifier. "
-            "Based on general market conditions, output a single number between 0.0 (extreme fear) "
-            "and 1.0 (extreme greed). Output ONLY the number.\n\n"
-            f"Context: {texts[:5]}"
-        )
-        
-        try:
-            resp = requests.post(
-                f"{self.lm_url}/v1/chat/completions",
-                json={
-                    "model": "gemma-2-2b-it",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.1,
-                    "max_tokens": 10
-                },
-                timeout=(2, 3)
-            )
-            content = resp.json()["choices"][0]["message"]["content"]
-            import re
-            match = re.search(r"(\d+\.?\d*)", content)
-            score = float(match.group(1)) if match else 0.5
-            return max(0.0, min(1.0, score))
-        except Exception:
-            return None
-
     def classify_sentiment(self, texts: List[str] = None) -> float:
-        """Return aggregate sentiment 0-1 with hard timeout."""
+        """Return aggregate sentiment 0-1; the shared executor cancels the call at the deadline."""
         if not texts:
             texts = [
                 "What is the current crypto market sentiment?",
@@ -284,49 +218,120 @@ class ScoutGamma:
         if not self.circuit_breaker.can_execute():
             return 0.5  # Neutral when circuit open
         
+        prompt = (
+            "You are a crypto sentiment classifier. "
+            "Based on general market conditions, output a single number between 0.0 (extreme fear) "
+            "and 1.0 (extreme greed). Output ONLY the number.\n\n"
+            f"Context: {texts[:5]}"
+        )
         try:
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(self._fetch_sentiment, texts)
-                result = future.result(timeout=5)  # Hard 5 second timeout
-                
-                if result is not None:
-                    self.circuit_breaker.record_success()
-                    return result
-                else:
-                    self.circuit_breaker.record_failure()
-                    return 0.5
-                    
-        except FutureTimeout:
-            self.circuit_breaker.record_failure()
-            return 0.5
-        except Exception:
+            content = self.llm.chat("gemma-2-2b-it", prompt, max_tokens=10, temperature=0.1,
+                                    deadline=self.SENTIMENT_DEADLINE)
+            match = re.search(r"(\d+\.?\d*)", content)
+            score = float(match.group(1)) if match else 0.5
+            self.circuit_breaker.record_success()
+            return max(0.0, min(1.0, score))
+        except Exception:  # Incl. FutureTimeout
             self.circuit_breaker.record_failure()
             return 0.5
 
 
 class ScoutSwarm:
-    def __init__(self, coinbase_client, lm_studio_url: str = "http://100.103.223.74:1234"):
-        self.alpha = ScoutAlpha(coinbase_client, lm_studio_url)
-        self.beta = ScoutBeta(coinbase_client)  # No LM Studio URL needed
-        self.gamma = ScoutGamma(lm_studio_url)
-
-    def full_scan(self, product_ids: List[str]) -> Dict:
-        """Run full scout swarm scan with parallel execution where safe."""
-        # ScoutBeta runs first - it's fast and reliable (no external deps)
-        opportunities = self.beta.scan_coinbase(product_ids)
-        
-        # ScoutAlpha momentum - also reliable
-        momentum = self.alpha.scan_momentum(product_ids)
-        
-        # These can timeout - run with caution
-        news_summary = self.alpha.get_crypto_news_summary()
-        sentiment = self.gamma.classify_sentiment()
-        
+    """
+    Runs all scouts concurrently under one scan deadline.
+
+    Tickers are fetched once per product (in parallel) and shared by Beta and
+    Alpha; Beta's per-product candle work fans out too, while the two LM
+    Studio calls start immediately alongside. Whatever has not finished by
+    the deadline is reported as "timeout" in scout_status and replaced by a
+    neutral default, so a slow scout costs its own result, not the scan.
+    """
+
+    SCOUTS = ("tickers", "beta", "alpha", "news", "sentiment")
+
+    def __init__(self, coinbase_client, lm_studio_url: str = "http://100.103.223.74:1234",
+                 deadline: float = 40.0, max_workers: int = 16):
+        self.client = get_market_cache(coinbase_client)
+        self.llm = get_llm_executor(lm_studio_url)  # One executor/session for both LLM scouts
+        self.alpha = ScoutAlpha(self.client, lm_studio_url, llm=self.llm)
+        self.beta = ScoutBeta(self.client)  # No LM Studio URL needed
+        self.gamma = ScoutGamma(lm_studio_url, llm=self.llm)
+        self.deadline = deadline
+        # Scouts are blocking (requests); the event loop only schedules them
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scout")
+
+    def full_scan(self, product_ids: List[str], deadline: Optional[float] = None) -> Dict:
+        """Run full scout swarm scan, all scouts in parallel (sync wrapper for the radar)."""
+        return asyncio.run(self.full_scan_async(product_ids, deadline))
+
+    async def full_scan_async(self, product_ids: List[str], deadline: Optional[float] = None) -> Dict:
+        deadline = self.deadline if deadline is None else deadline
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        def run(fn, *args):
+            return loop.run_in_executor(self._pool, fn, *args)
+
+        def fetch_ticker(pid: str) -> Dict:
+            try:
+                return self.client.analyze_ticker(pid)
+            except Exception as e:
+                return {"error": str(e)}
+
+        async def tickers():
+            # One metadata call for the whole scan (analyze_ticker reads from it)
+            await run(self.client.get_products_snapshot, product_ids)
+            fetched = await asyncio.gather(*(run(fetch_ticker, pid) for pid in product_ids))
+            return dict(zip(product_ids, fetched))
+
+        tickers_task = asyncio.ensure_future(tickers())
+
+        async def beta():
+            shared = await asyncio.shield(tickers_task)
+            scanned = await asyncio.gather(*(run(self.beta.scan_product, pid, shared[pid]) for pid in product_ids))
+            return [o for o in scanned if o is not None]
+
+        async def alpha():
+            return await run(self.alpha.scan_momentum, product_ids, await asyncio.shield(tickers_task))
+
+        tasks = {
+            "tickers": tickers_task,
+            "beta": asyncio.ensure_future(beta()),
+            "alpha": asyncio.ensure_future(alpha()),
+            "news": asyncio.ensure_future(run(self.alpha.get_crypto_news_summary)),
+            "sentiment": asyncio.ensure_future(run(self.gamma.classify_sentiment)),
+        }
+        _, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()  # Stops waiting; a blocking call already running finishes in its worker
+
+        status, values = {}, {}
+        for name, task in tasks.items():
+            if task in pending:
+                status[name] = "timeout"
+            elif task.exception() is not None:
+                status[name] = f"error: {type(task.exception()).__name__}"
+            else:
+                status[name] = "ok"
+                values[name] = task.result()
+
+        return {
+            "momentum": values.get("alpha", {"scout_id": "alpha", "momentum": {}}),
+            "news_summary": values.get("news", f"News scout {status['news']}"),
+            "opportunities": values.get("beta", []),
+            "sentiment": values.get("sentiment", 0.5),
+            "scout_status": status,
+            "partial": any(v != "ok" for v in status.values()),
+            "timeout": "timeout" in status.values(),
+            "elapsed": loop.time() - started,
+        }
+
+    def get_stats(self) -> Dict:
+        """LLM executor metrics (queue wait, latency, timeouts) plus circuit breaker states."""
         return {
-            "momentum": momentum,
-            "news_summary": news_summary,
-            "opportunities": opportunities,
-            "sentiment": sentiment
+            "llm": self.llm.get_stats(),
+            "market_cache": self.client.get_stats(),
+            "circuits": {"alpha": self.alpha.circuit_breaker.state, "gamma": self.gamma.circuit_breaker.state},
         }
 
 
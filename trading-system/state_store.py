@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+State Store
+Versioned binary snapshots of in-memory trading state, so a restarted radar
+resumes where it stopped instead of starting cold.
+
+Components register under a name and implement:
+    STATE_VERSION              class attribute, bumped when the state shape changes
+    snapshot_state() -> dict   plain data (lists, dicts, arrays, bytes)
+    restore_state(state)
+The store pickles {name: (version, state)} with a format header, writes it
+to a temp file, fsyncs and renames it over the previous checkpoint, so a
+crash mid-write leaves the last good snapshot in place. On restore, a
+component whose saved version differs from its current STATE_VERSION, or
+whose restore_state raises, is skipped (it starts fresh) rather than
+aborting startup.
+
+    store = StateStore("data/state.pkl")
+    store.register("risk", engine.risk)
+    store.restore()                 # at startup
+    store.maybe_checkpoint()        # after each scan (every `interval` seconds)
+"""
+
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Dict, List
+
+STATE_FORMAT = "resonance-state"
+FORMAT_VERSION = 1
+
+
+class StateStore:
+    """Periodic atomic checkpoints of registered components."""
+
+    def __init__(self, path: str = "data/state.pkl", interval: float = 60.0):
+        self.path = Path(path)
+        self.interval = interval
+        self.components: Dict[str, object] = {}
+        self._last_checkpoint = time.monotonic()
+        self.stats = {"checkpoints": 0, "checkpoint_ms": 0.0, "bytes": 0, "restored": 0, "restore_ms": 0.0}
+
+    def register(self, name: str, component):
+        self.components[name] = component
+
+    def register_all(self, components: Dict[str, object]):
+        for name, component in components.items():
+            self.register(name, component)
+
+    # ─── Checkpoints ───
+
+    def checkpoint(self) -> int:
+        """Write every component's state now. Returns the snapshot size in bytes."""
+        start = time.perf_counter()
+        payload = {
+            "format": STATE_FORMAT,
+            "version": FORMAT_VERSION,
+            "saved_at": time.time(),
+            "components": {name: (type(c).STATE_VERSION, c.snapshot_state())
+                           for name, c in self.components.items()},
+        }
+        data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+        self._last_checkpoint = time.monotonic()
+        self.stats["checkpoints"] += 1
+        self.stats["checkpoint_ms"] = (time.perf_counter() - start) * 1000
+        self.stats["bytes"] = len(data)
+        return len(data)
+
+    def maybe_checkpoint(self) -> bool:
+        """Checkpoint if `interval` seconds have passed since the last one."""
+        if time.monotonic() - self._last_checkpoint < self.interval:
+            return False
+        try:
+            self.checkpoint()
+        except Exception as e:  # A failed checkpoint must never take the scan down with it
+            print(f"⚠️ State checkpoint failed: {type(e).__name__}: {e}")
+            return False
+        return True
+
+    # ─── Restore ───
+
+    def restore(self) -> List[str]:
+        """Restore registered components from the last checkpoint. Returns the names restored."""
+        if not self.path.exists():
+            return []
+        start = time.perf_counter()
+        try:
+            with open(self.path, "rb") as f:
+                payload = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+            print(f"⚠️ State snapshot {self.path} unreadable ({e}) — starting fresh")
+            return []
+        if not isinstance(payload, dict) or payload.get("format") != STATE_FORMAT \
+                or payload.get("version") != FORMAT_VERSION:
+            print(f"⚠️ State snapshot {self.path} has an unknown format — starting fresh")
+            return []
+
+        restored = []
+        for name, (version, state) in payload["components"].items():
+            component = self.components.get(name)
+            if component is None:
+                continue
+            if version != type(component).STATE_VERSION:
+                print(f"⚠️ State for {name} is v{version}, expected v{type(component).STATE_VERSION} — skipped")
+                continue
+            try:
+                component.restore_state(state)
+            except Exception as e:  # One bad component starts fresh; the rest still restore
+                print(f"⚠️ State for {name} could not be restored ({type(e).__name__}: {e}) — skipped")
+                continue
+            restored.append(name)
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stats["restored"] = len(restored)
+        self.stats["restore_ms"] = elapsed
+        age = time.time() - payload["saved_at"]
+        print(f"♻️ Restored {', '.join(restored) or 'nothing'} from {self.path} "
+              f"in {elapsed:.1f}ms (snapshot {age / 60:.0f} min old)")
+        return restored
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, components=list(self.components))
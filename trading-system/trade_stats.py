@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Trade Stats
+Running performance statistics over closed trades, updated in O(1) per trade.
+
+RunningStats keeps running sums (P&L, wins/losses, Brier), Welford mean/M2
+for the Sharpe denominator and a running equity peak for max drawdown, so
+TradeJournal.get_stats() no longer rescans the journal. With max_trades
+and/or max_age it becomes a sliding window (last N trades, last 7 days):
+evicted trades are subtracted back out; only drawdown, which is
+path-dependent, is recomputed over the window after an eviction.
+"""
+
+import math
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional
+
+REPORTED_TIERS = ("winning", "learning")
+DEFAULT_BRIER = 0.25
+
+
+def _epoch(timestamp) -> float:
+    """ISO timestamp -> epoch seconds (0.0 if missing/unparseable)."""
+    if not timestamp:
+        return 0.0
+    try:
+        return datetime.fromisoformat(str(timestamp)).timestamp()
+    except ValueError:
+        return 0.0
+
+
+class RunningStats:
+    """Incremental equivalent of the original full-scan TradeJournal.get_stats()."""
+
+    def __init__(self, max_trades: Optional[int] = None, max_age: Optional[float] = None):
+        self.max_trades = max_trades
+        self.max_age = max_age                # Seconds
+        self.windowed = max_trades is not None or max_age is not None
+        self._window: deque = deque()         # (epoch, pnl, outcome, p, tier) when windowed
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.wins = 0
+        self.losses = 0
+        self.total_pnl = 0.0
+        self.win_pnl = 0.0
+        self.loss_pnl = 0.0
+        self._mean = 0.0                      # Welford
+        self._m2 = 0.0
+        self._equity = 0.0
+        self._peak = 0.0
+        self._max_dd = 0.0
+        self._dd_stale = False
+        self._brier_sum = 0.0
+        self._brier_n = 0
+        self._tiers: Dict[str, list] = {}     # tier -> [trades, wins, pnl]
+        self._window.clear()
+
+    # ─── Updates ───
+
+    def add(self, pnl: float, outcome, p_bayesian: Optional[float] = None,
+            hour_tier=None, timestamp=None):
+        """Fold one closed trade in. p_bayesian None/NaN = no prediction."""
+        if p_bayesian is not None and math.isnan(p_bayesian):
+            p_bayesian = None
+        self._apply(pnl, outcome, p_bayesian, hour_tier, +1)
+
+        # Drawdown: same recurrence as the full scan (peak starts at 0)
+        self._equity += pnl
+        self._peak = max(self._peak, self._equity)
+        dd = (self._peak - self._equity) / self._peak if self._peak > 0 else 0
+        self._max_dd = max(self._max_dd, dd)
+
+        if self.windowed:
+            epoch = _epoch(timestamp) if self.max_age is not None else 0.0
+            self._window.append((epoch, pnl, outcome, p_bayesian, hour_tier))
+            if self.max_trades is not None:
+                while len(self._window) > self.max_trades:
+                    self._evict()
+
+    def _apply(self, pnl, outcome, p, tier, sign: int):
+        self.n += sign
+        self.total_pnl += sign * pnl
+        if outcome == "win":
+            self.wins += sign
+            self.win_pnl += sign * pnl
+        elif outcome == "loss":
+            self.losses += sign
+            self.loss_pnl += sign * pnl
+
+        # Welford (and its inverse for evictions)
+        if sign > 0:
+            delta = pnl - self._mean
+            self._mean += delta / self.n
+            self._m2 += delta * (pnl - self._mean)
+        elif self.n == 0:
+            self._mean = self._m2 = 0.0
+        else:
+            delta = pnl - self._mean
+            self._mean -= delta / self.n
+            self._m2 = max(self._m2 - delta * (pnl - self._mean), 0.0)
+
+        if p is not None:
+            actual = 1.0 if outcome == "win" else 0.0
+            self._brier_sum += sign * (p - actual) ** 2
+            self._brier_n += sign
+
+        if tier is not None:
+            entry = self._tiers.setdefault(tier, [0, 0, 0.0])
+            entry[0] += sign
+            entry[1] += sign * (outcome == "win")
+            entry[2] += sign * pnl
+
+    def _evict(self):
+        _, pnl, outcome, p, tier = self._window.popleft()
+        self._apply(pnl, outcome, p, tier, -1)
+        self._dd_stale = True
+
+    def expire(self, now: Optional[float] = None):
+        """Drop trades older than max_age."""
+        if self.max_age is None:
+            return
+        cutoff = (time.time() if now is None else now) - self.max_age
+        while self._window and self._window[0][0] < cutoff:
+            self._evict()
+
+    def _refresh_drawdown(self):
+        """Recompute drawdown over the window (equity restarts at 0 at the window start)."""
+        self._equity = self._peak = self._max_dd = 0.0
+        for _, pnl, _, _, _ in self._window:
+            self._equity += pnl
+            self._peak = max(self._peak, self._equity)
+            dd = (self._peak - self._equity) / self._peak if self._peak > 0 else 0
+            self._max_dd = max(self._max_dd, dd)
+        self._dd_stale = False
+
+    # ─── Output ───
+
+    def to_dict(self, now: Optional[float] = None) -> Dict:
+        """Same keys and formulas as TradeJournal.get_stats()."""
+        self.expire(now)
+        if self.n == 0:
+            return {
+                "total_trades": 0,
+                "win_rate": 0,
+                "sharpe": 0,
+                "brier_score": DEFAULT_BRIER,
+                "max_drawdown": 0,
+                "total_pnl": 0,
+                "avg_win": 0,
+                "avg_loss": 0,
+                "profit_factor": 0
+            }
+        if self._dd_stale:
+            self._refresh_drawdown()
+
+        gross_loss = abs(self.loss_pnl)
+        if self.n > 1:
+            mean_pnl = self.total_pnl / self.n
+            std_pnl = math.sqrt(self._m2 / (self.n - 1))
+            sharpe = (mean_pnl / std_pnl) * math.sqrt(365) if std_pnl > 0 else 0
+        else:
+            sharpe = 0
+
+        tier_stats = {}
+        for tier in REPORTED_TIERS:
+            trades, wins, pnl = self._tiers.get(tier, (0, 0, 0.0))
+            if trades:
+                tier_stats[tier] = {"trades": trades, "win_rate": wins / trades, "pnl": pnl}
+
+        return {
+            "total_trades": self.n,
+            "wins": self.wins,
+            "losses": self.losses,
+            "win_rate": self.wins / self.n,
+            "total_pnl": self.total_pnl,
+            "avg_win": self.win_pnl / self.wins if self.wins else 0,
+            "avg_loss": self.loss_pnl / self.losses if self.losses else 0,
+            "profit_factor": self.win_pnl / gross_loss if gross_loss > 0 else float('inf'),
+            "sharpe": sharpe,
+            "max_drawdown": self._max_dd,
+            "brier_score": self._brier_sum / self._brier_n if self._brier_n else DEFAULT_BRIER,
+            "tier_stats": tier_stats
+        }